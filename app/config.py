@@ -1,9 +1,11 @@
+from typing import List, Optional
 from pydantic import BaseSettings
 
 
 class Settings(BaseSettings):
     # Common
     app_env: str
+    strict_responses: bool = False
 
     # AWS
     aws_region: str
@@ -13,5 +15,56 @@ class Settings(BaseSettings):
     # Constrants
     bucket_name: str = "escapenote-images"
 
+    # Storage
+    s3_endpoint_url: Optional[str] = None
+    s3_max_pool_connections: int = 20
+    s3_multipart_threshold: int = 8 * 1024 * 1024
+    s3_multipart_chunksize: int = 8 * 1024 * 1024
+
+    # Image
+    image_ingest_concurrency: int = 4
+    image_timeout: int = 10
+    image_max_upload_size: int = 30 * 1024 * 1024
+    image_max_pixels: int = 50_000_000
+    image_max_dimension: int = 2048
+    image_variant_sizes: List[int] = [320, 640]
+    image_quality: int = 80
+    image_gc_prefixes: List[str] = ["cafes/", "themes/"]
+    image_gc_grace_hours: int = 24
+
+    # Search
+    search_window_size: int = 500
+    search_refresh_seconds: int = 300
+
+    # Bulk import/export
+    bulk_chunk_size: int = 500
+    bulk_export_page_size: int = 500
+
+    # Genre
+    genre_refresh_seconds: int = 300
+    genre_reload_seconds: int = 5
+
+    # Entity cache
+    entity_cache_enabled: bool = True
+    entity_cache_ttl: int = 30
+    entity_cache_size: int = 2048
+
+    # Scrapper
+    chromedriver_path: str = "app/chromedriver"
+    scrapper_pool_size: int = 2
+    scrapper_static_concurrency: int = 8
+    scrapper_test_pool_size: int = 1
+    scrapper_timeout: int = 10
+    scrapper_render_max_age_hours: int = 24
+    metric_batch_size: int = 10
+    diff_ignore_spaces: bool = True
+    diff_ignore_punctuation: bool = True
+
+    # Worker
+    worker_poll_interval: float = 5.0
+    job_stale_seconds: int = 600
+    # 실행 중인 작업의 updatedAt 을 갱신하는 간격 (job_stale_seconds 보다 짧게)
+    job_heartbeat_seconds: int = 60
+
 
 settings = Settings()
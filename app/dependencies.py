@@ -1,6 +1,8 @@
 from fastapi import Depends, Request
 
 from app.auth import auth, AccessUser
+from app.utils.pagination import invalidate_counts
+from app.services.storage import get_s3_client
 
 ### 미들웨어에서 사용자 정보를 공유해서 사용하기 위한 용도
 async def pass_access_user(
@@ -8,3 +10,21 @@ async def pass_access_user(
 ):
     if user:
         request.state.sub = user.sub
+
+
+### 공유 S3 클라이언트 (테스트에서는 dependency_overrides 로 교체)
+def get_storage():
+    return get_s3_client()
+
+
+### 쓰기 요청 전후로 리스트 count 캐시 무효화
+def invalidate_counts_on_write(*names: str):
+    async def dependency(request: Request):
+        write = request.method not in ("GET", "HEAD", "OPTIONS")
+        if write:
+            invalidate_counts(*names)
+        yield
+        if write:
+            invalidate_counts(*names)
+
+    return dependency
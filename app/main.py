@@ -1,4 +1,4 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
@@ -6,6 +6,12 @@ from fastapi.middleware.gzip import GZipMiddleware
 from app.prisma import prisma
 from app.config import settings
 from app.routers import routers
+from app.services.genres import UnknownGenreError, load_genres
+from app.services.search import load_search_indexes
+from app.utils.image import close_image_executor
+from app.utils.pagination import InvalidCursorError
+from app.utils.projection import InvalidFieldError
+from app.utils.scrapper import close_browser_pool
 
 if settings.app_env == "production":
     app = FastAPI(
@@ -36,13 +42,24 @@ app.add_middleware(
 app.add_middleware(GZipMiddleware, minimum_size=1000)
 
 
+@app.exception_handler(InvalidCursorError)
+@app.exception_handler(InvalidFieldError)
+@app.exception_handler(UnknownGenreError)
+async def bad_request_handler(request: Request, exc: ValueError):
+    return ORJSONResponse(status_code=400, content={"detail": str(exc)})
+
+
 @app.on_event("startup")
 async def startup():
     await prisma.connect()
+    await load_search_indexes()
+    await load_genres()
 
 
 @app.on_event("shutdown")
 async def shutdown():
+    close_browser_pool()
+    close_image_executor()
     await prisma.disconnect()
 
 
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Any, List, Optional
 from pydantic import BaseModel, Field
 from prisma import models
@@ -14,9 +15,54 @@ class OpeningHours(BaseModel):
     closeTime: str
 
 
+class CafeRef(BaseModel):
+    id: str
+    name: Optional[str]
+    areaA: Optional[str]
+    areaB: Optional[str]
+    status: Optional[str]
+
+
+class CafeSummary(BaseModel):
+    id: str
+    naverMapId: Optional[str]
+    areaA: Optional[str]
+    areaB: Optional[str]
+    name: Optional[str]
+    intro: Optional[str]
+    addressLine: Optional[str]
+    lat: Optional[float]
+    lng: Optional[float]
+    images: Optional[List[str]]
+    website: Optional[str]
+    tel: Optional[str]
+    openingHours: Optional[List[OpeningHours]]
+    reviewsRating: Optional[float]
+    reviewsCount: Optional[int]
+    view: Optional[int]
+    status: Optional[str]
+    createdAt: Optional[datetime]
+    updatedAt: Optional[datetime]
+    themesCount: Optional[int]
+    themes: Optional[List[models.Theme]]
+    scrapper: Optional[models.Scrapper]
+
+
+# 리스트에서 고를 수 있는 관계와 기본값
+CAFE_RELATIONS = ("themesCount", "themes", "scrapper")
+CAFE_DEFAULT_RELATIONS = ("themesCount",)
+CAFE_FIELDS = tuple(x for x in CafeSummary.__fields__ if x not in CAFE_RELATIONS)
+# 리스트 기본 필드 (intro, openingHours 제외)
+CAFE_SUMMARY_FIELDS = tuple(
+    x for x in CAFE_FIELDS if x not in ("intro", "openingHours")
+)
+CAFE_REF_FIELDS = tuple(CafeRef.__fields__)
+
+
 class CafeListRes(BaseModel):
-    total: int
-    items: List[Cafe]
+    total: Optional[int]
+    items: List[CafeSummary]
+    nextCursor: Optional[str]
 
 
 class CafeDetailRes(BaseModel):
@@ -55,5 +101,14 @@ class UpdateCafeDto(BaseModel):
     status: str
 
 
+class ImportCafeDto(CreateCafeDto):
+    # 넘기면 그 id 로 만들고, 이미 있으면 건너뛴다 (다시 가져와도 중복되지 않음)
+    id: Optional[str]
+
+
+class CafeIdsDto(BaseModel):
+    ids: List[str] = Field(..., min_items=1, max_items=500)
+
+
 # For circular dependency
 Cafe.update_forward_refs()
@@ -3,13 +3,19 @@ from pydantic import BaseModel
 from prisma import models
 
 
+# 메모리 목록에서 정렬할 수 있는 필드
+GENRE_SORT_FIELDS = ("id", "createdAt", "updatedAt", "themesCount")
+
+
 class Genre(models.Genre, warn_subclass=False):
     themes: Optional[List["Theme"]]
+    themesCount: Optional[int]
 
 
 class GenreListRes(BaseModel):
-    total: int
+    total: Optional[int]
     items: List[Genre]
+    nextCursor: Optional[str]
 
 
 class CreateGenreDto(BaseModel):
@@ -1,6 +1,6 @@
-from typing import List, Optional
+from typing import Optional
 from pydantic import BaseModel, Field
-from prisma import models
+from prisma import enums, models
 
 
 class Scrapper(models.Scrapper, warn_subclass=False):
@@ -11,7 +11,11 @@ class CreateScrapperDto(BaseModel):
     url: str
     groupSelector: Optional[str] = Field("")
     themeSelector: str
+    themePostProcessing: Optional[str] = Field("")
     branchSelector: Optional[str] = Field("")
+    branchPostProcessing: Optional[str] = Field("")
+    readiness: Optional[enums.ReadinessType] = Field(enums.ReadinessType.STABLE)
+    jsOnly: Optional[bool] = Field(False)
 
 
 class UpdateScrapperDto(BaseModel):
@@ -20,7 +24,11 @@ class UpdateScrapperDto(BaseModel):
     comment: Optional[str] = Field("")
     groupSelector: Optional[str] = Field("")
     themeSelector: str
+    themePostProcessing: Optional[str] = Field("")
     branchSelector: Optional[str] = Field("")
+    branchPostProcessing: Optional[str] = Field("")
+    readiness: Optional[enums.ReadinessType] = Field(enums.ReadinessType.STABLE)
+    jsOnly: Optional[bool] = Field(False)
 
 
 # For circular dependency
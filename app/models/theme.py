@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import List, Optional
 from pydantic import BaseModel, Field
 from prisma import models
@@ -7,9 +8,49 @@ class Theme(models.Theme, warn_subclass=False):
     cafe: Optional["Cafe"]
 
 
+class ThemeSummary(BaseModel):
+    id: str
+    cafeId: Optional[str]
+    name: Optional[str]
+    displayName: Optional[str]
+    intro: Optional[str]
+    thumbnail: Optional[str]
+    price: Optional[int]
+    lockingRatio: Optional[int]
+    during: Optional[int]
+    minPerson: Optional[int]
+    maxPerson: Optional[int]
+    level: Optional[float]
+    fear: Optional[int]
+    activity: Optional[int]
+    detailUrl: Optional[str]
+    reservationUrl: Optional[str]
+    openDate: Optional[str]
+    reviewsRating: Optional[float]
+    reviewsLevel: Optional[float]
+    reviewsFear: Optional[float]
+    reviewsActivity: Optional[float]
+    reviewsCount: Optional[int]
+    view: Optional[int]
+    status: Optional[str]
+    createdAt: Optional[datetime]
+    updatedAt: Optional[datetime]
+    cafe: Optional["CafeRef"]
+    genre: Optional[List[models.Genre]]
+
+
+# 리스트에서 고를 수 있는 관계와 기본값 (카페는 CafeRef 필드만 내려준다)
+THEME_RELATIONS = ("cafe", "genre")
+THEME_DEFAULT_RELATIONS = ("cafe", "genre")
+THEME_FIELDS = tuple(x for x in ThemeSummary.__fields__ if x not in THEME_RELATIONS)
+# 리스트 기본 필드 (intro 제외)
+THEME_SUMMARY_FIELDS = tuple(x for x in THEME_FIELDS if x != "intro")
+
+
 class ThemeListRes(BaseModel):
-    total: int
-    items: List[Theme]
+    total: Optional[int]
+    items: List[ThemeSummary]
+    nextCursor: Optional[str]
 
 
 class ThemeDetailRes(BaseModel):
@@ -36,6 +77,11 @@ class CreateThemeDto(BaseModel):
     reservationUrl: Optional[str] = Field("")
 
 
+class ImportThemeDto(CreateThemeDto):
+    # 넘기면 그 id 로 만들고, 이미 있으면 건너뛴다 (다시 가져와도 중복되지 않음)
+    id: Optional[str]
+
+
 class UpdateThemeDto(BaseModel):
     cafeId: str
     name: str
@@ -58,6 +104,7 @@ class UpdateThemeDto(BaseModel):
 
 
 # For circular dependency
-from app.models.cafe import Cafe
+from app.models.cafe import Cafe, CafeRef
 
 Theme.update_forward_refs()
+ThemeSummary.update_forward_refs()
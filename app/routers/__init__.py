@@ -7,6 +7,8 @@ from app.routers import themes
 from app.routers import images
 from app.routers import scrappers
 from app.routers import metrics
+from app.routers import jobs
+from app.routers import cache
 
 routers = APIRouter()
 
@@ -16,3 +18,5 @@ routers.include_router(themes.router, dependencies=[Depends(pass_access_user)])
 routers.include_router(images.router, dependencies=[Depends(pass_access_user)])
 routers.include_router(scrappers.router)
 routers.include_router(metrics.router, dependencies=[Depends(pass_access_user)])
+routers.include_router(jobs.router, dependencies=[Depends(pass_access_user)])
+routers.include_router(cache.router, dependencies=[Depends(pass_access_user)])
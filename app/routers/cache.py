@@ -0,0 +1,29 @@
+from fastapi import APIRouter
+
+from app.services.entity_cache import cache_stats, clear_entity_cache
+from app.utils.pagination import count_cache
+
+router = APIRouter(
+    prefix="/cache",
+    tags=["cache"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@router.get("/stats")
+async def get_cache_stats():
+    """
+    캐시 적중/실패 횟수 (프로세스별)
+    """
+    return {
+        "entities": cache_stats(),
+        "counts": count_cache.stats(),
+    }
+
+
+@router.delete("")
+async def clear_cache():
+    """
+    상세 조회 캐시 비우기
+    """
+    await clear_entity_cache()
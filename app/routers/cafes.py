@@ -1,24 +1,51 @@
-import boto3
 import json
 import requests
 from bs4 import BeautifulSoup
-from typing import Optional
-from fastapi import APIRouter, HTTPException
+from typing import Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from prisma import enums
 
 from app.prisma import prisma
 from app.config import settings
-from app.models.cafe import CafeListRes, CafeDetailRes, CreateCafeDto, UpdateCafeDto
-from app.utils.image import upload_image
+from app.dependencies import get_storage, invalidate_counts_on_write
+from app.models.cafe import (
+    CAFE_DEFAULT_RELATIONS,
+    CAFE_FIELDS,
+    CAFE_RELATIONS,
+    CAFE_SUMMARY_FIELDS,
+    CafeIdsDto,
+    CafeListRes,
+    CafeDetailRes,
+    CreateCafeDto,
+    UpdateCafeDto,
+)
+from app.services.bulk import export_rows, import_cafes
+from app.services.cascade import delete_cafes, set_cafes_status
+from app.services.entity_cache import invalidate_entities, read_through, tag
+from app.services.search import index_cafe, search_cafes
+from app.utils.bulk import NDJSON_MEDIA_TYPE, BulkFormat, detect_format, iter_rows
+from app.utils.image import ingest_images
+from app.utils.pagination import (
+    RELEVANCE,
+    CountMode,
+    count_mode,
+    find_page,
+    find_ranked_page,
+)
+from app.utils.projection import parse_names, project
+from app.utils.serialization import fast_response
 
 
 router = APIRouter(
     prefix="/cafes",
     tags=["cafes"],
     responses={404: {"description": "Not found"}},
+    dependencies=[Depends(invalidate_counts_on_write("cafe", "theme"))],
 )
 
 
-@router.get("", response_model=CafeListRes)
+@router.get("", response_model=CafeListRes, response_model_exclude_unset=True)
 async def get_cafes(
     isNotScrapper: Optional[bool] = None,
     cafeId: Optional[str] = None,
@@ -28,16 +55,37 @@ async def get_cafes(
     status: Optional[str] = None,
     skip: Optional[int] = 0,
     take: Optional[int] = 20,
-    sort: Optional[str] = "createdAt",
+    cursor: Optional[str] = None,
+    count: Optional[CountMode] = CountMode.EXACT,
+    withTotal: Optional[bool] = Query(None, deprecated=True),
+    sort: Optional[str] = None,
     order: Optional[str] = "desc",
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
 ):
+    """
+    카페 리스트
+
+    기본으로 요약 필드와 테마 수(themesCount)만 내려준다.
+    fields=name,status 처럼 필드를, include=themes,scrapper 처럼 관계를 고를 수 있다.
+    term 이 있으면 기본으로 검색 순위(sort=relevance)대로 정렬한다. cafeId 로 고른 카페는 검색어와
+    맞지 않을 수 있어 순위를 매길 수 없으므로, cafeId 가 있으면 최신순으로 정렬한다.
+    """
+    fields = parse_names(fields, CAFE_FIELDS, CAFE_SUMMARY_FIELDS)
+    relations = parse_names(include, CAFE_RELATIONS, CAFE_DEFAULT_RELATIONS, "include")
+
     where = dict()
 
     filter_a = dict()
     if isNotScrapper:
         filter_a["scrapper"] = {"is": None}
-    if term:
-        filter_a["name"] = {"contains": term}
+    # 검색어가 있으면 기본으로 검색 순위대로 (순위를 매길 수 없는 relevance 는 최신순)
+    rankable = term and not cafeId
+    if not sort or (sort == RELEVANCE and not rankable):
+        sort = RELEVANCE if rankable else "createdAt"
+    ranked = await search_cafes(term) if term else None
+    if ranked is not None and sort != RELEVANCE:
+        filter_a["id"] = {"in": ranked}
     if areaA:
         filter_a["areaA"] = areaA
     if areaB:
@@ -54,29 +102,156 @@ async def get_cafes(
     else:
         where = filter_a
 
-    options = {
-        "skip": skip,
-        "take": take,
-        "where": where,
-        "include": {"themes": True},
-        "order": {sort: order},
-    }
+    include_relations = {x: True for x in relations if x != "themesCount"}
+    if sort == RELEVANCE:
+        page = await find_ranked_page(
+            prisma.cafe,
+            where,
+            ranked,
+            skip=skip,
+            take=take,
+            cursor=cursor,
+            include=include_relations,
+            count=count_mode(count, withTotal),
+            name="cafe",
+            window=settings.search_window_size,
+        )
+    else:
+        page = await find_page(
+            prisma.cafe,
+            where,
+            sort,
+            order,
+            skip=skip,
+            take=take,
+            cursor=cursor,
+            count=count_mode(count, withTotal),
+            name="cafe",
+            include=include_relations,
+        )
+
+    themes_count = dict()
+    if "themesCount" in relations:
+        themes_count = await count_themes([x.id for x in page["items"]])
+
+    items = list()
+    for cafe in page["items"]:
+        item = project(cafe, fields)
+        item["id"] = cafe.id
+        if "themesCount" in relations:
+            item["themesCount"] = themes_count.get(cafe.id, 0)
+        for relation in ("themes", "scrapper"):
+            if relation in relations:
+                item[relation] = getattr(cafe, relation)
+        items.append(item)
+    page["items"] = items
+    return fast_response(page)
+
+
+async def count_themes(cafe_ids: List[str]) -> Dict[str, int]:
+    """
+    카페별 테마 수
+    """
+    if not cafe_ids:
+        return dict()
+    groups = await prisma.theme.group_by(
+        ["cafeId"],
+        where={"cafeId": {"in": cafe_ids}},
+        count=True,
+    )
+    return {x["cafeId"]: x["_count"]["_all"] for x in groups}
+
+
+CAFE_DETAIL_INCLUDE = {
+    "themes": True,
+    "scrapper": True,
+}
+
+
+def cafe_detail_tags(cafe) -> List[str]:
+    tags = [tag("theme", x.id) for x in cafe.themes or []]
+    if cafe.scrapper:
+        tags.append(tag("scrapper", cafe.scrapper.id))
+    return tags
+
+
+# /{id} 경로보다 먼저 선언해야 bulk 가 id 로 해석되지 않는다
+@router.patch("/bulk/enabled")
+async def bulk_enabled_cafes(body: CafeIdsDto):
+    """
+    여러 카페 활성화 (모든 테마 포함)
+    """
+    return await set_cafes_status(body.ids, "PUBLISHED")
+
+
+@router.patch("/bulk/disabled")
+async def bulk_disabled_cafes(body: CafeIdsDto):
+    """
+    여러 카페 비활성화 (모든 테마 포함)
+    """
+    return await set_cafes_status(body.ids, "DELETED")
+
+
+@router.post("/bulk/delete")
+async def bulk_delete_cafes(body: CafeIdsDto, s3=Depends(get_storage)):
+    """
+    여러 카페 삭제
+
+    이미지 삭제는 커밋된 뒤 작업 큐에 등록되어 워커가 처리한다. 리뷰 등 다른 데이터가 참조해서
+    지울 수 없는 카페는 blocked 에 담긴다.
+    """
+    return await delete_cafes(s3, body.ids, deferred=True)
+
+
+@router.post("/bulk/import")
+async def bulk_import_cafes(request: Request, format: Optional[BulkFormat] = None):
+    """
+    카페 대량 가져오기 (NDJSON 또는 CSV 본문)
+
+    형식은 format 이 없으면 Content-Type 으로 고른다. CSV 의 images 는 | 로 구분하고
+    openingHours 는 JSON 문자열로 넣는다. 잘못된 행은 건너뛰고 errors 에 줄 번호와 사유를 담는다.
+    """
+    format = format or detect_format(request.headers.get("content-type"))
+    rows = iter_rows(
+        request.stream(),
+        format,
+        list_fields=("images",),
+        json_fields=("openingHours",),
+    )
+    return await import_cafes(rows)
 
-    total = await prisma.cafe.count(where=where)
-    cafes = await prisma.cafe.find_many(**options)
-    return {"total": total, "items": cafes}
+
+@router.get("/bulk/export")
+async def bulk_export_cafes(status: Optional[enums.StatusType] = None):
+    """
+    카페 내보내기 (NDJSON 스트림)
+    """
+    where = {"status": status} if status else {}
+    return StreamingResponse(
+        export_rows(prisma.cafe, where), media_type=NDJSON_MEDIA_TYPE
+    )
 
 
 @router.get("/{id}", response_model=CafeDetailRes)
 async def get_cafe(id: str):
-    cafe = await prisma.cafe.find_unique(
-        where={"id": id},
-        include={
-            "themes": True,
-            "scrapper": True,
-        },
+    cafe = await read_through(
+        "cafe",
+        id,
+        CAFE_DETAIL_INCLUDE,
+        lambda: prisma.cafe.find_unique(where={"id": id}, include=CAFE_DETAIL_INCLUDE),
+        cafe_detail_tags,
     )
-    return cafe
+    return fast_response(cafe)
+
+
+async def save_cafe_images(sources: List[str]):
+    """
+    카페 이미지 저장. 저장된 경로 목록과 실패한 이미지 목록을 반환
+    """
+    results = await ingest_images(sources or [], "cafes")
+    images = [x.url for x in results if x.url]
+    errors = [{"source": x.source, "error": x.error} for x in results if x.error]
+    return images, errors
 
 
 @router.post("")
@@ -84,15 +259,7 @@ async def create_cafe(body: CreateCafeDto):
     """
     카페 추가
     """
-    images = list()
-    for i in range(len(body.images)):
-        if "http" in body.images[i]:
-            url = upload_image(body.images[i], "cafes")
-        else:
-            url = body.images[i]
-
-        if url:
-            images.append(url)
+    images, image_errors = await save_cafe_images(body.images)
 
     cafe = await prisma.cafe.create(
         data={
@@ -111,7 +278,8 @@ async def create_cafe(body: CreateCafeDto):
             "status": "PUBLISHED",
         }
     )
-    return cafe
+    index_cafe(cafe)
+    return {**cafe.dict(), "imageErrors": image_errors}
 
 
 @router.patch("/{id}")
@@ -119,15 +287,7 @@ async def update_cafe(id: str, body: UpdateCafeDto):
     """
     카페 수정
     """
-    images = list()
-    for i in range(len(body.images)):
-        if "http" in body.images[i]:
-            url = upload_image(body.images[i], "cafes")
-        else:
-            url = body.images[i]
-
-        if url:
-            images.append(url)
+    images, image_errors = await save_cafe_images(body.images)
 
     cafe = await prisma.cafe.update(
         where={"id": id},
@@ -147,61 +307,47 @@ async def update_cafe(id: str, body: UpdateCafeDto):
             "status": body.status,
         },
     )
-    return cafe
+    index_cafe(cafe)
+    await invalidate_entities(tag("cafe", id))
+    return {**cafe.dict(), "imageErrors": image_errors}
 
 
 @router.patch("/{id}/enabled")
 async def enabled_cafe(id: str):
     """
-    카페 활성화
+    카페 활성화 (모든 테마 포함)
     """
-    await prisma.theme.update_many(
-        where={"cafeId": id},
-        data={"status": "PUBLISHED"},
-    )
-    await prisma.cafe.update(
-        where={"id": id},
-        data={"status": "PUBLISHED"},
-    )
+    result = await set_cafes_status([id], "PUBLISHED")
+    if result["notFound"]:
+        raise HTTPException(status_code=404, detail="Not found")
 
 
 @router.patch("/{id}/disabled")
 async def disabled_cafe(id: str):
     """
-    카페 비활성화
+    카페 비활성화 (모든 테마 포함)
     """
-    await prisma.theme.update_many(
-        where={"cafeId": id},
-        data={"status": "DELETED"},
-    )
-    await prisma.cafe.update(
-        where={"id": id},
-        data={"status": "DELETED"},
-    )
+    result = await set_cafes_status([id], "DELETED")
+    if result["notFound"]:
+        raise HTTPException(status_code=404, detail="Not found")
 
 
 @router.delete("/{id}")
-async def delete_cafe(id: str):
+async def delete_cafe(
+    id: str, deferred: Optional[bool] = False, s3=Depends(get_storage)
+):
     """
     카페 삭제
+
+    카페와 모든 테마를 한 트랜잭션으로 삭제한 뒤, 카페 이미지와 테마 썸네일을 모아
+    한 번에(1000개 단위) 삭제한다.
     """
-    session = boto3.Session()
-    s3 = session.resource("s3")
-    bucket_name = settings.bucket_name
-    bucket = s3.Bucket(bucket_name)
-
-    # 테마 이미지 및 데이터 삭제
-    themes = await prisma.theme.find_many(where={"cafeId": id})
-    for theme in themes:
-        if theme.thumbnail:
-            bucket.delete_objects(Delete={"Objects": [{"Key": theme.thumbnail[1:]}]})
-    await prisma.theme.delete_many(where={"cafeId": id})
-
-    # 카페 이미지 및 데이터 삭제
-    cafe = await prisma.cafe.find_unique(where={"id": id})
-    for image in cafe.images:
-        bucket.delete_objects(Delete={"Objects": [{"Key": image[1:]}]})
-    await prisma.cafe.delete(where={"id": id})
+    result = await delete_cafes(s3, [id], deferred=deferred)
+    if result["notFound"]:
+        raise HTTPException(status_code=404, detail="Not found")
+    if result["blocked"]:
+        raise HTTPException(status_code=409, detail="Cafe is referenced by other data")
+    return result["images"]
 
 
 @router.get("/{naver_map_id}/cafe")
@@ -1,14 +1,21 @@
 from typing import Optional
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Query
 
 from app.prisma import prisma
-from app.models.genre import CreateGenreDto, GenreListRes
+from app.dependencies import invalidate_counts_on_write
+from app.models.genre import GENRE_SORT_FIELDS, CreateGenreDto, GenreListRes
+from app.services.entity_cache import invalidate_entities, tag
+from app.services.genres import get_genres, load_genres
+from app.utils.pagination import CountMode, count_mode, find_page, paginate_items
+from app.utils.projection import InvalidFieldError
+from app.utils.serialization import fast_response
 
 
 router = APIRouter(
     prefix="/genre",
     tags=["genre"],
     responses={404: {"description": "Not found"}},
+    dependencies=[Depends(invalidate_counts_on_write("genre", "theme"))],
 )
 
 
@@ -18,27 +25,47 @@ async def get_genre_list(
     includeThemes: Optional[bool] = False,
     skip: Optional[int] = 0,
     take: Optional[int] = 20,
+    cursor: Optional[str] = None,
+    count: Optional[CountMode] = CountMode.EXACT,
+    withTotal: Optional[bool] = Query(None, deprecated=True),
     sort: Optional[str] = "id",
     order: Optional[str] = "asc",
 ):
     """
     장르 리스트
+
+    메모리의 장르 목록에서 themesCount(장르별 테마 수)와 함께 내려준다.
+    includeThemes 를 켜면 예전처럼 DB 에서 연결된 테마까지 조회한다.
     """
+    if not includeThemes:
+        if sort not in GENRE_SORT_FIELDS:
+            raise InvalidFieldError(f"sort 에 사용할 수 없는 이름입니다: {sort}")
+        items = await get_genres()
+        if term:
+            term = term.lower()
+            items = [x for x in items if term in x["id"].lower()]
+        page = paginate_items(
+            items, sort, order, skip, take, cursor, count_mode(count, withTotal)
+        )
+        return fast_response(page)
+
     where = dict()
     if term:
         where["id"] = {"contains": term}
 
-    options = {
-        "skip": skip,
-        "take": take,
-        "where": where,
-        "include": {"themes": includeThemes},
-        "order": {sort: order},
-    }
-
-    total = await prisma.genre.count(where=where)
-    genre_list = await prisma.genre.find_many(**options)
-    return {"total": total, "items": genre_list}
+    page = await find_page(
+        prisma.genre,
+        where,
+        sort,
+        order,
+        skip=skip,
+        take=take,
+        cursor=cursor,
+        count=count_mode(count, withTotal),
+        name="genre",
+        include={"themes": True},
+    )
+    return fast_response(page)
 
 
 @router.post("")
@@ -51,6 +78,7 @@ async def create_genre(body: CreateGenreDto):
             "id": body.id,
         }
     )
+    await load_genres()
     return genre
 
 
@@ -62,3 +90,5 @@ async def delete_genre(id: str):
     await prisma.genre.delete(
         where={"id": id},
     )
+    await load_genres()
+    await invalidate_entities(tag("genre", id))
@@ -1,6 +1,12 @@
-import uuid
-import boto3
-from fastapi import APIRouter, File, UploadFile
+import os
+from typing import Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+
+from app.config import settings
+from app.dependencies import get_storage
+from app.services.jobs import JOB_IMAGE_GC, enqueue_job
+from app.utils.image import remove_images, save_uploaded_image
+from app.utils.image_processing import ImageProcessingError
 
 
 router = APIRouter(
@@ -11,46 +17,59 @@ router = APIRouter(
 
 
 @router.post("")
-async def upload_image(folderName: str, file: UploadFile = File(None)):
+async def upload_image(
+    folderName: str, file: UploadFile = File(None), s3=Depends(get_storage)
+):
     """
     이미지 업로드
+
+    WEBP 로 변환하여 저장하고 썸네일 경로를 함께 반환한다.
     """
-    session = boto3.Session()
-    s3 = session.resource("s3")
-    bucket_name = "escapenote-images"
-    bucket = s3.Bucket(bucket_name)
+    if not file:
+        raise HTTPException(status_code=400, detail="이미지 파일이 없습니다")
+
+    file.file.seek(0, os.SEEK_END)
+    size = file.file.tell()
+    file.file.seek(0)
+    if size > settings.image_max_upload_size:
+        raise HTTPException(status_code=413, detail="이미지 파일이 너무 큽니다")
 
     try:
-        filename = uuid.uuid1()
-        type = "jpeg"
-        key = f"{folderName}/{filename}.{type}"
-        bucket.upload_fileobj(
-            file.file,
-            key,
-            ExtraArgs={
-                "ContentType": f"image/{type}",
-                "CacheControl": "max-age=172800",
-            },
-        )
-        return {"url": f"/{key}"}
+        image = await save_uploaded_image(s3, file.file, folderName)
+    except ImageProcessingError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print("error", e)
         return None
+    return {
+        "url": f"/{image.key}",
+        "variants": [f"/{x}" for x in image.variants],
+    }
 
 
 @router.delete("")
-async def remove_image(key: str):
+async def remove_image(key: str, s3=Depends(get_storage)):
     """
-    이미지 삭제
+    이미지 삭제 (썸네일 포함)
     """
-    session = boto3.Session()
-    s3 = session.resource("s3")
-    bucket_name = "escapenote-images"
-    bucket = s3.Bucket(bucket_name)
-    key = key[1:]
-
     try:
-        bucket.delete_objects(Delete={"Objects": [{"Key": key}]})
+        return await remove_images(s3, [key])
     except Exception as e:
         print("error", e)
         return None
+
+
+@router.post("/gc")
+async def collect_image_garbage(
+    dryRun: Optional[bool] = True,
+    graceHours: Optional[int] = Query(None, ge=1),
+):
+    """
+    참조되지 않는 이미지 정리 작업 등록
+
+    dryRun 이면 삭제하지 않고 대상 수와 용량만 집계한다. 결과는 /jobs/{id} 에서 확인한다.
+    """
+    payload = {"dryRun": dryRun}
+    if graceHours is not None:
+        payload["graceHours"] = graceHours
+    return await enqueue_job(JOB_IMAGE_GC, payload, max_attempts=1)
@@ -0,0 +1,64 @@
+from typing import Optional
+from fastapi import APIRouter, HTTPException
+
+from app.prisma import prisma
+from app.services.jobs import cancel_job
+
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["jobs"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@router.get("")
+async def get_jobs(
+    type: Optional[str] = None,
+    status: Optional[str] = None,
+    skip: Optional[int] = 0,
+    take: Optional[int] = 20,
+    sort: Optional[str] = "createdAt",
+    order: Optional[str] = "desc",
+):
+    """
+    작업 리스트
+    """
+    where = dict()
+    if type:
+        where["type"] = type
+    if status:
+        where["status"] = status
+
+    options = {
+        "skip": skip,
+        "take": take,
+        "where": where,
+        "order": {sort: order},
+    }
+
+    total = await prisma.job.count(where=where)
+    jobs = await prisma.job.find_many(**options)
+    return {"total": total, "items": jobs}
+
+
+@router.get("/{id}")
+async def get_job(id: str):
+    """
+    작업 상세 조회
+    """
+    job = await prisma.job.find_unique(where={"id": id})
+    if not job:
+        raise HTTPException(status_code=404, detail="Not found")
+    return job
+
+
+@router.patch("/{id}/cancel")
+async def cancel_job_run(id: str):
+    """
+    작업 취소
+    """
+    canceled = await cancel_job(id)
+    if not canceled:
+        raise HTTPException(status_code=409, detail="Job is not cancelable")
+    return await prisma.job.find_unique(where={"id": id})
@@ -1,22 +1,32 @@
-from typing import Optional
-from fastapi import APIRouter, BackgroundTasks
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query
 
 from app.prisma import prisma
-from app.utils.scrapper import scrap_all_themes
+from app.dependencies import invalidate_counts_on_write
+from app.services.entity_cache import invalidate_entities, read_through, tag
+from app.services.jobs import JOB_SCRAP_ALL_THEMES, enqueue_job
+from app.utils.pagination import CountMode, count_mode, find_page
+from app.utils.scrapper import invalidate_scrap_results
+from app.utils.serialization import fast_response
 
 
 router = APIRouter(
     prefix="/metrics",
     tags=["metrics"],
     responses={404: {"description": "Not found"}},
+    dependencies=[Depends(invalidate_counts_on_write("metric"))],
 )
 
 
 @router.get("")
 async def get_metrics(
     status: Optional[str] = None,
+    stale: Optional[bool] = None,
     skip: Optional[int] = 0,
     take: Optional[int] = 20,
+    cursor: Optional[str] = None,
+    count: Optional[CountMode] = CountMode.EXACT,
+    withTotal: Optional[bool] = Query(None, deprecated=True),
     sort: Optional[str] = "createdAt",
     order: Optional[str] = "desc",
 ):
@@ -26,24 +36,29 @@ async def get_metrics(
     where = dict()
     if status:
         where["status"] = status
+    if stale is not None:
+        where["stale"] = stale
+
+    page = await find_page(
+        prisma.metric,
+        where,
+        sort,
+        order,
+        skip=skip,
+        take=take,
+        cursor=cursor,
+        count=count_mode(count, withTotal),
+        name="metric",
+        include={"scrapper": {"include": {"cafe": True}}},
+    )
+    return fast_response(page)
+
+
+METRIC_DETAIL_INCLUDE = {"scrapper": True}
 
-    options = {
-        "skip": skip,
-        "take": take,
-        "where": where,
-        "include": {
-            "scrapper": {
-                "include": {
-                    "cafe": True,
-                },
-            }
-        },
-        "order": {sort: order},
-    }
-
-    total = await prisma.metric.count(where=where)
-    metrics = await prisma.metric.find_many(**options)
-    return {"total": total, "items": metrics}
+
+def metric_detail_tags(metric) -> List[str]:
+    return [tag("scrapper", metric.scrapperId)] if metric.scrapperId else []
 
 
 @router.get("/{id}")
@@ -51,24 +66,29 @@ async def get_metric(id: str):
     """
     메트릭 상세 조회
     """
-    metric = await prisma.metric.find_unique(
-        where={"id": id},
-        include={"scrapper": True},
+    metric = await read_through(
+        "metric",
+        id,
+        METRIC_DETAIL_INCLUDE,
+        lambda: prisma.metric.find_unique(
+            where={"id": id}, include=METRIC_DETAIL_INCLUDE
+        ),
+        metric_detail_tags,
     )
-    return metric
+    return fast_response(metric)
 
 
 @router.post("")
-async def post_metric(background_tasks: BackgroundTasks):
+async def post_metric():
     """
     스크래퍼의 모든 데이터를 이용하여 스크랩
+
+    스크랩은 워커 프로세스(app.worker)에서 실행되며, 등록된 작업은 /jobs 에서 조회/취소한다.
+    모든 지표가 다시 만들어지므로 스크래퍼/지표 상세 조회 캐시를 비운다.
     """
-    scrappers = await prisma.scrapper.find_many(
-        where={"status": "PUBLISHED", "cafeId": {"not": None}},
-    )
-    await prisma.metric.delete_many()
-    background_tasks.add_task(scrap_all_themes, scrappers=scrappers)
-    return True
+    job = await enqueue_job(JOB_SCRAP_ALL_THEMES)
+    await invalidate_scrap_results()
+    return job
 
 
 @router.patch("/{id}/status")
@@ -80,3 +100,4 @@ async def change_metric_status(id: str):
         where={"id": id},
         data={"status": "NOTHING_WRONG"},
     )
+    await invalidate_entities(tag("metric", id))
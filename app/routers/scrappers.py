@@ -1,36 +1,50 @@
-import json
-from time import sleep
-from typing import Optional
-from fastapi import APIRouter
-from fastapi import APIRouter, Depends
-
-from selenium import webdriver
-from selenium.webdriver import Keys
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support.expected_conditions import presence_of_element_located
-
-from app.dependencies import pass_access_user
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.dependencies import pass_access_user, invalidate_counts_on_write
 from app.prisma import prisma
 from app.models.scrapper import (
     CreateScrapperDto,
     UpdateScrapperDto,
 )
+from app.services.entity_cache import invalidate_entities, read_through, tag
+from app.utils.pagination import CountMode, count_mode, find_page
+from app.utils.postprocessing import Pipeline, PostProcessingError
+from app.utils.scrapper import (
+    build_metric_data,
+    metric_upsert_args,
+    scrap_single_themes,
+)
+from app.utils.serialization import fast_response
 
 
 router = APIRouter(
     prefix="/scrappers",
     tags=["scrappers"],
     responses={404: {"description": "Not found"}},
+    dependencies=[Depends(invalidate_counts_on_write("scrapper", "cafe", "metric"))],
 )
 
 
+def validate_post_processing(body):
+    """
+    후처리 문법 검사
+    """
+    try:
+        Pipeline(body.themePostProcessing)
+        Pipeline(body.branchPostProcessing)
+    except PostProcessingError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("", dependencies=[Depends(pass_access_user)])
 async def get_scrapper_list(
     status: Optional[str] = None,
     skip: Optional[int] = 0,
     take: Optional[int] = 20,
+    cursor: Optional[str] = None,
+    count: Optional[CountMode] = CountMode.EXACT,
+    withTotal: Optional[bool] = Query(None, deprecated=True),
     sort: Optional[str] = "createdAt",
     order: Optional[str] = "desc",
 ):
@@ -41,17 +55,34 @@ async def get_scrapper_list(
     if status:
         where["status"] = status
 
-    options = {
-        "skip": skip,
-        "take": take,
-        "where": where,
-        "include": {"cafe": True},
-        "order": {sort: order},
-    }
+    page = await find_page(
+        prisma.scrapper,
+        where,
+        sort,
+        order,
+        skip=skip,
+        take=take,
+        cursor=cursor,
+        count=count_mode(count, withTotal),
+        name="scrapper",
+        include={"cafe": True},
+    )
+    return fast_response(page)
+
+
+SCRAPPER_DETAIL_INCLUDE = {
+    "cafe": True,
+    "metric": True,
+}
 
-    total = await prisma.scrapper.count(where=where)
-    scrapper_list = await prisma.scrapper.find_many(**options)
-    return {"total": total, "items": scrapper_list}
+
+def scrapper_detail_tags(scrapper) -> List[str]:
+    tags = list()
+    if scrapper.cafeId:
+        tags.append(tag("cafe", scrapper.cafeId))
+    if scrapper.metric:
+        tags.append(tag("metric", scrapper.metric.id))
+    return tags
 
 
 @router.get("/{id}", dependencies=[Depends(pass_access_user)])
@@ -59,14 +90,16 @@ async def get_scrapper(id: str):
     """
     스크래퍼 상세 조회
     """
-    scrapper = await prisma.scrapper.find_unique(
-        where={"id": id},
-        include={
-            "cafe": True,
-            "metric": True,
-        },
+    scrapper = await read_through(
+        "scrapper",
+        id,
+        SCRAPPER_DETAIL_INCLUDE,
+        lambda: prisma.scrapper.find_unique(
+            where={"id": id}, include=SCRAPPER_DETAIL_INCLUDE
+        ),
+        scrapper_detail_tags,
     )
-    return scrapper
+    return fast_response(scrapper)
 
 
 @router.post("")
@@ -74,12 +107,17 @@ async def create_scrapper(body: CreateScrapperDto):
     """
     스크래퍼 추가
     """
+    validate_post_processing(body)
     scrapper = await prisma.scrapper.create(
         data={
             "url": body.url,
             "groupSelector": body.groupSelector,
             "themeSelector": body.themeSelector,
+            "themePostProcessing": body.themePostProcessing,
             "branchSelector": body.branchSelector,
+            "branchPostProcessing": body.branchPostProcessing,
+            "readiness": body.readiness,
+            "jsOnly": body.jsOnly,
             "status": "PUBLISHED",
         }
     )
@@ -91,6 +129,7 @@ async def update_scrapper(id: str, body: UpdateScrapperDto):
     """
     스크래퍼 수정
     """
+    validate_post_processing(body)
     scrapper = await prisma.scrapper.update(
         where={"id": id},
         data={
@@ -101,9 +140,20 @@ async def update_scrapper(id: str, body: UpdateScrapperDto):
             "comment": body.comment,
             "groupSelector": body.groupSelector,
             "themeSelector": body.themeSelector,
+            "themePostProcessing": body.themePostProcessing,
             "branchSelector": body.branchSelector,
+            "branchPostProcessing": body.branchPostProcessing,
+            "readiness": body.readiness,
+            "jsOnly": body.jsOnly,
+            # URL 이나 셀렉터가 바뀌었을 수 있으므로 정적 요청부터 다시 시도하고 지문도 초기화
+            "fetchTier": None,
+            "etag": "",
+            "lastModified": "",
+            "contentHash": "",
         },
     )
+    # 예전 카페 상세는 scrapper 태그로, 새 카페 상세는 cafe 태그로 지운다
+    await invalidate_entities(tag("scrapper", id), tag("cafe", body.cafeId))
     return scrapper
 
 
@@ -116,6 +166,7 @@ async def enabled_scrapper(id: str):
         where={"id": id},
         data={"status": "PUBLISHED"},
     )
+    await invalidate_entities(tag("scrapper", id))
 
 
 @router.patch("/{id}/disabled", dependencies=[Depends(pass_access_user)])
@@ -127,6 +178,7 @@ async def disabled_scrapper(id: str):
         where={"id": id},
         data={"status": "DELETED"},
     )
+    await invalidate_entities(tag("scrapper", id))
 
 
 @router.delete("/{id}", dependencies=[Depends(pass_access_user)])
@@ -137,6 +189,7 @@ async def delete_scrapper(id: str):
     await prisma.scrapper.delete(
         where={"id": id},
     )
+    await invalidate_entities(tag("scrapper", id))
 
 
 @router.get("/{id}/scrap", dependencies=[Depends(pass_access_user)])
@@ -146,73 +199,23 @@ async def get_scrapper(id: str):
     """
     scrapper = await prisma.scrapper.find_unique(
         where={"id": id},
-        include={"metric": True},
-    )
-
-    options = webdriver.ChromeOptions()
-    options.add_argument("--headless")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-
-    driver = webdriver.Chrome(service=Service("app/chromedriver"), options=options)
-    driver.get(scrapper.url)
-    wait = WebDriverWait(driver, 10)
-
-    wait.until(presence_of_element_located((By.TAG_NAME, "body")))
-    wait.until(
-        lambda driver: driver.execute_script("return document.readyState") == "complete"
+        include={"cafe": True},
     )
-    sleep(1)
-
-    body = driver.find_element(By.TAG_NAME, "body")
-    body.send_keys(Keys.END)
-    sleep(1)
-
-    # XPath
-    if scrapper.themeSelector and scrapper.themeSelector[0] == "/":
-        wait.until(presence_of_element_located((By.XPATH, scrapper.themeSelector)))
-        scrapped_theme_els = driver.find_elements(By.XPATH, scrapper.themeSelector)
-    # CSS
-    else:
-        wait.until(
-            presence_of_element_located((By.CSS_SELECTOR, scrapper.themeSelector))
-        )
-        scrapped_theme_els = driver.find_elements(
-            By.CSS_SELECTOR, scrapper.themeSelector
-        )
-    scrapped_theme_names = list(
-        map(lambda e: str(e.text).replace("\n", " ").strip(), scrapped_theme_els)
-    )
-    scrapped_theme_names.sort()
-
-    themes = await prisma.theme.find_many(where={"cafeId": scrapper.cafeId})
-    current_theme_names = list(map(lambda x: x.name, themes))
-    current_theme_names.sort()
-
-    different_theme_names = list()
-    for current_theme_name in current_theme_names:
-        if current_theme_name not in scrapped_theme_names:
-            different_theme_names.append(current_theme_name)
-    for scrapped_theme_name in scrapped_theme_names:
-        if scrapped_theme_name not in current_theme_names:
-            different_theme_names.append(scrapped_theme_name)
-    different_theme_names = list(set(different_theme_names))
-    different_theme_names.sort()
-
-    data = {
-        "scrapper": {"connect": {"id": id}},
-        "currentThemes": json.dumps(current_theme_names),
-        "scrappedThemes": json.dumps(scrapped_theme_names),
-        "differentThemes": json.dumps(different_theme_names),
-        "status": "SOMETHING_WRONG" if different_theme_names else "NOTHING_WRONG",
-    }
 
-    if scrapper.metric:
-        await prisma.metric.update(
-            where={"id": scrapper.metric.id},
-            data=data,
-        )
-    else:
-        await prisma.metric.create(
-            data=data,
-        )
+    if not scrapper:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    # 크롬 작업은 공유 브라우저 풀의 스레드에서 실행되므로 이벤트 루프를 막지 않는다
+    try:
+        result = await scrap_single_themes(scrapper)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=repr(e))
+
+    try:
+        data = await build_metric_data(scrapper, result)
+    except PostProcessingError as e:
+        # 검사 전에 저장된 잘못된 후처리 문법
+        raise HTTPException(status_code=400, detail=str(e))
+    metric = await prisma.metric.upsert(**metric_upsert_args(id, data))
+    await invalidate_entities(tag("scrapper", id))
+    return metric
@@ -1,25 +1,53 @@
-import boto3
-from typing import Optional
-from fastapi import APIRouter
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from prisma import enums
+from prisma.errors import RecordNotFoundError
 
 from app.prisma import prisma
 from app.config import settings
+from app.dependencies import get_storage, invalidate_counts_on_write
+from app.models.cafe import CAFE_REF_FIELDS
 from app.models.theme import (
+    THEME_DEFAULT_RELATIONS,
+    THEME_FIELDS,
+    THEME_RELATIONS,
+    THEME_SUMMARY_FIELDS,
     ThemeListRes,
     ThemeDetailRes,
     CreateThemeDto,
     UpdateThemeDto,
 )
+from app.services.bulk import export_rows, export_theme, import_themes
+from app.services.entity_cache import invalidate_entities, read_through, tag
+from app.services.genres import (
+    link_theme_genres,
+    mark_theme_counts_stale,
+    validate_genre_ids,
+)
+from app.services.search import index_theme, search_themes, unindex_theme
+from app.utils.bulk import NDJSON_MEDIA_TYPE, BulkFormat, detect_format, iter_rows
+from app.utils.image import remove_images
+from app.utils.pagination import (
+    RELEVANCE,
+    CountMode,
+    count_mode,
+    find_page,
+    find_ranked_page,
+)
+from app.utils.projection import parse_names, project
+from app.utils.serialization import fast_response
 
 
 router = APIRouter(
     prefix="/themes",
     tags=["themes"],
     responses={404: {"description": "Not found"}},
+    dependencies=[Depends(invalidate_counts_on_write("theme"))],
 )
 
 
-@router.get("", response_model=ThemeListRes)
+@router.get("", response_model=ThemeListRes, response_model_exclude_unset=True)
 async def get_themes(
     cafeId: Optional[str] = None,
     genre: Optional[str] = None,
@@ -27,36 +55,119 @@ async def get_themes(
     status: Optional[str] = None,
     skip: Optional[int] = 0,
     take: Optional[int] = 20,
-    sort: Optional[str] = "createdAt",
+    cursor: Optional[str] = None,
+    count: Optional[CountMode] = CountMode.EXACT,
+    withTotal: Optional[bool] = Query(None, deprecated=True),
+    sort: Optional[str] = None,
     order: Optional[str] = "desc",
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
 ):
     """
     테마 리스트
+
+    기본으로 요약 필드와 카페 요약(id, name, areaA, areaB, status), 장르를 내려준다.
+    fields=name,status 처럼 필드를, include=cafe 처럼 관계를 고를 수 있다.
+    term 이 있으면 기본으로 검색 순위(sort=relevance)대로 정렬한다.
     """
+    fields = parse_names(fields, THEME_FIELDS, THEME_SUMMARY_FIELDS)
+    relations = parse_names(
+        include, THEME_RELATIONS, THEME_DEFAULT_RELATIONS, "include"
+    )
+
     where = dict()
     if cafeId:
         where["cafeId"] = cafeId
     if genre:
         where["genre"] = {"some": {"id": genre}}
-    if term:
-        where["displayName"] = {"contains": term}
+    # 검색어가 있으면 기본으로 검색 순위대로 (검색어 없는 relevance 는 최신순)
+    if not sort or (sort == RELEVANCE and not term):
+        sort = RELEVANCE if term else "createdAt"
+    ranked = await search_themes(term) if term else None
+    if ranked is not None and sort != RELEVANCE:
+        where["id"] = {"in": ranked}
     if status:
         where["status"] = status
 
-    options = {
-        "skip": skip,
-        "take": take,
-        "where": where,
-        "include": {
-            "cafe": True,
-            "genre": True,
-        },
-        "order": {sort: order},
-    }
+    include_relations = {x: True for x in relations}
+    if sort == RELEVANCE:
+        page = await find_ranked_page(
+            prisma.theme,
+            where,
+            ranked,
+            skip=skip,
+            take=take,
+            cursor=cursor,
+            include=include_relations,
+            count=count_mode(count, withTotal),
+            name="theme",
+            window=settings.search_window_size,
+        )
+    else:
+        page = await find_page(
+            prisma.theme,
+            where,
+            sort,
+            order,
+            skip=skip,
+            take=take,
+            cursor=cursor,
+            count=count_mode(count, withTotal),
+            name="theme",
+            include=include_relations,
+        )
+
+    items = list()
+    for theme in page["items"]:
+        item = project(theme, fields)
+        item["id"] = theme.id
+        if "cafe" in relations:
+            item["cafe"] = project(theme.cafe, CAFE_REF_FIELDS) if theme.cafe else None
+        if "genre" in relations:
+            item["genre"] = theme.genre
+        items.append(item)
+    page["items"] = items
+    return fast_response(page)
 
-    total = await prisma.theme.count(where=where)
-    themes = await prisma.theme.find_many(**options)
-    return {"total": total, "items": themes}
+
+# /{id} 경로보다 먼저 선언해야 bulk 가 id 로 해석되지 않는다
+@router.post("/bulk/import")
+async def bulk_import_themes(request: Request, format: Optional[BulkFormat] = None):
+    """
+    테마 대량 가져오기 (NDJSON 또는 CSV 본문)
+
+    형식은 format 이 없으면 Content-Type 으로 고른다. genre 는 장르 id 목록이며 CSV 에서는
+    | 로 구분한다. 없는 카페나 등록되지 않은 장르를 가리키는 행은 errors 에 담고 건너뛴다.
+    """
+    format = format or detect_format(request.headers.get("content-type"))
+    rows = iter_rows(request.stream(), format, list_fields=("genre",))
+    return await import_themes(rows)
+
+
+@router.get("/bulk/export")
+async def bulk_export_themes(
+    status: Optional[enums.StatusType] = None, cafeId: Optional[str] = None
+):
+    """
+    테마 내보내기 (NDJSON 스트림, 장르는 id 목록)
+    """
+    where = dict()
+    if status:
+        where["status"] = status
+    if cafeId:
+        where["cafeId"] = cafeId
+    return StreamingResponse(
+        export_rows(prisma.theme, where, {"genre": True}, export_theme),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
+
+
+THEME_DETAIL_INCLUDE = {"genre": True}
+
+
+def theme_detail_tags(theme) -> List[str]:
+    # 카페 활성화/비활성화는 테마 상태도 바꾸므로 카페 태그도 붙인다
+    return [tag("cafe", theme.cafeId), *(tag("genre", x.id) for x in theme.genre or [])]
 
 
 @router.get("/{id}", response_model=ThemeDetailRes)
@@ -64,11 +175,16 @@ async def get_theme(id: str):
     """
     테마 상세
     """
-    theme = await prisma.theme.find_unique(
-        where={"id": id},
-        include={"genre": True},
+    theme = await read_through(
+        "theme",
+        id,
+        THEME_DETAIL_INCLUDE,
+        lambda: prisma.theme.find_unique(
+            where={"id": id}, include=THEME_DETAIL_INCLUDE
+        ),
+        theme_detail_tags,
     )
-    return theme
+    return fast_response(theme)
 
 
 @router.post("")
@@ -76,6 +192,7 @@ async def create_theme(body: CreateThemeDto):
     """
     테마 추가
     """
+    await validate_genre_ids(body.genre)
     genre = list(map(lambda x: {"id": x}, body.genre))
     theme = await prisma.theme.create(
         data={
@@ -101,45 +218,66 @@ async def create_theme(body: CreateThemeDto):
             "status": "PUBLISHED",
         }
     )
+    index_theme(theme)
+    mark_theme_counts_stale()
+    await invalidate_entities(tag("cafe", theme.cafeId))
     return theme
 
 
+def theme_update_data(body: UpdateThemeDto) -> dict:
+    return {
+        "cafeId": body.cafeId,
+        "name": body.name,
+        "displayName": body.displayName,
+        "intro": body.intro,
+        "thumbnail": body.thumbnail,
+        "price": body.price,
+        "during": body.during,
+        "minPerson": body.minPerson,
+        "maxPerson": body.maxPerson,
+        "level": body.level,
+        "lockingRatio": body.lockingRatio,
+        "fear": body.fear,
+        "activity": body.activity,
+        "openDate": body.openDate,
+        "detailUrl": body.detailUrl,
+        "reservationUrl": body.reservationUrl,
+        "status": body.status,
+    }
+
+
 @router.patch("/{id}")
 async def update_theme(id: str, body: UpdateThemeDto):
     """
     테마 수정
+
+    필드 수정과 바뀐 장르 연결만 한 트랜잭션으로 반영하므로 수정 중에 장르가 비어 보이지 않는다.
     """
-    genre = list(map(lambda x: {"id": x}, body.genre))
-    # 장르 초기화
-    await prisma.theme.update(
-        where={"id": id},
-        data={"genre": {"set": []}},
-    )
-    theme = await prisma.theme.update(
+    await validate_genre_ids(body.genre)
+    if not await prisma.theme.find_unique(where={"id": id}):
+        raise HTTPException(status_code=404, detail="Not found")
+
+    try:
+        async with prisma.batch_() as batcher:
+            batcher.theme.update(
+                where={"id": id},
+                data=theme_update_data(body),
+            )
+            link_theme_genres(batcher, id, body.genre)
+    except RecordNotFoundError:
+        # 확인한 뒤에 다른 요청이 지운 테마
+        raise HTTPException(status_code=404, detail="Not found")
+
+    theme = await prisma.theme.find_unique(
         where={"id": id},
-        data={
-            "cafeId": body.cafeId,
-            "name": body.name,
-            "displayName": body.displayName,
-            "intro": body.intro,
-            "thumbnail": body.thumbnail,
-            "genre": {
-                "connect": genre,
-            },
-            "price": body.price,
-            "during": body.during,
-            "minPerson": body.minPerson,
-            "maxPerson": body.maxPerson,
-            "level": body.level,
-            "lockingRatio": body.lockingRatio,
-            "fear": body.fear,
-            "activity": body.activity,
-            "openDate": body.openDate,
-            "detailUrl": body.detailUrl,
-            "reservationUrl": body.reservationUrl,
-            "status": body.status,
-        },
+        include={"genre": True},
     )
+    if not theme:
+        raise HTTPException(status_code=404, detail="Not found")
+    index_theme(theme)
+    mark_theme_counts_stale()
+    # 예전 카페 상세는 theme 태그로, 새 카페 상세는 cafe 태그로 지운다
+    await invalidate_entities(tag("theme", id), tag("cafe", theme.cafeId))
     return theme
 
 
@@ -152,6 +290,7 @@ async def enabled_theme(id: str):
         where={"id": id},
         data={"status": "PUBLISHED"},
     )
+    await invalidate_entities(tag("theme", id))
 
 
 @router.patch("/{id}/disabled")
@@ -163,20 +302,23 @@ async def disabled_theme(id: str):
         where={"id": id},
         data={"status": "DELETED"},
     )
+    await invalidate_entities(tag("theme", id))
 
 
 @router.delete("/{id}")
-async def delete_theme(id: str):
+async def delete_theme(
+    id: str, deferred: Optional[bool] = False, s3=Depends(get_storage)
+):
     """
     테마 삭제
     """
-    session = boto3.Session()
-    s3 = session.resource("s3")
-    bucket_name = settings.bucket_name
-    bucket = s3.Bucket(bucket_name)
-
-    # 테마 이미지 및 데이터 삭제
     theme = await prisma.theme.find_unique(where={"id": id})
-    if theme.thumbnail:
-        bucket.delete_objects(Delete={"Objects": [{"Key": theme.thumbnail[1:]}]})
+    if not theme:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    # 데이터를 먼저 지운 뒤 이미지 삭제
     await prisma.theme.delete(where={"id": id})
+    unindex_theme(id)
+    mark_theme_counts_stale()
+    await invalidate_entities(tag("theme", id))
+    return await remove_images(s3, [theme.thumbnail], deferred=deferred)
@@ -0,0 +1,276 @@
+"""
+카페/테마 대량 가져오기, 내보내기
+
+가져오기는 BULK_CHUNK_SIZE 행씩 검증한 뒤 create_many 로 한 번에 넣는다. 잘못된 행은 건너뛰고
+줄 번호와 사유를 돌려준다. id 를 넘긴 행이 이미 있으면 건너뛰므로 같은 파일을 다시 가져와도
+중복되지 않는다. 내보내기는 id 순 커서로 BULK_EXPORT_PAGE_SIZE 행씩 읽어 NDJSON 으로
+흘려보내며, 내보낸 파일은 그대로 다시 가져올 수 있다.
+"""
+
+import json
+import uuid
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+)
+
+from prisma.errors import UniqueViolationError
+from pydantic import ValidationError
+
+from app.prisma import prisma
+from app.config import settings
+from app.models.cafe import ImportCafeDto
+from app.models.theme import ImportThemeDto
+from app.services.entity_cache import invalidate_entities, tag
+from app.services.genres import (
+    insert_genre_links,
+    mark_theme_counts_stale,
+    unknown_genre_ids,
+)
+from app.services.search import load_search_indexes
+from app.utils.bulk import BulkRow, iter_batches, to_ndjson, validation_errors
+from app.utils.image import ingest_images
+from app.utils.pagination import CountMode, find_page
+from app.utils.serialization import to_jsonable
+
+
+def new_id() -> str:
+    return uuid.uuid4().hex
+
+
+def new_report() -> dict:
+    return {"rows": 0, "created": 0, "skipped": 0, "errors": []}
+
+
+def row_error(line: int, *errors: str) -> dict:
+    return {"line": line, "errors": list(errors)}
+
+
+async def existing_ids(table: str, ids: Iterable[str]) -> Set[str]:
+    ids = list(dict.fromkeys(x for x in ids if x))
+    if not ids:
+        return set()
+    marks = ", ".join(["?"] * len(ids))
+    rows = await prisma.query_raw(f"SELECT id FROM {table} WHERE id IN ({marks})", *ids)
+    return {x["id"] for x in rows}
+
+
+def validate_rows(rows: List[BulkRow], dto) -> tuple:
+    """
+    행 -> ([(줄 번호, dto)], [오류])
+    """
+    valid = list()
+    errors = list()
+    for row in rows:
+        if row.error:
+            errors.append(row_error(row.line, row.error))
+            continue
+        try:
+            valid.append((row.line, dto.parse_obj(row.data)))
+        except ValidationError as e:
+            errors.append(row_error(row.line, *validation_errors(e)))
+    return valid, errors
+
+
+async def skip_existing(valid: list, table: str, report: dict) -> list:
+    """
+    이미 있거나 앞에서 나온 id 의 행은 건너뜀
+    """
+    seen = await existing_ids(table, (body.id for _, body in valid))
+    rows = list()
+    for line, body in valid:
+        if body.id in seen:
+            report["skipped"] += 1
+            continue
+        if body.id:
+            seen.add(body.id)
+        rows.append((line, body))
+    return rows
+
+
+async def import_cafes(rows: AsyncIterable[BulkRow]) -> dict:
+    """
+    카페 가져오기
+
+    이미지는 청크마다 한 번에 저장하며(같은 URL 은 한 번만 내려받음), 저장에 실패한 이미지는
+    imageErrors 에 담기고 카페는 나머지 이미지로 만들어진다.
+    """
+    report = {**new_report(), "imageErrors": []}
+    async for batch in iter_batches(rows, settings.bulk_chunk_size):
+        report["rows"] += len(batch)
+        valid, errors = validate_rows(batch, ImportCafeDto)
+        report["errors"].extend(errors)
+        valid = await skip_existing(valid, "cafes", report)
+        if not valid:
+            continue
+
+        sources = {
+            line: body.images if isinstance(body.images, list) else []
+            for line, body in valid
+        }
+        results = await ingest_images(
+            [x for images in sources.values() for x in images], "cafes"
+        )
+        ingested = {x.source: x for x in results}
+
+        data = list()
+        for line, body in valid:
+            images = [ingested[x] for x in sources[line]]
+            report["imageErrors"].extend(
+                {"line": line, "source": x.source, "error": x.error}
+                for x in images
+                if x.error
+            )
+            opening_hours = body.openingHours
+            if not isinstance(opening_hours, str):
+                opening_hours = json.dumps(opening_hours)
+            data.append(
+                {
+                    **body.dict(
+                        exclude={"id", "images", "openingHours", "closingHour"}
+                    ),
+                    "id": body.id or new_id(),
+                    "images": json.dumps([x.url for x in images if x.url]),
+                    "openingHours": opening_hours,
+                    "status": "PUBLISHED",
+                }
+            )
+        report["created"] += await prisma.cafe.create_many(
+            data=data, skip_duplicates=True
+        )
+
+    if report["created"]:
+        await load_search_indexes()
+    return report
+
+
+async def create_themes(data: List[dict], genres: Dict[str, List[str]]) -> List[dict]:
+    """
+    테마와 장르 연결을 한 트랜잭션으로 넣고 실제로 만든 행 반환
+
+    skip_duplicates 로는 어떤 행이 빠졌는지 알 수 없어서, 그 사이 다른 요청이 같은 id 로 만든
+    테마에 이 행의 장르가 붙을 수 있다. 그래서 청크를 중복 없이 넣어 보고, 이미 있는 id 가
+    생겼으면 한 행씩 다시 넣으면서 그 행만 건너뛴다.
+    """
+
+    async def create(rows: List[dict]):
+        async with prisma.batch_() as batcher:
+            batcher.theme.create_many(data=rows)
+            insert_genre_links(
+                batcher, [(x, row["id"]) for row in rows for x in genres[row["id"]]]
+            )
+
+    try:
+        await create(data)
+        return data
+    except UniqueViolationError:
+        pass
+
+    created = list()
+    for row in data:
+        try:
+            await create([row])
+        except UniqueViolationError:
+            continue
+        created.append(row)
+    return created
+
+
+async def import_themes(rows: AsyncIterable[BulkRow]) -> dict:
+    """
+    테마 가져오기
+
+    카페와 장르는 이미 있어야 한다. 테마와 장르 연결은 청크마다 한 트랜잭션으로 넣는다.
+    """
+    report = new_report()
+    cafe_ids = set()
+    async for batch in iter_batches(rows, settings.bulk_chunk_size):
+        report["rows"] += len(batch)
+        valid, errors = validate_rows(batch, ImportThemeDto)
+        report["errors"].extend(errors)
+        valid = await skip_existing(valid, "themes", report)
+        if not valid:
+            continue
+
+        cafes = await existing_ids("cafes", (body.cafeId for _, body in valid))
+        unknown = set(
+            await unknown_genre_ids(x for _, body in valid for x in body.genre or [])
+        )
+
+        data = list()
+        genres = dict()
+        for line, body in valid:
+            problems = list()
+            if body.cafeId not in cafes:
+                problems.append(f"cafeId: 없는 카페입니다 ({body.cafeId})")
+            missing = [x for x in body.genre or [] if x in unknown]
+            if missing:
+                problems.append(
+                    f"genre: 등록되지 않은 장르입니다 ({', '.join(missing)})"
+                )
+            if problems:
+                report["errors"].append(row_error(line, *problems))
+                continue
+
+            id = body.id or new_id()
+            data.append(
+                {
+                    **body.dict(exclude={"id", "genre"}),
+                    "id": id,
+                    "status": "PUBLISHED",
+                }
+            )
+            genres[id] = list(dict.fromkeys(body.genre or []))
+        if not data:
+            continue
+
+        created = await create_themes(data, genres)
+        report["created"] += len(created)
+        report["skipped"] += len(data) - len(created)
+        cafe_ids.update(x["cafeId"] for x in created)
+
+    if report["created"]:
+        await load_search_indexes()
+        mark_theme_counts_stale()
+        # 카페 상세에 테마 목록이 들어 있다
+        await invalidate_entities(*(tag("cafe", x) for x in cafe_ids))
+    return report
+
+
+async def export_rows(
+    delegate,
+    where: dict,
+    include: Optional[dict] = None,
+    convert: Optional[Callable[[dict], Any]] = None,
+) -> AsyncIterator[bytes]:
+    """
+    id 순으로 한 페이지씩 읽어서 NDJSON 한 줄씩 반환
+    """
+    cursor = ""
+    while cursor is not None:
+        page = await find_page(
+            delegate,
+            where,
+            "id",
+            "asc",
+            take=settings.bulk_export_page_size,
+            cursor=cursor,
+            include=include,
+            count=CountMode.NONE,
+        )
+        for item in page["items"]:
+            item = to_jsonable(item)
+            yield to_ndjson(convert(item) if convert else item)
+        cursor = page["nextCursor"]
+
+
+def export_theme(theme: dict) -> dict:
+    # 가져오기와 같은 모양으로 장르는 id 목록
+    return {**theme, "genre": [x["id"] for x in theme.get("genre") or []]}
@@ -0,0 +1,165 @@
+"""
+카페 상태 변경/삭제의 테마 연쇄 처리
+
+카페와 테마의 변경은 batch_ 한 번(트랜잭션)으로 보내므로 중간에 실패해도 카페와 테마의
+상태가 어긋나지 않는다. 색인/캐시 정리와 S3 이미지 삭제는 커밋된 뒤에만 한다.
+"""
+
+from typing import Dict, List
+
+from prisma.errors import ForeignKeyViolationError
+
+from app.prisma import prisma
+from app.services.entity_cache import invalidate_entities, tag
+from app.services.genres import mark_theme_counts_stale
+from app.services.search import unindex_cafe
+from app.utils.image import remove_images
+from app.utils.json_field import parse_json_list
+
+# 삭제 중에 테마가 추가되어 다시 시도하는 횟수
+DELETE_ATTEMPTS = 3
+
+
+def placeholders(values: List[str]) -> str:
+    return ", ".join(["?"] * len(values))
+
+
+async def existing_cafe_ids(ids: List[str]) -> List[str]:
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        return []
+    rows = await prisma.query_raw(
+        f"SELECT id FROM cafes WHERE id IN ({placeholders(ids)})", *ids
+    )
+    found = {x["id"] for x in rows}
+    return [x for x in ids if x in found]
+
+
+async def set_cafes_status(ids: List[str], status: str) -> dict:
+    """
+    카페와 그 카페의 모든 테마 상태를 한 트랜잭션으로 변경
+
+    {"updated": 바꾼 카페 id, "notFound": 없는 카페 id}
+    """
+    found = await existing_cafe_ids(ids)
+    if found:
+        async with prisma.batch_() as batcher:
+            batcher.theme.update_many(
+                where={"cafeId": {"in": found}},
+                data={"status": status},
+            )
+            batcher.cafe.update_many(
+                where={"id": {"in": found}},
+                data={"status": status},
+            )
+        # 테마 상세에도 cafe 태그가 붙어 있으므로 테마까지 함께 무효화된다
+        await invalidate_entities(*(tag("cafe", x) for x in found))
+
+    return {"updated": found, "notFound": [x for x in ids if x not in found]}
+
+
+def group_cafe_rows(cafes: List[dict], themes: List[dict]) -> tuple:
+    """
+    카페/테마 행 -> (있는 카페 id, 카페별 테마 id, 카페별 지울 이미지 경로)
+    """
+    found = list()
+    theme_ids: Dict[str, List[str]] = dict()
+    paths: Dict[str, List[str]] = dict()
+    for cafe in cafes:
+        found.append(cafe["id"])
+        theme_ids[cafe["id"]] = list()
+        paths[cafe["id"]] = parse_json_list(cafe["images"])
+    for theme in themes:
+        if theme["cafeId"] not in paths:
+            continue
+        theme_ids[theme["cafeId"]].append(theme["id"])
+        if theme["thumbnail"]:
+            paths[theme["cafeId"]].append(theme["thumbnail"])
+    return found, theme_ids, paths
+
+
+async def read_cafes_for_delete(ids: List[str]) -> tuple:
+    """
+    삭제할 카페 -> (있는 카페 id, 카페별 테마 id, 카페별 지울 이미지 경로)
+    """
+    marks = placeholders(ids)
+    cafes = await prisma.query_raw(
+        f"SELECT id, images FROM cafes WHERE id IN ({marks})", *ids
+    )
+    themes = await prisma.query_raw(
+        f"SELECT id, cafeId, thumbnail FROM themes WHERE cafeId IN ({marks})",
+        *ids,
+    )
+    return group_cafe_rows(cafes, themes)
+
+
+async def delete_cafe_rows(ids: List[str], theme_ids: Dict[str, List[str]]):
+    async with prisma.batch_() as batcher:
+        batcher.theme.delete_many(
+            where={"id": {"in": [y for x in ids for y in theme_ids[x]]}}
+        )
+        batcher.cafe.delete_many(where={"id": {"in": ids}})
+
+
+async def delete_cafes(s3, ids: List[str], deferred: bool = True) -> dict:
+    """
+    카페와 그 카페의 모든 테마를 한 트랜잭션으로 삭제한 뒤 이미지 정리
+
+    테마는 읽어 둔 id 로만 지우므로 색인/썸네일 정리에서 빠지는 테마가 없다. 카페 삭제가 외래
+    키에 걸리면 다시 읽어서, 그 사이 테마가 추가되었으면 다시 시도한다. 아니면(리뷰/저장 등이
+    카페를 참조) 카페를 하나씩 지우고 지울 수 없는 카페는 blocked 로 돌려준다.
+    카페 이미지와 테마 썸네일은 커밋된 뒤에 모아서 한 번에 삭제한다 (deferred 이면 작업 큐에
+    등록, 색인에 등록된 이미지는 이미지 GC 가 정리). {"deleted": 삭제한 카페 id, "notFound":
+    없는 카페 id, "blocked": 다른 데이터가 참조하는 카페 id, "images": 이미지 삭제 결과}
+    """
+    ids = list(dict.fromkeys(ids))
+    result = {
+        "deleted": [],
+        "notFound": ids,
+        "blocked": [],
+        "images": {"deleted": 0, "errors": []},
+    }
+    if not ids:
+        return result
+
+    found, theme_ids, paths = await read_cafes_for_delete(ids)
+    result["notFound"] = [x for x in ids if x not in found]
+    deleted = list()
+    for attempt in range(DELETE_ATTEMPTS):
+        if not found:
+            break
+        try:
+            await delete_cafe_rows(found, theme_ids)
+            deleted = found
+            break
+        except ForeignKeyViolationError:
+            pass
+
+        again, again_theme_ids, again_paths = await read_cafes_for_delete(found)
+        # 그 사이 다른 요청이 지운 카페
+        result["notFound"].extend(x for x in found if x not in again)
+        added = any(set(again_theme_ids[x]) - set(theme_ids[x]) for x in again)
+        found, theme_ids, paths = again, again_theme_ids, again_paths
+        if added and attempt < DELETE_ATTEMPTS - 1:
+            continue
+
+        # 테마 외의 데이터가 참조하는 카페가 있으므로 하나씩 지운다
+        for id in found:
+            try:
+                await delete_cafe_rows([id], theme_ids)
+                deleted.append(id)
+            except ForeignKeyViolationError:
+                result["blocked"].append(id)
+        break
+
+    result["deleted"] = deleted
+    if not deleted:
+        return result
+    for id in deleted:
+        unindex_cafe(id, theme_ids[id])
+    mark_theme_counts_stale()
+    await invalidate_entities(*(tag("cafe", x) for x in deleted))
+    result["images"] = await remove_images(
+        s3, [y for x in deleted for y in paths[x]], deferred=deferred
+    )
+    return result
@@ -0,0 +1,134 @@
+"""
+상세 조회 캐시
+
+GET /cafes/{id}, /themes/{id}, /scrappers/{id}, /metrics/{id} 의 결과를
+모델 + id + include 모양을 키로 프로세스 메모리(TTL/LRU)에 보관한다. 값에는 그 응답이 포함한
+데이터의 태그를 붙여 두고, 쓰기 핸들러는 바뀐 데이터의 태그(tag("cafe", id) 등)로 관련된 값만
+지운다.
+
+여러 프로세스가 캐시를 나눠 쓰려면 CacheBackend 를 구현해서 set_cache_backend 로 등록한다
+(예: Redis). 메모리 캐시에 없으면 공유 백엔드를 보고, 무효화는 양쪽에 모두 반영한다. 다른
+프로세스(워커 등)의 변경은 메모리 캐시에서 ENTITY_CACHE_TTL 이 지나야 반영된다.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+import orjson
+
+from app.config import settings
+from app.utils.cache import TaggedCache
+from app.utils.serialization import to_jsonable
+
+
+class CacheBackend(ABC):
+    """
+    공유 캐시 백엔드 인터페이스. 값은 orjson 으로 인코딩한 bytes
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: int, tags: Iterable[str]):
+        ...
+
+    @abstractmethod
+    async def invalidate(self, tags: Iterable[str]):
+        ...
+
+    @abstractmethod
+    async def clear(self):
+        ...
+
+
+entity_cache = TaggedCache(
+    ttl=settings.entity_cache_ttl, maxsize=settings.entity_cache_size
+)
+shared_backend: Optional[CacheBackend] = None
+shared_counters = {"hits": 0, "misses": 0}
+
+
+def set_cache_backend(backend: Optional[CacheBackend]):
+    global shared_backend
+    shared_backend = backend
+
+
+def tag(model: str, id: Optional[str]) -> str:
+    return f"{model}:{id}"
+
+
+def cache_key(model: str, id: str, include: Optional[dict] = None) -> str:
+    shape = orjson.dumps(include or {}, option=orjson.OPT_SORT_KEYS).decode()
+    return f"{model}:{id}:{shape}"
+
+
+async def read_through(
+    model: str,
+    id: str,
+    include: Optional[dict],
+    loader: Callable[[], Awaitable[Any]],
+    tags_of: Callable[[Any], Iterable[str]],
+) -> Any:
+    """
+    캐시에 있으면 그 값을, 없으면 loader 결과를 dict 로 바꿔서 보관한 뒤 반환
+
+    tags_of 는 조회 결과가 의존하는 태그 목록 (없는 데이터는 보관하지 않는다)
+    """
+    if not settings.entity_cache_enabled:
+        return await loader()
+
+    key = cache_key(model, id, include)
+    value = entity_cache.get(key)
+    if value is not None:
+        return value
+
+    generation = entity_cache.generation
+    if shared_backend is not None:
+        raw = await shared_backend.get(key)
+        if raw is not None:
+            shared_counters["hits"] += 1
+            value, tags = orjson.loads(raw)
+            entity_cache.set(key, value, tags=tags, generation=generation)
+            return value
+        shared_counters["misses"] += 1
+
+    entity = await loader()
+    if entity is None:
+        return None
+    value = to_jsonable(entity)
+    tags = [tag(model, id), *tags_of(entity)]
+    if entity_cache.set(key, value, tags=tags, generation=generation):
+        if shared_backend is not None:
+            await shared_backend.set(
+                key, orjson.dumps([value, tags]), settings.entity_cache_ttl, tags
+            )
+    return value
+
+
+async def invalidate_entities(*tags: str):
+    """
+    태그가 붙은 상세 조회 캐시 삭제 (쓰기 후 호출)
+    """
+    entity_cache.invalidate_tags(*tags)
+    if shared_backend is not None:
+        await shared_backend.invalidate(tags)
+
+
+async def clear_entity_cache():
+    entity_cache.clear()
+    if shared_backend is not None:
+        await shared_backend.clear()
+
+
+def cache_stats() -> dict:
+    return {
+        **entity_cache.stats(),
+        "enabled": settings.entity_cache_enabled,
+        "shared": (
+            None
+            if shared_backend is None
+            else {**shared_counters, "backend": type(shared_backend).__name__}
+        ),
+    }
@@ -0,0 +1,156 @@
+"""
+장르 목록
+
+장르는 몇 개 되지 않고 거의 바뀌지 않으므로 API 프로세스마다 메모리에 두고 시작할 때 읽는다.
+장르 추가/삭제는 바로 다시 읽고, 장르별 테마 수는 테마가 바뀐 뒤 처음 조회할 때 다시 센다.
+다른 프로세스의 변경은 GENRE_REFRESH_SECONDS 마다 반영한다.
+"""
+
+import asyncio
+import time
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.prisma import prisma
+from app.config import settings
+
+# id -> {"id", "createdAt", "updatedAt"}
+genres: Dict[str, dict] = dict()
+# id -> 연결된 테마 수
+theme_counts: Dict[str, int] = dict()
+
+_loaded_at: Optional[float] = None
+_counts_stale = False
+_reload: Optional[asyncio.Future] = None
+
+
+class UnknownGenreError(ValueError):
+    """
+    등록되지 않은 장르 (400 으로 응답)
+    """
+
+
+async def count_genre_themes() -> Dict[str, int]:
+    # 장르-테마 암시적 연결 테이블 (A: 장르, B: 테마)
+    rows = await prisma.query_raw(
+        "SELECT A AS genreId, COUNT(*) AS count FROM _GenreToTheme GROUP BY A"
+    )
+    return {x["genreId"]: int(x["count"]) for x in rows}
+
+
+async def load_genres():
+    """
+    DB 에서 장르와 장르별 테마 수를 다시 읽음
+    """
+    global genres, theme_counts, _loaded_at, _counts_stale
+    _counts_stale = False
+    rows = await prisma.genre.find_many()
+    counts = await count_genre_themes()
+
+    genres = {
+        x.id: {"id": x.id, "createdAt": x.createdAt, "updatedAt": x.updatedAt}
+        for x in rows
+    }
+    theme_counts = counts
+    _loaded_at = time.monotonic()
+
+
+async def ensure_fresh():
+    global theme_counts, _counts_stale
+    if (
+        _loaded_at is None
+        or time.monotonic() - _loaded_at > settings.genre_refresh_seconds
+    ):
+        await load_genres()
+    elif _counts_stale:
+        # 다시 세는 중에 테마가 바뀌면 다음 조회 때 한 번 더 센다
+        _counts_stale = False
+        theme_counts = await count_genre_themes()
+
+
+def mark_theme_counts_stale():
+    """
+    테마의 장르 연결이 바뀌었을 때 (테마 추가/수정/삭제)
+    """
+    global _counts_stale
+    _counts_stale = True
+
+
+async def get_genres() -> List[dict]:
+    """
+    모든 장르 (themesCount 포함)
+    """
+    await ensure_fresh()
+    return [{**x, "themesCount": theme_counts.get(x["id"], 0)} for x in genres.values()]
+
+
+async def unknown_genre_ids(ids: Iterable[str]) -> List[str]:
+    """
+    등록되지 않은 장르 id 목록
+    """
+    await ensure_fresh()
+    unknown = list(dict.fromkeys(x for x in ids if x not in genres))
+    if unknown:
+        # 다른 프로세스에서 방금 추가했을 수 있으므로 한 번 다시 읽는다
+        await reload_genres()
+        unknown = [x for x in unknown if x not in genres]
+    return unknown
+
+
+async def reload_genres():
+    """
+    등록되지 않은 장르 id 가 들어왔을 때 다시 읽음
+
+    없는 id 를 보내는 요청마다 DB 를 읽지 않도록 GENRE_RELOAD_SECONDS 안에 읽었으면 건너뛰고,
+    동시에 들어온 요청은 진행 중인 읽기 하나를 함께 기다린다.
+    """
+    global _reload
+    if _reload is None or _reload.done():
+        if time.monotonic() - _loaded_at < settings.genre_reload_seconds:
+            return
+        _reload = asyncio.ensure_future(load_genres())
+    await asyncio.shield(_reload)
+
+
+async def validate_genre_ids(ids: Iterable[str]):
+    """
+    등록되지 않은 장르가 있으면 UnknownGenreError
+    """
+    unknown = await unknown_genre_ids(ids)
+    if unknown:
+        raise UnknownGenreError(f"등록되지 않은 장르입니다: {', '.join(unknown)}")
+
+
+def link_theme_genres(batcher, theme_id: str, genre_ids: Iterable[str]):
+    """
+    테마의 장르 연결을 genre_ids 와 같게 만드는 쿼리를 batch 에 추가
+
+    빠진 연결만 지우고(DELETE) 없는 연결만 넣으므로(INSERT IGNORE) 그대로인 장르는 건드리지
+    않는다. 현재 연결을 읽어서 비교하지 않으므로 동시에 수정해도 마지막으로 커밋된 요청의 장르
+    목록과 정확히 같아진다.
+    """
+    genre_ids = list(dict.fromkeys(genre_ids))
+    if not genre_ids:
+        batcher.execute_raw("DELETE FROM _GenreToTheme WHERE B = ?", theme_id)
+        return
+
+    marks = ", ".join(["?"] * len(genre_ids))
+    batcher.execute_raw(
+        f"DELETE FROM _GenreToTheme WHERE B = ? AND A NOT IN ({marks})",
+        theme_id,
+        *genre_ids,
+    )
+    insert_genre_links(batcher, [(x, theme_id) for x in genre_ids])
+
+
+def insert_genre_links(batcher, links: List[Tuple[str, str]]):
+    """
+    (장르 id, 테마 id) 연결을 한 문장으로 추가하는 쿼리를 batch 에 추가 (이미 있으면 무시)
+    """
+    if not links:
+        return
+    values = ", ".join(["(?, ?)"] * len(links))
+    batcher.execute_raw(
+        f"INSERT IGNORE INTO _GenreToTheme (A, B) VALUES {values}",
+        *chain.from_iterable(links),
+    )
@@ -0,0 +1,47 @@
+"""
+참조되지 않는 이미지 정리
+
+DB 의 Cafe.images / Theme.thumbnail 에서 참조 중인 키(썸네일 포함) 집합을 만든 뒤,
+버킷 목록을 페이지 단위로 훑으면서 참조되지 않고 유예 기간보다 오래된 객체를 지운다
+(storage.collect_garbage).
+"""
+
+from typing import Iterable, List, Set
+
+from app.prisma import prisma
+from app.services.storage import DELETE_BATCH_SIZE
+from app.utils.image import image_keys
+from app.utils.json_field import parse_json_list
+
+
+def path_keys(paths: Iterable[str]) -> List[str]:
+    return [y for x in paths if x and x.startswith("/") for y in image_keys(x[1:])]
+
+
+async def referenced_keys() -> Set[str]:
+    """
+    DB 에서 참조 중인 모든 이미지 키
+    """
+    keys = set()
+    cafes = await prisma.query_raw("SELECT images FROM cafes")
+    for cafe in cafes:
+        keys.update(path_keys(parse_json_list(cafe["images"])))
+    themes = await prisma.query_raw(
+        "SELECT thumbnail FROM themes WHERE thumbnail IS NOT NULL AND thumbnail <> ''"
+    )
+    keys.update(path_keys(x["thumbnail"] for x in themes))
+    return keys
+
+
+async def remove_unreferenced_sources(referenced: Set[str]) -> int:
+    """
+    참조되지 않는 키를 가리키는 외부 URL 색인 삭제 (다음 저장 때 다시 올림)
+    """
+    sources = await prisma.query_raw("SELECT DISTINCT `key` FROM image_sources")
+    keys = [x["key"] for x in sources if x["key"] not in referenced]
+    count = 0
+    for i in range(0, len(keys), DELETE_BATCH_SIZE):
+        count += await prisma.imagesource.delete_many(
+            where={"key": {"in": keys[i : i + DELETE_BATCH_SIZE]}}
+        )
+    return count
@@ -0,0 +1,149 @@
+import json
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from prisma import models
+
+from app.prisma import prisma
+from app.config import settings
+
+# 작업 종류
+JOB_SCRAP_ALL_THEMES = "SCRAP_ALL_THEMES"
+JOB_DELETE_OBJECTS = "DELETE_OBJECTS"
+JOB_IMAGE_GC = "IMAGE_GC"
+
+
+class JobCanceled(Exception):
+    """
+    실행 중인 작업이 API 에서 취소됨
+    """
+
+
+def now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+async def enqueue_job(
+    type: str, payload: Optional[Any] = None, max_attempts: int = 3
+) -> models.Job:
+    """
+    작업 등록
+    """
+    data = {"type": type, "maxAttempts": max_attempts}
+    if payload is not None:
+        data["payload"] = json.dumps(payload)
+    return await prisma.job.create(data=data)
+
+
+async def claim_next_job() -> Optional[models.Job]:
+    """
+    가장 오래된 대기 작업을 실행 상태로 가져옴
+
+    여러 워커가 동시에 가져가지 않도록 상태 조건을 걸고 갱신한다.
+    """
+    job = await prisma.job.find_first(
+        where={"status": "QUEUED"},
+        order={"createdAt": "asc"},
+    )
+    if not job:
+        return None
+
+    count = await prisma.job.update_many(
+        where={"id": job.id, "status": "QUEUED"},
+        data={
+            "status": "RUNNING",
+            "attempts": job.attempts + 1,
+            "processed": 0,
+            "skipped": 0,
+            "unchanged": 0,
+            "failed": 0,
+            "error": "",
+            "startedAt": now(),
+        },
+    )
+    if not count:
+        return None
+    return await prisma.job.find_unique(where={"id": job.id})
+
+
+async def update_job_progress(id: str, **data):
+    """
+    진행 상황(total, processed, skipped, unchanged, failed 등) 갱신
+
+    작업이 취소되었으면 JobCanceled 를 발생시킨다.
+    """
+    count = await prisma.job.update_many(
+        where={"id": id, "status": "RUNNING"},
+        data=data,
+    )
+    if not count:
+        raise JobCanceled(id)
+
+
+async def keep_job_alive(id: str):
+    """
+    실행 중인 작업의 updatedAt 을 주기적으로 갱신
+
+    진행 상황을 시작과 끝에만 남기는 긴 작업(이미지 GC, 객체 삭제)이 requeue_stale_jobs 에
+    죽은 작업으로 잡혀 두 번 실행되지 않도록, 작업이 끝날 때까지 함께 실행한다.
+    """
+    while True:
+        await asyncio.sleep(settings.job_heartbeat_seconds)
+        try:
+            await prisma.job.update_many(
+                where={"id": id, "status": "RUNNING"},
+                data={"updatedAt": now()},
+            )
+        except Exception as e:
+            # 다음 간격에 다시 시도한다
+            print("[error] job heartbeat", id, repr(e))
+
+
+async def finish_job(id: str, result: Optional[Any] = None):
+    """
+    작업 완료
+    """
+    data = {"status": "DONE", "finishedAt": now()}
+    if result is not None:
+        data["result"] = json.dumps(result)
+    await prisma.job.update_many(
+        where={"id": id, "status": "RUNNING"},
+        data=data,
+    )
+
+
+async def fail_job(job: models.Job, error: str):
+    """
+    작업 실패. 재시도 횟수가 남아 있으면 다시 대기 상태로 돌린다.
+    """
+    status = "QUEUED" if job.attempts < job.maxAttempts else "FAILED"
+    data = {"status": status, "error": error}
+    if status == "FAILED":
+        data["finishedAt"] = now()
+    await prisma.job.update_many(
+        where={"id": job.id, "status": "RUNNING"},
+        data=data,
+    )
+
+
+async def cancel_job(id: str) -> bool:
+    """
+    대기 중이거나 실행 중인 작업 취소
+    """
+    count = await prisma.job.update_many(
+        where={"id": id, "status": {"in": ["QUEUED", "RUNNING"]}},
+        data={"status": "CANCELED", "finishedAt": now()},
+    )
+    return count > 0
+
+
+async def requeue_stale_jobs() -> int:
+    """
+    워커가 죽어서 오랫동안 갱신되지 않은 실행 중 작업을 다시 대기 상태로 돌림
+    """
+    stale_before = now() - timedelta(seconds=settings.job_stale_seconds)
+    return await prisma.job.update_many(
+        where={"status": "RUNNING", "updatedAt": {"lt": stale_before}},
+        data={"status": "QUEUED"},
+    )
@@ -0,0 +1,110 @@
+"""
+카페/테마 검색
+
+API 프로세스마다 메모리 색인을 두고 시작할 때 DB 에서 채운다. 같은 프로세스의 생성/수정/삭제는
+바로 반영하고, 다른 프로세스(워커 등)의 변경은 SEARCH_REFRESH_SECONDS 마다 다시 읽어서 반영한다.
+다시 읽기는 백그라운드 작업 하나로 실행되며, 그동안 검색은 이전 색인을 쓴다.
+"""
+
+import asyncio
+import time
+from typing import Iterable, List, Optional
+
+from app.prisma import prisma
+from app.config import settings
+from app.utils.search_index import SearchIndex
+
+cafe_index = SearchIndex()
+theme_index = SearchIndex()
+
+_loaded_at: Optional[float] = None
+_lock: Optional[asyncio.Lock] = None
+_refresh: Optional[asyncio.Future] = None
+
+
+def get_lock() -> asyncio.Lock:
+    # 이벤트 루프 안에서 처음 쓸 때 만든다
+    global _lock
+    if _lock is None:
+        _lock = asyncio.Lock()
+    return _lock
+
+
+async def load_search_indexes():
+    """
+    DB 의 모든 카페/테마 이름으로 색인을 다시 만듦 (동시에 하나만 실행)
+    """
+    async with get_lock():
+        await build_search_indexes()
+
+
+async def build_search_indexes():
+    global cafe_index, theme_index, _loaded_at
+    cafes = await prisma.query_raw("SELECT id, name FROM cafes")
+    themes = await prisma.query_raw("SELECT id, name, displayName FROM themes")
+
+    new_cafe_index = SearchIndex()
+    for cafe in cafes:
+        new_cafe_index.add(cafe["id"], [cafe["name"]])
+    new_theme_index = SearchIndex()
+    for theme in themes:
+        new_theme_index.add(theme["id"], [theme["name"], theme["displayName"]])
+
+    # 검색 중에 비어 보이지 않도록 다 만든 뒤 교체
+    cafe_index = new_cafe_index
+    theme_index = new_theme_index
+    _loaded_at = time.monotonic()
+
+
+async def ensure_fresh():
+    """
+    색인이 오래되었으면 백그라운드에서 다시 읽기 시작 (아직 읽은 적이 없으면 기다림)
+    """
+    global _refresh
+    if _loaded_at is None:
+        await load_search_indexes()
+    elif time.monotonic() - _loaded_at > settings.search_refresh_seconds:
+        if _refresh is None or _refresh.done():
+            _refresh = asyncio.ensure_future(refresh_search_indexes())
+
+
+async def refresh_search_indexes():
+    try:
+        await load_search_indexes()
+    except Exception as e:
+        # 실패하면 이전 색인을 계속 쓰고 다음 검색 때 다시 시도
+        print("[error] search index refresh", repr(e))
+
+
+async def search_cafes(term: str) -> List[str]:
+    """
+    검색어와 맞는 모든 카페 id (점수가 높은 순)
+    """
+    await ensure_fresh()
+    return cafe_index.search(term, limit=None)
+
+
+async def search_themes(term: str) -> List[str]:
+    """
+    검색어와 맞는 모든 테마 id (점수가 높은 순)
+    """
+    await ensure_fresh()
+    return theme_index.search(term, limit=None)
+
+
+def index_cafe(cafe):
+    cafe_index.add(cafe.id, [cafe.name])
+
+
+def index_theme(theme):
+    theme_index.add(theme.id, [theme.name, theme.displayName])
+
+
+def unindex_cafe(id: str, theme_ids: Iterable[str] = ()):
+    cafe_index.remove(id)
+    for theme_id in theme_ids:
+        theme_index.remove(theme_id)
+
+
+def unindex_theme(id: str):
+    theme_index.remove(id)
@@ -0,0 +1,128 @@
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Set, Tuple
+
+import boto3
+from botocore.config import Config
+
+from app.config import settings
+
+_client = None
+_lock = threading.Lock()
+
+
+def get_s3_client():
+    """
+    프로세스 전체에서 공유하는 S3 클라이언트
+
+    처음 사용할 때 한 번만 생성한다. boto3 클라이언트는 스레드 간 공유해도 안전하며,
+    커넥션 풀과 keep-alive 로 요청마다 자격 증명/커넥션을 새로 만들지 않는다.
+    S3_ENDPOINT_URL 을 지정하면 로컬 S3 호환 서버(MinIO 등)로 요청한다.
+    """
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                session = boto3.session.Session()
+                _client = session.client(
+                    "s3",
+                    endpoint_url=settings.s3_endpoint_url,
+                    config=Config(
+                        max_pool_connections=settings.s3_max_pool_connections,
+                        tcp_keepalive=True,
+                        retries={"max_attempts": 3, "mode": "standard"},
+                    ),
+                )
+    return _client
+
+
+# delete_objects 한 번에 지울 수 있는 최대 키 수
+DELETE_BATCH_SIZE = 1000
+# 정리 결과에 남길 삭제 대상 키 예시 수
+SAMPLE_SIZE = 20
+
+
+def delete_keys(s3, keys: Iterable[str]) -> Tuple[int, List[dict]]:
+    """
+    키 목록을 1000개씩 묶어서 삭제
+
+    (삭제한 키 수, 실패한 키 목록[{"Key", "Code", "Message"}]) 을 반환한다.
+    """
+    keys = list(dict.fromkeys(x for x in keys if x))
+    deleted = 0
+    errors = list()
+    for i in range(0, len(keys), DELETE_BATCH_SIZE):
+        batch = keys[i : i + DELETE_BATCH_SIZE]
+        res = s3.delete_objects(
+            Bucket=settings.bucket_name,
+            Delete={"Objects": [{"Key": x} for x in batch], "Quiet": True},
+        )
+        batch_errors = res.get("Errors", [])
+        deleted += len(batch) - len(batch_errors)
+        errors.extend(batch_errors)
+    return deleted, errors
+
+
+def collect_garbage(
+    s3,
+    referenced: Set[str],
+    prefixes: List[str],
+    grace_hours: int,
+    dry_run: bool = True,
+) -> dict:
+    """
+    버킷을 훑으면서 참조되지 않는 객체 삭제
+
+    삭제는 DELETE_BATCH_SIZE 만큼 모일 때마다 한 번에 요청하므로, 목록 전체를 메모리에
+    올리지 않는다. 유예 기간이 1시간보다 짧으면 방금 올라가서 아직 저장되지 않은 이미지까지
+    지울 수 있으므로 ValueError.
+    """
+    if grace_hours < 1:
+        raise ValueError(f"유예 기간은 1시간 이상이어야 합니다: {grace_hours}")
+    before = datetime.now(timezone.utc) - timedelta(hours=grace_hours)
+    result = {
+        "dryRun": dry_run,
+        "scanned": 0,
+        "orphaned": 0,
+        "deleted": 0,
+        "bytes": 0,
+        "errors": [],
+        "samples": [],
+    }
+
+    pending = list()
+    pending_bytes = dict()
+
+    def flush():
+        if not pending:
+            return
+        if dry_run:
+            result["bytes"] += sum(pending_bytes.values())
+        else:
+            deleted, errors = delete_keys(s3, pending)
+            failed = {x["Key"] for x in errors}
+            result["deleted"] += deleted
+            result["bytes"] += sum(
+                size for key, size in pending_bytes.items() if key not in failed
+            )
+            result["errors"].extend(errors[:SAMPLE_SIZE])
+        pending.clear()
+        pending_bytes.clear()
+
+    paginator = s3.get_paginator("list_objects_v2")
+    for prefix in prefixes:
+        for page in paginator.paginate(Bucket=settings.bucket_name, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                result["scanned"] += 1
+                key = obj["Key"]
+                if key in referenced or obj["LastModified"] >= before:
+                    continue
+                result["orphaned"] += 1
+                if len(result["samples"]) < SAMPLE_SIZE:
+                    result["samples"].append(key)
+                pending.append(key)
+                pending_bytes[key] = obj.get("Size", 0)
+                if len(pending) >= DELETE_BATCH_SIZE:
+                    flush()
+    flush()
+    return result
@@ -0,0 +1,95 @@
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, List
+
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.chrome.service import Service
+
+
+def create_driver(chromedriver_path: str = "app/chromedriver") -> webdriver.Chrome:
+    """
+    헤드리스 크롬 드라이버 생성
+    """
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+
+    return webdriver.Chrome(service=Service(chromedriver_path), options=options)
+
+
+class BrowserPool:
+    """
+    재사용 가능한 크롬 드라이버 풀
+
+    최대 size 개의 드라이버만 동시에 존재하며, 드라이버는 필요할 때 생성되고
+    반납된 드라이버는 다음 작업에서 재사용된다. 타임아웃 이외의 WebDriverException 이
+    발생한 드라이버는 상태를 신뢰할 수 없으므로 반납하지 않고 종료한다.
+    """
+
+    def __init__(
+        self, size: int, factory: Callable[[], webdriver.Chrome] = create_driver
+    ):
+        self.size = size
+        self._factory = factory
+        self._idle: "queue.LifoQueue[webdriver.Chrome]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+
+    def __enter__(self) -> "BrowserPool":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @contextmanager
+    def acquire(self) -> Iterator[webdriver.Chrome]:
+        self._slots.acquire()
+        try:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                driver = self._factory()
+
+            healthy = True
+            try:
+                yield driver
+            except TimeoutException:
+                raise
+            except WebDriverException:
+                healthy = False
+                raise
+            finally:
+                if healthy and not self._closed:
+                    self._idle.put(driver)
+                else:
+                    _quit(driver)
+        finally:
+            self._slots.release()
+
+    def run(self, fn: Callable, *args):
+        """
+        풀에서 드라이버를 하나 빌려 fn(driver, *args) 실행 (블로킹)
+        """
+        with self.acquire() as driver:
+            return fn(driver, *args)
+
+    def close(self) -> None:
+        self._closed = True
+        drivers: List[webdriver.Chrome] = list()
+        while True:
+            try:
+                drivers.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        for driver in drivers:
+            _quit(driver)
+
+
+def _quit(driver: webdriver.Chrome) -> None:
+    try:
+        driver.quit()
+    except Exception as e:
+        print("[error]", e)
@@ -0,0 +1,168 @@
+"""
+대량 가져오기/내보내기 형식
+
+요청 본문을 받는 대로 한 줄씩 읽어서 행(dict)으로 바꾼다. 전체 본문을 메모리에 올리지 않는다.
+
+    ndjson  한 줄에 JSON 객체 하나 (빈 줄은 건너뜀)
+    csv     첫 행은 헤더. 빈 칸은 기본값을 쓰고, 목록 필드는 "a|b" 처럼 | 로 구분한다.
+            따옴표 안의 줄바꿈도 한 칸으로 읽는다.
+"""
+
+import csv
+from enum import Enum
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+import orjson
+from pydantic import ValidationError
+
+from app.utils.json_field import load_json
+
+# CSV 목록 필드 구분자
+LIST_SEPARATOR = "|"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class BulkFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class BulkRow(NamedTuple):
+    # 행이 시작하는 줄 번호 (1부터)
+    line: int
+    data: Optional[dict] = None
+    error: Optional[str] = None
+
+
+def detect_format(content_type: Optional[str]) -> BulkFormat:
+    if content_type and "csv" in content_type:
+        return BulkFormat.CSV
+    return BulkFormat.NDJSON
+
+
+def decode_line(line: bytes, first: bool) -> str:
+    # 첫 줄의 BOM 은 버린다
+    return line.rstrip(b"\r").decode("utf-8-sig" if first else "utf-8", "replace")
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    """
+    바이트 조각 -> (줄 번호, 줄)
+    """
+    buffer = b""
+    number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            number += 1
+            yield number, decode_line(line, number == 1)
+    if buffer:
+        number += 1
+        yield number, decode_line(buffer, number == 1)
+
+
+async def iter_ndjson(chunks: AsyncIterable[bytes]) -> AsyncIterator[BulkRow]:
+    async for number, line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        try:
+            data = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            yield BulkRow(number, error=f"JSON 형식 오류: {e}")
+            continue
+        if not isinstance(data, dict):
+            yield BulkRow(number, error="JSON 객체가 아닙니다")
+            continue
+        yield BulkRow(number, data)
+
+
+def csv_value(
+    name: str, value: str, list_fields: Iterable[str], json_fields: Iterable[str]
+) -> Any:
+    if name in list_fields:
+        return [x.strip() for x in value.split(LIST_SEPARATOR) if x.strip()]
+    if name in json_fields:
+        return load_json(value)
+    return value
+
+
+async def iter_csv(
+    chunks: AsyncIterable[bytes],
+    list_fields: Iterable[str] = (),
+    json_fields: Iterable[str] = (),
+) -> AsyncIterator[BulkRow]:
+    header: Optional[List[str]] = None
+    pending = ""
+    start = 0
+    async for number, line in iter_lines(chunks):
+        if pending:
+            pending += "\n" + line
+        else:
+            pending, start = line, number
+        # 따옴표가 닫히지 않았으면 다음 줄까지 한 칸
+        if pending.count('"') % 2:
+            continue
+        record, pending = pending, ""
+        if not record.strip():
+            continue
+
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [x.strip() for x in values]
+            continue
+        if len(values) != len(header):
+            yield BulkRow(
+                start, error=f"칸 수가 헤더와 다릅니다 ({len(values)} != {len(header)})"
+            )
+            continue
+        yield BulkRow(
+            start,
+            {
+                name: csv_value(name, value, list_fields, json_fields)
+                for name, value in zip(header, values)
+                if name and value != ""
+            },
+        )
+
+    if pending:
+        yield BulkRow(start, error="닫히지 않은 따옴표가 있습니다")
+
+
+def iter_rows(
+    chunks: AsyncIterable[bytes],
+    format: BulkFormat,
+    list_fields: Iterable[str] = (),
+    json_fields: Iterable[str] = (),
+) -> AsyncIterator[BulkRow]:
+    if format == BulkFormat.CSV:
+        return iter_csv(chunks, list_fields, json_fields)
+    return iter_ndjson(chunks)
+
+
+async def iter_batches(rows: AsyncIterable[Any], size: int) -> AsyncIterator[List[Any]]:
+    batch = list()
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = list()
+    if batch:
+        yield batch
+
+
+def validation_errors(error: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(x) for x in e['loc'])}: {e['msg']}" for e in error.errors()]
+
+
+def to_ndjson(item: Any) -> bytes:
+    return orjson.dumps(item) + b"\n"
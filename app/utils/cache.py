@@ -0,0 +1,139 @@
+import time
+from collections import OrderedDict
+from collections import defaultdict
+from typing import Any, Dict, Hashable, Iterable, Optional, Set
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    만료 시간과 최대 개수가 있는 LRU 캐시
+
+    키가 튜플이면 첫 번째 값을 이름 공간으로 보고 invalidate(이름) 으로 한 번에 지울 수 있다.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        item = self._data.get(key, _MISSING)
+        if item is not _MISSING:
+            expires_at, value = item
+            if expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            self._discard(key)
+        self.misses += 1
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._discard(next(iter(self._data)))
+
+    def delete(self, key: Hashable):
+        if key in self._data:
+            self._discard(key)
+
+    def invalidate(self, *namespaces: str):
+        """
+        이름 공간에 속한 키 모두 삭제
+        """
+        keys = [
+            key
+            for key in self._data
+            if isinstance(key, tuple) and key and key[0] in namespaces
+        ]
+        for key in keys:
+            self._discard(key)
+
+    def clear(self):
+        self._data.clear()
+
+    def _discard(self, key: Hashable):
+        del self._data[key]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": self.hits / total if total else 0.0,
+        }
+
+
+class TaggedCache(TTLCache):
+    """
+    태그로 무효화하는 TTL/LRU 캐시
+
+    값을 넣을 때 그 값이 의존하는 데이터의 태그(예: "cafe:<id>")를 함께 넣어 두면
+    invalidate_tags(태그) 로 관련된 값만 지울 수 있다.
+
+    조회 중에 무효화가 일어나면 오래된 값이 다시 들어갈 수 있으므로, 조회 전에 generation 을
+    받아 두고 set(..., generation=...) 으로 넣으면 그 사이 무효화가 있었을 때는 넣지 않는다.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        super().__init__(ttl, maxsize)
+        self.generation = 0
+        self._keys_by_tag: Dict[str, Set[Hashable]] = defaultdict(set)
+        self._tags_by_key: Dict[Hashable, tuple] = dict()
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: Optional[float] = None,
+        tags: Iterable[str] = (),
+        generation: Optional[int] = None,
+    ) -> bool:
+        if generation is not None and generation != self.generation:
+            return False
+        self.delete(key)
+        tags = tuple(tags)
+        self._tags_by_key[key] = tags
+        for tag in tags:
+            self._keys_by_tag[tag].add(key)
+        super().set(key, value, ttl)
+        return True
+
+    def invalidate_tags(self, *tags: str) -> int:
+        """
+        태그가 붙은 값 모두 삭제. 삭제한 개수 반환
+        """
+        self.generation += 1
+        keys = set()
+        for tag in tags:
+            keys.update(self._keys_by_tag.get(tag, ()))
+        for key in keys:
+            self.delete(key)
+        return len(keys)
+
+    def clear(self):
+        self.generation += 1
+        super().clear()
+        self._keys_by_tag.clear()
+        self._tags_by_key.clear()
+
+    def _discard(self, key: Hashable):
+        super()._discard(key)
+        for tag in self._tags_by_key.pop(key, ()):
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
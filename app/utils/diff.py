@@ -0,0 +1,119 @@
+import unicodedata
+from difflib import SequenceMatcher
+from typing import Callable, Dict, Iterable, List, NamedTuple, Tuple
+
+# 이름이 바뀐 것으로 볼 최소 유사도
+RENAME_THRESHOLD = 0.6
+# 이름 변경 탐지는 남은 항목끼리 모두 비교하므로 너무 많으면 생략
+RENAME_MAX_PAIRS = 2500
+
+
+def normalize_theme_name(
+    name: str,
+    nfkc: bool = True,
+    ignore_spaces: bool = True,
+    ignore_punctuation: bool = True,
+) -> str:
+    """
+    테마명 비교용 정규화
+
+    - nfkc: 전각/반각, 호환 자모 등을 NFKC 로 통일
+    - ignore_spaces: 띄어쓰기 차이 무시 (끄면 연속 공백만 하나로 정리)
+    - ignore_punctuation: 괄호, 따옴표, 느낌표 등 문장부호 제거
+    """
+    if nfkc:
+        name = unicodedata.normalize("NFKC", name)
+    if ignore_punctuation:
+        name = "".join(
+            " " if unicodedata.category(c).startswith("P") else c for c in name
+        )
+    if ignore_spaces:
+        name = "".join(name.split())
+    else:
+        name = " ".join(name.split())
+    return name.casefold()
+
+
+class ThemeDiff(NamedTuple):
+    # 스크랩에만 있는 테마
+    added: List[str]
+    # DB 에만 있는 테마
+    removed: List[str]
+    # (DB 테마명, 스크랩 테마명)
+    renamed: List[Tuple[str, str]]
+
+    @property
+    def different(self) -> List[str]:
+        """
+        양쪽 중 한쪽에만 있는 모든 테마명 (이름 변경 포함)
+        """
+        names = set(self.added)
+        names.update(self.removed)
+        for old, new in self.renamed:
+            names.add(old)
+            names.add(new)
+        return sorted(names)
+
+
+def index_names(
+    names: Iterable[str], normalize: Callable[[str], str]
+) -> Dict[str, str]:
+    """
+    정규화된 이름 -> 원래 이름 (처음 나온 이름 유지)
+    """
+    index = dict()
+    for name in names:
+        key = normalize(name)
+        if key and key not in index:
+            index[key] = name
+    return index
+
+
+def match_renamed(
+    removed: Dict[str, str], added: Dict[str, str]
+) -> List[Tuple[str, str]]:
+    """
+    남은 항목 중 충분히 비슷한 쌍을 유사도 높은 순으로 짝지음
+    """
+    if not removed or not added or len(removed) * len(added) > RENAME_MAX_PAIRS:
+        return []
+
+    candidates = list()
+    for old_key in removed:
+        for new_key in added:
+            ratio = SequenceMatcher(None, old_key, new_key).ratio()
+            if ratio >= RENAME_THRESHOLD:
+                candidates.append((ratio, old_key, new_key))
+    candidates.sort(key=lambda x: (-x[0], x[1], x[2]))
+
+    renamed = list()
+    for _, old_key, new_key in candidates:
+        if old_key in removed and new_key in added:
+            renamed.append((removed.pop(old_key), added.pop(new_key)))
+    return renamed
+
+
+def diff_themes(
+    current: Iterable[str],
+    scrapped: Iterable[str],
+    normalize: Callable[[str], str] = normalize_theme_name,
+) -> ThemeDiff:
+    """
+    DB 테마명과 스크랩 테마명 비교
+
+    정규화된 이름을 키로 한 dict/set 연산이므로 O(n + m) 이며, 결과에는 원래 이름이 담긴다.
+    """
+    current_index = index_names(current, normalize)
+    scrapped_index = index_names(scrapped, normalize)
+
+    removed_keys = current_index.keys() - scrapped_index.keys()
+    added_keys = scrapped_index.keys() - current_index.keys()
+    removed = {key: current_index[key] for key in removed_keys}
+    added = {key: scrapped_index[key] for key in added_keys}
+    renamed = match_renamed(removed, added)
+
+    return ThemeDiff(
+        added=sorted(added.values()),
+        removed=sorted(removed.values()),
+        renamed=sorted(renamed),
+    )
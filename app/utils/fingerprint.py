@@ -0,0 +1,54 @@
+import hashlib
+from typing import Dict, List, Mapping, NamedTuple
+
+
+class Fingerprint(NamedTuple):
+    """
+    스크래퍼 페이지 변경 여부 판단용 지문
+
+    contentHash 는 셀렉터에 매칭된 영역(테마명 목록)의 해시이며, 정적 HTML 에서
+    셀렉터가 아무것도 찾지 못한 페이지(JS 렌더링)는 빈 값으로 두어 건너뛰지 않는다.
+    """
+
+    etag: str = ""
+    lastModified: str = ""
+    contentHash: str = ""
+
+
+def hash_names(names: List[str]) -> str:
+    if not names:
+        return ""
+    return hashlib.sha256("\n".join(sorted(names)).encode("utf-8")).hexdigest()
+
+
+def make_fingerprint(headers: Mapping[str, str], names: List[str]) -> Fingerprint:
+    content_hash = hash_names(names)
+    if not content_hash:
+        return Fingerprint()
+    return Fingerprint(
+        etag=headers.get("ETag", ""),
+        lastModified=headers.get("Last-Modified", ""),
+        contentHash=content_hash,
+    )
+
+
+def stored_fingerprint(scrapper) -> Fingerprint:
+    return Fingerprint(
+        etag=scrapper.etag,
+        lastModified=scrapper.lastModified,
+        contentHash=scrapper.contentHash,
+    )
+
+
+def conditional_headers(fingerprint: Fingerprint) -> Dict[str, str]:
+    """
+    변경되지 않았으면 304 응답을 받을 수 있도록 조건부 요청 헤더 생성
+    """
+    headers = dict()
+    if not fingerprint.contentHash:
+        return headers
+    if fingerprint.etag:
+        headers["If-None-Match"] = fingerprint.etag
+    if fingerprint.lastModified:
+        headers["If-Modified-Since"] = fingerprint.lastModified
+    return headers
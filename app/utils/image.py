@@ -1,38 +1,322 @@
 import uuid
-import boto3
+import asyncio
+import hashlib
 import requests
 import mimetypes
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
 
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
+
+from app.prisma import prisma
 from app.config import settings
+from app.services.jobs import JOB_DELETE_OBJECTS, enqueue_job
+from app.services.storage import delete_keys, get_s3_client
+from app.utils.image_processing import (
+    CONTENT_TYPE,
+    encode_webp,
+    load_image,
+    variant_key,
+    variant_sizes,
+)
+
+# 다운로드 스트림을 읽는 단위
+CHUNK_SIZE = 64 * 1024
+# 이보다 큰 이미지는 메모리 대신 임시 파일에 담는다
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+
+class ImageUploadError(Exception):
+    """
+    이미지 다운로드/업로드 실패
+    """
+
+
+class StoredImage(NamedTuple):
+    key: str
+    hash: str
+
+
+class IngestedImage(NamedTuple):
+    # 요청에 들어온 원래 값 (외부 URL 또는 이미 저장된 키)
+    source: str
+    # 저장된 이미지 경로 (실패 시 빈 문자열)
+    url: str = ""
+    error: Optional[str] = None
+    # 이번 요청에서 새로 저장되어 색인에 추가해야 하는 이미지
+    stored: Optional[StoredImage] = None
+
+
+def source_id(image_url: str) -> str:
+    return hashlib.sha256(image_url.encode("utf-8")).hexdigest()
+
+
+class UploadedImage(NamedTuple):
+    key: str
+    # 썸네일 키 (작은 것부터)
+    variants: List[str]
+
+
+# 큰 파일은 청크 단위 멀티파트로 업로드
+transfer_config = TransferConfig(
+    multipart_threshold=settings.s3_multipart_threshold,
+    multipart_chunksize=settings.s3_multipart_chunksize,
+    max_concurrency=4,
+)
+
+
+CACHE_CONTROL = "max-age=172800"
+
+
+def put_image(s3, f, key: str, content_type: str):
+    s3.upload_fileobj(
+        f,
+        settings.bucket_name,
+        key,
+        ExtraArgs={
+            "ContentType": content_type,
+            "CacheControl": CACHE_CONTROL,
+        },
+        Config=transfer_config,
+    )
+
+
+def is_not_found(e: ClientError) -> bool:
+    return e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+
+def touch_object(s3, key: str) -> bool:
+    """
+    이미 있는 객체를 다시 쓸 때 제자리 복사로 LastModified 를 갱신 (없으면 False)
+
+    참조되지 않은 채 오래 남아 있던 객체를 다시 참조해도 GC 가 유예 기간 동안은 지우지 않는다.
+    """
+    try:
+        head = s3.head_object(Bucket=settings.bucket_name, Key=key)
+        # 같은 메타데이터로는 자기 자신에 복사할 수 없으므로 REPLACE 로 다시 지정
+        s3.copy_object(
+            Bucket=settings.bucket_name,
+            Key=key,
+            CopySource={"Bucket": settings.bucket_name, "Key": key},
+            MetadataDirective="REPLACE",
+            ContentType=head.get("ContentType") or "application/octet-stream",
+            CacheControl=head.get("CacheControl") or CACHE_CONTROL,
+            Metadata=head.get("Metadata") or {},
+        )
+    except ClientError as e:
+        if is_not_found(e):
+            return False
+        raise
+    return True
+
+
+def upload_image(image_url: str, folder_name: str) -> StoredImage:
+    """
+    이미지 URL을 s3에 저장
+
+    내려받는 동안 sha256 을 계산해 `<폴더>/<해시>.<확장자>` 를 키로 쓰며,
+    같은 내용의 객체가 이미 있으면 업로드 대신 touch_object 로 수정 시각만 갱신한다.
+    """
+    try:
+        r = requests.get(image_url, stream=True, timeout=settings.image_timeout)
+        r.raise_for_status()
+    except requests.RequestException as e:
+        raise ImageUploadError(f"다운로드 실패: {e}")
+
+    with r, SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as f:
+        content_type = r.headers.get("content-type", "")
+        ext = mimetypes.guess_extension(content_type.split(";")[0].strip())
+        if not content_type.startswith("image/") or not ext:
+            raise ImageUploadError(f"이미지가 아닙니다: {content_type or 'unknown'}")
+
+        digest = hashlib.sha256()
+        try:
+            for chunk in r.iter_content(CHUNK_SIZE):
+                digest.update(chunk)
+                f.write(chunk)
+        except requests.RequestException as e:
+            raise ImageUploadError(f"다운로드 실패: {e}")
+        hash = digest.hexdigest()
+        key = f"{folder_name}/{hash}.{ext.replace('.', '')}"
+
+        s3 = get_s3_client()
+        try:
+            if not touch_object(s3, key):
+                f.seek(0)
+                put_image(s3, f, key, content_type)
+        except Exception as e:
+            raise ImageUploadError(f"업로드 실패: {e}")
+    return StoredImage(key=key, hash=hash)
+
+
+image_executor = ThreadPoolExecutor(max_workers=settings.image_ingest_concurrency)
+
+
+async def find_image_sources(image_urls: Iterable[str]) -> Dict[str, str]:
+    """
+    이미 저장한 적 있는 외부 URL -> 저장된 키
+    """
+    ids = {source_id(x): x for x in image_urls}
+    if not ids:
+        return dict()
+    sources = await prisma.imagesource.find_many(where={"id": {"in": list(ids)}})
+    return {x.url: x.key for x in sources if ids.get(x.id) == x.url}
+
+
+async def shared_image_keys(keys: Iterable[str]) -> Set[str]:
+    """
+    색인에 등록된(여러 곳에서 같이 쓸 수 있는) 키
+    """
+    keys = list(set(keys))
+    if not keys:
+        return set()
+    sources = await prisma.imagesource.find_many(where={"key": {"in": keys}})
+    return {x.key for x in sources}
+
+
+def touch_known_object(key: str) -> bool:
+    try:
+        return touch_object(get_s3_client(), key)
+    except ClientError:
+        # 확인하지 못했으면 다시 올리지 않고 색인의 키를 그대로 쓴다
+        return True
+
+
+async def ingest_image(
+    source: str, folder_name: str, known: Dict[str, str]
+) -> IngestedImage:
+    loop = asyncio.get_running_loop()
+    if source in known:
+        # 색인의 키가 GC 나 수동 삭제로 지워졌으면 다시 내려받고, 남아 있으면 수정 시각 갱신
+        if await loop.run_in_executor(
+            image_executor, touch_known_object, known[source]
+        ):
+            return IngestedImage(source=source, url=f"/{known[source]}")
+
+    try:
+        stored = await loop.run_in_executor(
+            image_executor, upload_image, source, folder_name
+        )
+    except ImageUploadError as e:
+        return IngestedImage(source=source, error=str(e))
+    return IngestedImage(source=source, url=f"/{stored.key}", stored=stored)
+
+
+async def ingest_images(sources: List[str], folder_name: str) -> List[IngestedImage]:
+    """
+    이미지 목록 저장
+
+    이미 색인에 있는 외부 URL 은 저장된 객체가 남아 있으면 내려받지 않고 그 키를 쓴다. 나머지는
+    image_executor 에서 동시에 내려받아 업로드하고(동시 실행 수는
+    IMAGE_INGEST_CONCURRENCY), 이미 저장된 경로는 그대로 둔다. 결과는 입력 순서를 유지하며
+    실패한 이미지는 error 에 사유가 담긴다.
+    """
+    urls = list(dict.fromkeys(x for x in sources if "http" in x))
+    known = await find_image_sources(urls)
+
+    ingested = await asyncio.gather(
+        *[ingest_image(x, folder_name, known) for x in urls]
+    )
+    by_source = {x.source: x for x in ingested}
+
+    new_sources = [x for x in ingested if x.stored]
+    # 객체가 지워져서 다시 올린 URL 은 예전 색인을 지우고 새 키로 등록
+    stale = [source_id(x.source) for x in new_sources if x.source in known]
+    if stale:
+        await prisma.imagesource.delete_many(where={"id": {"in": stale}})
+    if new_sources:
+        await prisma.imagesource.create_many(
+            data=[
+                {
+                    "id": source_id(x.source),
+                    "url": x.source,
+                    "hash": x.stored.hash,
+                    "key": x.stored.key,
+                }
+                for x in new_sources
+            ],
+            skip_duplicates=True,
+        )
+
+    return [by_source.get(x) or IngestedImage(source=x, url=x) for x in sources]
 
 
-def upload_image(image_url: str, folder_name: str):
+async def save_uploaded_image(s3, f, folder_name: str) -> UploadedImage:
     """
-    이미지 URL을 s3에 다이렉트로 저장
+    업로드된 이미지 저장
+
+    실제 내용으로 형식을 판별해 긴 변이 IMAGE_MAX_DIMENSION 이하인 WEBP 로 다시 인코딩하고,
+    IMAGE_VARIANT_SIZES 크기의 썸네일을 같은 (줄인) 이미지에서 하나씩 차례로 만든다.
+    원본 크기 이미지는 한 장만, 잠깐 동안만 메모리에 올라간다.
+    결과물은 임시 파일에 담아 멀티파트로 업로드한다.
     """
+    loop = asyncio.get_running_loop()
+
+    def run(fn, *args):
+        return loop.run_in_executor(image_executor, fn, *args)
+
+    img = await run(
+        load_image, f, settings.image_max_dimension, settings.image_max_pixels
+    )
+    sizes = variant_sizes(img, settings.image_variant_sizes)
+
+    def encode_all():
+        return [
+            encode_webp(img, x, settings.image_quality)
+            for x in [settings.image_max_dimension, *sizes]
+        ]
+
+    encoded = await run(encode_all)
+
+    key = f"{folder_name}/{uuid.uuid1()}.webp"
+    keys = [key] + [variant_key(key, x) for x in sizes]
     try:
-        r = requests.get(image_url, stream=True)
-
-        session = boto3.Session()
-        s3 = session.resource("s3")
-        bucket_name = settings.bucket_name
-        file_name = uuid.uuid1()
-
-        content_type = r.headers["content-type"]
-        if "application" in content_type:
-            return ""
-        ext = mimetypes.guess_extension(content_type).replace(".", "")
-        key = f"{folder_name}/{file_name}.{ext}"
-
-        bucket = s3.Bucket(bucket_name)
-        bucket.upload_fileobj(
-            r.raw,
-            key,
-            ExtraArgs={
-                "ContentType": content_type,
-                "CacheControl": "max-age=172800",
-            },
+        await asyncio.gather(
+            *[
+                run(put_image, s3, x.file, k, CONTENT_TYPE)
+                for x, k in zip(encoded, keys)
+            ]
         )
-        return f"/{key}"
-    except:
-        return ""
+    finally:
+        for x in encoded:
+            x.file.close()
+    return UploadedImage(key=key, variants=keys[1:])
+
+
+def image_keys(key: str) -> List[str]:
+    """
+    저장된 이미지 키와 썸네일 키
+    """
+    keys = [key]
+    if key.endswith(".webp"):
+        keys.extend(variant_key(key, x) for x in settings.image_variant_sizes)
+    return keys
+
+
+async def remove_images(s3, paths: Iterable[str], deferred: bool = False) -> dict:
+    """
+    저장된 이미지(`/폴더/이름.확장자`)와 썸네일을 묶어서 삭제
+
+    색인(ImageSource)에 등록된 이미지는 다른 곳과 같이 쓸 수 있으므로 객체와 색인 행을 모두
+    남겨둔다. 이런 이미지는 이미지 GC 작업만 정리한다 (참조가 없어진 색인 행을 지운 뒤 유예
+    시간이 지난 객체 삭제). deferred 이면 삭제 작업을 큐에 등록하고 워커가 재시도와 함께 처리한다.
+    """
+    keys = [x[1:] for x in paths if x and x.startswith("/")]
+    shared = await shared_image_keys(keys)
+    keys = [y for x in keys if x not in shared for y in image_keys(x)]
+    if not keys:
+        return {"deleted": 0, "errors": []}
+
+    if deferred:
+        job = await enqueue_job(JOB_DELETE_OBJECTS, {"keys": keys})
+        return {"jobId": job.id}
+
+    loop = asyncio.get_running_loop()
+    deleted, errors = await loop.run_in_executor(None, delete_keys, s3, keys)
+    return {"deleted": deleted, "errors": errors}
+
+
+def close_image_executor():
+    image_executor.shutdown(wait=False)
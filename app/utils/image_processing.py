@@ -0,0 +1,99 @@
+from tempfile import SpooledTemporaryFile
+from typing import BinaryIO, List, NamedTuple
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# 받아들이는 원본 형식 (Pillow 기준)
+FORMATS = ("JPEG", "MPO", "PNG", "WEBP", "GIF", "BMP", "TIFF")
+# 이보다 큰 결과물은 메모리 대신 임시 파일에 담는다
+SPOOL_MAX_SIZE = 4 * 1024 * 1024
+
+CONTENT_TYPE = "image/webp"
+
+
+class ImageProcessingError(ValueError):
+    """
+    이미지로 읽을 수 없거나 허용하지 않는 이미지
+    """
+
+
+class EncodedImage(NamedTuple):
+    file: BinaryIO
+    width: int
+    height: int
+    size: int
+
+
+def open_image(f: BinaryIO, max_pixels: int) -> Image.Image:
+    """
+    실제 내용으로 형식을 판별하여 이미지 열기 (헤더만 읽고 디코딩은 하지 않음)
+    """
+    try:
+        img = Image.open(f)
+    except Image.DecompressionBombError:
+        raise ImageProcessingError("이미지가 너무 큽니다")
+    except (UnidentifiedImageError, OSError):
+        raise ImageProcessingError("이미지 파일이 아닙니다")
+    if img.format not in FORMATS:
+        raise ImageProcessingError(f"지원하지 않는 이미지 형식입니다: {img.format}")
+    width, height = img.size
+    if width * height > max_pixels:
+        raise ImageProcessingError(f"이미지가 너무 큽니다: {width}x{height}")
+    return img
+
+
+def load_image(f: BinaryIO, max_dimension: int, max_pixels: int) -> Image.Image:
+    """
+    업로드 이미지 디코딩
+
+    JPEG 는 draft 로 필요한 크기에 가깝게 축소하면서 디코딩하고, WEBP 로 저장할 수 있는
+    색 공간(RGB/RGBA)으로 바꾼 뒤 긴 변이 max_dimension 이하가 되도록 바로 줄인다. 원본 크기
+    이미지는 여기서 버리므로 이후 인코딩/썸네일은 줄인 이미지만 사용한다. EXIF 회전은 줄인
+    뒤에 반영한다.
+    """
+    img = open_image(f, max_pixels)
+    img.draft("RGB", (max_dimension, max_dimension))
+    try:
+        img.load()
+        if img.mode not in ("RGB", "RGBA"):
+            has_alpha = img.mode in ("LA", "PA") or "transparency" in img.info
+            img = img.convert("RGBA" if has_alpha else "RGB")
+        img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+        img = ImageOps.exif_transpose(img)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        raise ImageProcessingError(f"이미지를 읽을 수 없습니다: {e}")
+    return img
+
+
+def encode_webp(img: Image.Image, max_dimension: int, quality: int) -> EncodedImage:
+    """
+    긴 변이 max_dimension 이하가 되도록 줄여서 WEBP 로 인코딩
+
+    원본을 복사하지 않고 줄인 크기의 이미지만 새로 만든다.
+    """
+    resized = img
+    if max(img.size) > max_dimension:
+        scale = max_dimension / max(img.size)
+        size = tuple(max(1, round(x * scale)) for x in img.size)
+        resized = img.resize(size, Image.Resampling.LANCZOS)
+
+    f = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    resized.save(f, "WEBP", quality=quality, method=4)
+    size = f.tell()
+    f.seek(0)
+    return EncodedImage(file=f, width=resized.width, height=resized.height, size=size)
+
+
+def variant_key(key: str, size: int) -> str:
+    """
+    썸네일 키: `<폴더>/<이름>_<긴 변 크기>.webp`
+    """
+    base = key.rsplit(".", 1)[0]
+    return f"{base}_{size}.webp"
+
+
+def variant_sizes(img: Image.Image, sizes: List[int]) -> List[int]:
+    """
+    원본보다 작은 썸네일 크기만 사용
+    """
+    return sorted(x for x in set(sizes) if 0 < x < max(img.size))
@@ -0,0 +1,33 @@
+import json
+from typing import Any, List
+
+
+def load_json(value: Any) -> Any:
+    if isinstance(value, (str, bytes)):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return None
+    return value
+
+
+def parse_json_list(value: Any) -> List[Any]:
+    """
+    Json 컬럼 값을 리스트로 변환
+
+    json.dumps 로 저장된 문자열과 이미 파싱된 리스트를 모두 처리한다.
+    """
+    value = load_json(value)
+    if isinstance(value, list):
+        return value
+    return []
+
+
+def parse_json_object(value: Any) -> dict:
+    """
+    Json 컬럼 값을 dict 로 변환
+    """
+    value = load_json(value)
+    if isinstance(value, dict):
+        return value
+    return {}
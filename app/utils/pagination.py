@@ -0,0 +1,295 @@
+"""
+리스트 페이지네이션
+
+기본은 skip/take 오프셋 방식이며, cursor 파라미터를 넘기면(첫 페이지는 빈 문자열) 키셋
+방식으로 동작한다. 커서는 마지막 항목의 (정렬 키, id) 를 담은 불투명한 문자열이고,
+정렬 키가 같은 행은 id 로 순서를 고정하므로 페이지를 넘기는 중에 행이 추가/삭제되어도
+중복이나 누락이 없다. 깊은 페이지도 인덱스 범위 조회 한 번으로 끝난다.
+
+전체 수(total)는 count 파라미터로 계산 방식을 고른다.
+
+    exact   count 와 페이지 조회를 동시에 실행
+    cached  같은 조건의 count 를 COUNT_CACHE_TTL 초 동안 재사용 (쓰기 시 무효화)
+    none    count 를 생략하고 total 은 null
+
+예전 withTotal=false 파라미터는 count=none 과 같다 (사용 중지 예정, count_mode 참고).
+
+검색어가 있으면 sort=relevance 로 검색 순위대로 나눌 수 있다 (find_ranked_page).
+"""
+
+import asyncio
+import base64
+from datetime import datetime
+from enum import Enum
+from typing import Any, List, Optional, Tuple
+
+import orjson
+
+from app.utils.cache import TTLCache
+
+# 조건별 count 캐시 유지 시간 (초)
+COUNT_CACHE_TTL = 10
+
+count_cache = TTLCache(ttl=COUNT_CACHE_TTL, maxsize=1024)
+
+# 검색 순위 정렬
+RELEVANCE = "relevance"
+
+
+class CountMode(str, Enum):
+    EXACT = "exact"
+    CACHED = "cached"
+    NONE = "none"
+
+
+def count_mode(count: Optional[CountMode], with_total: Optional[bool]) -> CountMode:
+    """
+    count 파라미터와 사용 중지 예정인 withTotal 파라미터를 하나의 CountMode 로
+    """
+    if with_total is False:
+        return CountMode.NONE
+    return count or CountMode.EXACT
+
+
+class InvalidCursorError(ValueError):
+    """
+    해석할 수 없거나 정렬 조건과 맞지 않는 커서 (400 으로 응답)
+    """
+
+
+def encode_cursor(sort: str, value: Any, id: str) -> str:
+    if isinstance(value, datetime):
+        value = {"$dt": value.isoformat()}
+    data = orjson.dumps([sort, value, id])
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, str]:
+    """
+    커서 -> (정렬 키 값, id)
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, value, id = orjson.loads(data)
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value["$dt"])
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursorError("잘못된 커서입니다")
+    if cursor_sort != sort:
+        raise InvalidCursorError("정렬 조건이 커서와 다릅니다")
+    return value, id
+
+
+def order_by(sort: str, order: str) -> List[dict]:
+    """
+    정렬 키가 같은 행은 id 로 순서 고정
+    """
+    if sort == "id":
+        return [{"id": order}]
+    return [{sort: order}, {"id": order}]
+
+
+def keyset_where(sort: str, order: str, value: Any, id: str) -> dict:
+    """
+    커서 다음에 오는 행 조건
+
+    MySQL 은 NULL 을 가장 작은 값으로 정렬한다 (asc 는 맨 앞, desc 는 맨 뒤).
+    """
+    cmp = "lt" if order == "desc" else "gt"
+    if sort == "id":
+        return {"id": {cmp: id}}
+
+    if value is None:
+        same = {sort: None, "id": {cmp: id}}
+        if order == "desc":
+            return same
+        return {"OR": [same, {"NOT": [{sort: None}]}]}
+
+    after = [{sort: {cmp: value}}, {sort: value, "id": {cmp: id}}]
+    if order == "desc":
+        after.append({sort: None})
+    return {"OR": after}
+
+
+def count_key(name: str, where: dict) -> tuple:
+    """
+    조건 dict 를 키 순서와 무관한 문자열로 정규화
+    """
+    return (name, orjson.dumps(where, option=orjson.OPT_SORT_KEYS, default=str))
+
+
+def invalidate_counts(*names: str):
+    """
+    모델의 데이터가 바뀌었을 때 캐시된 count 삭제
+    """
+    count_cache.invalidate(*names)
+
+
+async def count_rows(
+    delegate, where: dict, mode: CountMode, name: str
+) -> Optional[int]:
+    if mode == CountMode.NONE:
+        return None
+    if mode == CountMode.EXACT or not name:
+        return await delegate.count(where=where)
+
+    key = count_key(name, where)
+    total = count_cache.get(key)
+    if total is None:
+        total = await delegate.count(where=where)
+        count_cache.set(key, total)
+    return total
+
+
+def next_cursor(items: list, sort: str, take: int) -> Optional[str]:
+    if len(items) <= take:
+        return None
+    last = items[take - 1]
+    return encode_cursor(sort, getattr(last, sort), last.id)
+
+
+async def find_page(
+    delegate,
+    where: dict,
+    sort: str,
+    order: str,
+    skip: int = 0,
+    take: int = 20,
+    cursor: Optional[str] = None,
+    include: Optional[dict] = None,
+    count: CountMode = CountMode.EXACT,
+    name: str = "",
+) -> dict:
+    """
+    한 페이지 조회
+
+    {"total": 전체 수 (count 가 none 이면 None), "items": [...], "nextCursor": 다음 커서}
+    name 은 count 캐시의 이름 공간이며 invalidate_counts(name) 으로 무효화한다.
+    """
+    options = {"take": take, "order": order_by(sort, order)}
+    if include:
+        options["include"] = include
+
+    if cursor is None:
+        options["skip"] = skip
+        options["where"] = where
+    else:
+        options["take"] = take + 1
+        options["where"] = where
+        if cursor:
+            value, id = decode_cursor(cursor, sort)
+            after = keyset_where(sort, order, value, id)
+            options["where"] = {"AND": [where, after]} if where else after
+
+    total, items = await asyncio.gather(
+        count_rows(delegate, where, count, name),
+        delegate.find_many(**options),
+    )
+
+    next = None
+    if cursor is not None:
+        next = next_cursor(items, sort, take)
+        items = items[:take]
+    return {"total": total, "items": items, "nextCursor": next}
+
+
+def paginate_items(
+    items: List[dict],
+    sort: str,
+    order: str,
+    skip: int = 0,
+    take: int = 20,
+    cursor: Optional[str] = None,
+    count: CountMode = CountMode.EXACT,
+) -> dict:
+    """
+    메모리에 있는 목록을 find_page 와 같은 모양으로 나눔
+    """
+    desc = order == "desc"
+    rows = sorted(items, key=lambda x: (x[sort], x["id"]), reverse=desc)
+    total = None if count == CountMode.NONE else len(rows)
+    if cursor is None:
+        return {"total": total, "items": rows[skip : skip + take], "nextCursor": None}
+
+    if cursor:
+        key = decode_cursor(cursor, sort)
+        try:
+            rows = [
+                x
+                for x in rows
+                if ((x[sort], x["id"]) < key if desc else (x[sort], x["id"]) > key)
+            ]
+        except TypeError:
+            # 정렬 키와 다른 타입의 값을 넣어 만든 커서
+            raise InvalidCursorError("정렬 조건이 커서와 다릅니다")
+    next = None
+    if len(rows) > take:
+        last = rows[take - 1]
+        next = encode_cursor(sort, last[sort], last["id"])
+    return {"total": total, "items": rows[:take], "nextCursor": next}
+
+
+def ranked_where(where: dict, ids: List[str]) -> dict:
+    condition = {"id": {"in": ids}}
+    return {"AND": [where, condition]} if where else condition
+
+
+async def find_ranked_page(
+    delegate,
+    where: dict,
+    ids: List[str],
+    skip: int = 0,
+    take: int = 20,
+    cursor: Optional[str] = None,
+    include: Optional[dict] = None,
+    count: CountMode = CountMode.EXACT,
+    name: str = "",
+    window: int = 500,
+) -> dict:
+    """
+    검색 순위(ids 순서)대로 한 페이지 조회
+
+    ids 를 앞에서부터 window 개씩 잘라 where 조건에 맞는 행을 순위대로 모으고, 페이지가 차면
+    멈춘다. 커서는 마지막 항목의 (순위, id) 를 담으며, 색인이 바뀌어 id 가 빠졌으면 순위
+    다음부터 이어간다. find_page 와 같은 모양을 반환한다.
+    """
+    start = 0
+    if cursor:
+        position, last = decode_cursor(cursor, RELEVANCE)
+        if not isinstance(position, int):
+            raise InvalidCursorError("정렬 조건이 커서와 다릅니다")
+        start = ids.index(last) + 1 if last in ids else position + 1
+    need = take + 1 if cursor is not None else skip + take
+
+    async def collect() -> List[Tuple[int, Any]]:
+        rows = list()
+        options = {"include": include} if include else dict()
+        position = start
+        while position < len(ids) and len(rows) < need:
+            chunk = ids[position : position + window]
+            found = {
+                x.id: x
+                for x in await delegate.find_many(
+                    where=ranked_where(where, chunk), **options
+                )
+            }
+            rows.extend(
+                (position + i, found[id]) for i, id in enumerate(chunk) if id in found
+            )
+            position += len(chunk)
+        return rows
+
+    total, rows = await asyncio.gather(
+        count_rows(delegate, ranked_where(where, ids), count, name),
+        collect(),
+    )
+
+    if cursor is None:
+        items = [x for _, x in rows[skip : skip + take]]
+        return {"total": total, "items": items, "nextCursor": None}
+
+    next = None
+    if len(rows) > take:
+        position, last = rows[take - 1]
+        next = encode_cursor(RELEVANCE, position, last.id)
+    return {"total": total, "items": [x for _, x in rows[:take]], "nextCursor": next}
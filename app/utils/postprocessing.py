@@ -0,0 +1,203 @@
+"""
+스크래퍼 후처리 파이프라인
+
+themePostProcessing / branchPostProcessing 에는 한 줄에 하나씩 변환을 적는다.
+
+    remove <정규식>                  매칭되는 부분 삭제
+    replace <정규식> => <바꿀 문자열>   매칭되는 부분 치환 (\\1 등 그룹 참조 가능)
+    split <구분자>                   구분자로 나눠 여러 개로 분리
+    split <구분자> <번호>             구분자로 나눈 뒤 번호(0부터, 음수 가능) 위치만 사용
+    strip_prefix <문자열>            앞부분 제거
+    strip_suffix <문자열>            뒷부분 제거
+    match <정규식>                   매칭되는 값만 남김
+    exclude <정규식>                 매칭되는 값은 버림
+
+알려진 명령으로 시작하지 않는 줄은 `remove <줄 전체>` 로 처리한다.
+변환은 줄 단위로 전체 목록에 한 번에 적용되며, 결과가 빈 문자열인 값은 버린다.
+"""
+
+import re
+from functools import lru_cache
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+Step = Callable[[List[str]], List[str]]
+
+OPS = (
+    "remove",
+    "replace",
+    "split",
+    "strip_prefix",
+    "strip_suffix",
+    "match",
+    "exclude",
+)
+
+
+class PostProcessingError(ValueError):
+    """
+    후처리 문법 오류
+    """
+
+
+def _remove(pattern: "re.Pattern") -> Step:
+    return lambda values: [pattern.sub("", x) for x in values]
+
+
+def _replace(pattern: "re.Pattern", replacement: str) -> Step:
+    return lambda values: [pattern.sub(replacement, x) for x in values]
+
+
+def _split(separator: str, index: Optional[int]) -> Step:
+    if index is None:
+        return lambda values: [y for x in values for y in x.split(separator)]
+
+    def step(values: List[str]) -> List[str]:
+        result = list()
+        for x in values:
+            parts = x.split(separator)
+            if -len(parts) <= index < len(parts):
+                result.append(parts[index])
+        return result
+
+    return step
+
+
+def _strip_prefix(prefix: str) -> Step:
+    return lambda values: [
+        x[len(prefix) :] if x.startswith(prefix) else x for x in values
+    ]
+
+
+def _strip_suffix(suffix: str) -> Step:
+    return lambda values: [
+        x[: -len(suffix)] if x.endswith(suffix) else x for x in values
+    ]
+
+
+def _match(pattern: "re.Pattern") -> Step:
+    return lambda values: [x for x in values if pattern.search(x)]
+
+
+def _exclude(pattern: "re.Pattern") -> Step:
+    return lambda values: [x for x in values if not pattern.search(x)]
+
+
+def _regex(value: str, line_no: int) -> "re.Pattern":
+    try:
+        return re.compile(value)
+    except re.error as e:
+        raise PostProcessingError(f"{line_no}번째 줄: 잘못된 정규식 ({e})")
+
+
+def _compile_step(line: str, line_no: int) -> Step:
+    op, _, arg = line.partition(" ")
+    arg = arg.strip()
+
+    if op in OPS and not arg:
+        raise PostProcessingError(f"{line_no}번째 줄: '{op}' 에 인자가 없습니다")
+
+    if op == "remove":
+        return _remove(_regex(arg, line_no))
+    if op == "replace":
+        if " => " not in arg:
+            raise PostProcessingError(
+                f"{line_no}번째 줄: replace <정규식> => <바꿀 문자열> 형식이어야 합니다"
+            )
+        pattern, replacement = arg.split(" => ", 1)
+        return _replace(_regex(pattern, line_no), replacement)
+    if op == "split":
+        separator, _, index = arg.rpartition(" ")
+        if separator and re.fullmatch(r"-?\d+", index):
+            return _split(separator, int(index))
+        return _split(arg, None)
+    if op == "strip_prefix":
+        return _strip_prefix(arg)
+    if op == "strip_suffix":
+        return _strip_suffix(arg)
+    if op == "match":
+        return _match(_regex(arg, line_no))
+    if op == "exclude":
+        return _exclude(_regex(arg, line_no))
+
+    # 명령 없이 정규식만 적은 줄
+    return _remove(_regex(line, line_no))
+
+
+class Pipeline:
+    def __init__(self, text: str = ""):
+        self.steps: List[Step] = list()
+        self.filters = False
+        for line_no, line in enumerate(text.splitlines(), start=1):
+            line = line.strip()
+            if not line:
+                continue
+            self.steps.append(_compile_step(line, line_no))
+            if line.split(" ", 1)[0] in ("match", "exclude"):
+                self.filters = True
+
+    def __call__(self, values: List[str]) -> List[str]:
+        for step in self.steps:
+            values = step(values)
+        return [x for x in (" ".join(x.split()) for x in values) if x]
+
+
+class ScrapperPipelines(NamedTuple):
+    theme: Pipeline
+    branch: Pipeline
+
+    def process(
+        self,
+        names: List[str],
+        branches: Optional[List[str]] = None,
+        keep_branch: Optional[Callable[[str], bool]] = None,
+    ) -> List[str]:
+        """
+        지점별로 묶인 테마명 처리
+
+        branches 는 names 와 같은 길이의 지점명 목록이다. 지점명에 branch 파이프라인을
+        적용하여 남은 지점의 테마명만 모은 뒤 theme 파이프라인을 한 번에 적용한다.
+        branch 파이프라인에 match/exclude 가 없으면 keep_branch 로 지점을 고른다.
+        """
+        if branches is None:
+            return self.theme(names)
+
+        grouped: Dict[str, List[str]] = dict()
+        for branch, name in zip(branches, names):
+            grouped.setdefault(branch, list()).append(name)
+
+        kept = list()
+        for branch, group_names in grouped.items():
+            # 지점명이 없는 그룹은 고를 기준이 없으므로 그대로 둔다
+            if not branch:
+                kept.extend(group_names)
+                continue
+            processed = self.branch([branch])
+            if not processed:
+                continue
+            if (
+                not self.branch.filters
+                and keep_branch
+                and not keep_branch(processed[0])
+            ):
+                continue
+            kept.extend(group_names)
+        return self.theme(kept)
+
+
+@lru_cache(maxsize=512)
+def compile_pipelines(
+    id: str, updated_at: object, theme_text: str, branch_text: str
+) -> ScrapperPipelines:
+    """
+    스크래퍼별 후처리 파이프라인 컴파일 (스크래퍼 id + updatedAt 기준 캐시)
+    """
+    return ScrapperPipelines(theme=Pipeline(theme_text), branch=Pipeline(branch_text))
+
+
+def get_pipelines(scrapper) -> ScrapperPipelines:
+    return compile_pipelines(
+        scrapper.id,
+        scrapper.updatedAt,
+        scrapper.themePostProcessing,
+        scrapper.branchPostProcessing,
+    )
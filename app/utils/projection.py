@@ -0,0 +1,46 @@
+"""
+리스트 응답 필드 선택
+
+fields=a,b,c 로 내려줄 필드를, include=x,y 로 같이 내려줄 관계를 고른다.
+prisma-client-py 는 select 를 지원하지 않으므로 필드 선택은 조회 후 응답을 만들 때 적용되며,
+관계(include)는 요청한 것만 조회한다.
+"""
+
+from typing import Any, Iterable, List, Optional
+
+
+class InvalidFieldError(ValueError):
+    """
+    허용하지 않는 필드/관계 (400 으로 응답)
+    """
+
+
+def parse_names(
+    value: Optional[str],
+    allowed: Iterable[str],
+    default: Iterable[str],
+    param: str = "fields",
+) -> List[str]:
+    """
+    콤마로 구분된 이름 목록 파싱 (없으면 default)
+    """
+    if value is None:
+        return list(default)
+
+    allowed = set(allowed)
+    names = list(dict.fromkeys(x.strip() for x in value.split(",") if x.strip()))
+    unknown = [x for x in names if x not in allowed]
+    if unknown:
+        raise InvalidFieldError(
+            f"{param} 에 사용할 수 없는 이름입니다: {', '.join(unknown)}"
+        )
+    return names
+
+
+def project(item: Any, fields: Iterable[str]) -> dict:
+    """
+    조회 결과에서 고른 필드만 dict 로 추출
+    """
+    if isinstance(item, dict):
+        return {x: item.get(x) for x in fields}
+    return {x: getattr(item, x, None) for x in fields}
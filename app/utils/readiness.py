@@ -0,0 +1,115 @@
+import time
+from typing import Callable, Dict, List, Tuple
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver import Keys
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webelement import WebElement
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support.expected_conditions import presence_of_element_located
+
+# 셀렉터 매칭 개수를 확인하는 간격(초)
+POLL_INTERVAL = 0.1
+# 매칭 개수가 이 횟수만큼 연속으로 같으면 렌더링이 끝났다고 판단
+STABLE_ROUNDS = 2
+# 스크롤 후 새 요소가 붙기를 기다리는 시간(초)
+SCROLL_SETTLE = 1.0
+
+
+def get_locator(selector: str) -> Tuple[str, str]:
+    """
+    셀렉터가 / (그룹 기준 상대 경로는 ./) 로 시작하면 XPath, 그 외에는 CSS 셀렉터
+    """
+    if selector and (selector[0] == "/" or selector.startswith("./")):
+        return (By.XPATH, selector)
+    return (By.CSS_SELECTOR, selector)
+
+
+class stable_count_of_elements_located:
+    """
+    매칭된 요소 개수가 0보다 크고 rounds 번 연속으로 변하지 않으면 요소 목록 반환
+    """
+
+    def __init__(self, locator: Tuple[str, str], rounds: int = STABLE_ROUNDS):
+        self.locator = locator
+        self.rounds = rounds
+        self.last_count = -1
+        self.stable = 0
+
+    def __call__(self, driver):
+        elements = driver.find_elements(*self.locator)
+        count = len(elements)
+        if count and count == self.last_count:
+            self.stable += 1
+        else:
+            self.stable = 0
+        self.last_count = count
+        return elements if self.stable >= self.rounds else False
+
+
+def wait_stable(driver, locator: Tuple[str, str], timeout: float) -> List[WebElement]:
+    """
+    셀렉터 매칭 개수가 안정되는 즉시 반환
+    """
+    wait = WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL)
+    return wait.until(stable_count_of_elements_located(locator))
+
+
+def wait_scroll(driver, locator: Tuple[str, str], timeout: float) -> List[WebElement]:
+    """
+    무한 스크롤 / 지연 로딩 페이지용
+
+    매칭 개수가 더 이상 늘지 않을 때까지 페이지 끝으로 스크롤한다.
+    """
+    deadline = time.monotonic() + timeout
+    elements = wait_stable(driver, locator, timeout)
+
+    while time.monotonic() < deadline:
+        count = len(elements)
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        settle = min(SCROLL_SETTLE, max(deadline - time.monotonic(), POLL_INTERVAL))
+        try:
+            WebDriverWait(driver, settle, poll_frequency=POLL_INTERVAL).until(
+                lambda driver: len(driver.find_elements(*locator)) > count
+            )
+        except TimeoutException:
+            break
+        remaining = max(deadline - time.monotonic(), POLL_INTERVAL)
+        elements = wait_stable(driver, locator, remaining)
+
+    return driver.find_elements(*locator)
+
+
+def wait_delay(driver, locator: Tuple[str, str], timeout: float) -> List[WebElement]:
+    """
+    기존 방식: 고정 대기 후 페이지 끝으로 이동
+    """
+    wait = WebDriverWait(driver, timeout)
+    wait.until(
+        lambda driver: driver.execute_script("return document.readyState") == "complete"
+    )
+    time.sleep(1)
+
+    body = driver.find_element(By.TAG_NAME, "body")
+    body.send_keys(Keys.END)
+    time.sleep(1)
+
+    wait.until(presence_of_element_located(locator))
+    return driver.find_elements(*locator)
+
+
+STRATEGIES: Dict[str, Callable[..., List[WebElement]]] = {
+    "STABLE": wait_stable,
+    "SCROLL": wait_scroll,
+    "DELAY": wait_delay,
+}
+
+
+def wait_for_elements(
+    driver, selector: str, readiness: str, timeout: float
+) -> List[WebElement]:
+    """
+    스크래퍼에 설정된 준비 전략으로 셀렉터에 매칭되는 요소 대기
+    """
+    strategy = STRATEGIES.get(readiness, wait_stable)
+    return strategy(driver, get_locator(selector), timeout)
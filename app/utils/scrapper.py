@@ -1,88 +1,544 @@
 import json
-from time import sleep
-from typing import List
-
-from selenium import webdriver
-from selenium.webdriver import Keys
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support.expected_conditions import presence_of_element_located
+import asyncio
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
 
 from app.prisma import prisma
+from app.config import settings
 from app.models.scrapper import Scrapper
+from app.services.entity_cache import invalidate_entities, tag
+from app.utils.browser import BrowserPool, create_driver
+from app.utils.readiness import get_locator, wait_for_elements
+from app.utils.static import (
+    fetch_page,
+    head_page,
+    relative_xpath,
+    response_html,
+    select_grouped_texts,
+    select_texts,
+)
+from app.utils.fingerprint import (
+    Fingerprint,
+    conditional_headers,
+    make_fingerprint,
+    stored_fingerprint,
+)
+from app.utils.json_field import parse_json_list
+from app.utils.postprocessing import PostProcessingError, get_pipelines
+from app.utils import diff
 
 
-async def scrap_all_themes(scrappers: List[Scrapper]):
-    result = list()
+def element_text(element) -> str:
+    return str(element.text).replace("\n", " ").strip()
 
-    options = webdriver.ChromeOptions()
-    options.add_argument("--headless")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
 
-    driver = webdriver.Chrome(service=Service("app/chromedriver"), options=options)
-    wait = WebDriverWait(driver, 10)
+def scrap_theme_names(
+    driver, scrapper: Scrapper
+) -> Tuple[List[str], Optional[List[str]]]:
+    """
+    드라이버로 스크래퍼 URL 에 접속하여 (테마명 목록, 지점명 목록) 추출 (블로킹)
 
-    for scrapper in scrappers:
-        try:
-            driver.get(scrapper.url)
-            wait.until(presence_of_element_located((By.TAG_NAME, "body")))
-            wait.until(
-                lambda driver: driver.execute_script("return document.readyState")
-                == "complete"
+    groupSelector 가 있으면 그룹(지점)마다 branchSelector 로 지점명을, themeSelector 로
+    테마명을 찾는다. 그룹이 없으면 지점명 목록은 None 이다.
+    """
+    timeout = settings.scrapper_timeout
+    driver.set_page_load_timeout(timeout)
+    driver.get(scrapper.url)
+
+    if not scrapper.groupSelector:
+        scrapped_theme_els = wait_for_elements(
+            driver, scrapper.themeSelector, scrapper.readiness, timeout
+        )
+        return list(map(element_text, scrapped_theme_els)), None
+
+    names, branches = list(), list()
+    group_els = wait_for_elements(
+        driver, scrapper.groupSelector, scrapper.readiness, timeout
+    )
+    for group_el in group_els:
+        branch = ""
+        if scrapper.branchSelector:
+            branch_els = group_el.find_elements(
+                *get_locator(relative_xpath(scrapper.branchSelector))
             )
-            sleep(1)
+            branch = element_text(branch_els[0]) if branch_els else ""
+        theme_els = group_el.find_elements(
+            *get_locator(relative_xpath(scrapper.themeSelector))
+        )
+        for theme_el in theme_els:
+            names.append(element_text(theme_el))
+            branches.append(branch)
+    return names, branches
+
+
+class ScrapResult(NamedTuple):
+    names: List[str]
+    tier: str
+    # 그룹(지점)별로 스크랩한 경우 names 와 같은 길이의 지점명 목록
+    branches: Optional[List[str]] = None
+    fingerprint: Fingerprint = Fingerprint()
+    # 304 응답이라 페이지를 다시 읽지 않고 이전 스크랩 결과를 재사용했는지 여부
+    skipped: bool = False
+    # 페이지를 다시 읽었지만 테마 영역의 해시가 이전과 같은지 여부
+    unchanged: bool = False
+    # 이전 지표에서 가져온 테마명은 이미 후처리가 적용되어 있다
+    post_processed: bool = False
+
+
+def fetch_static_theme_names(
+    scrapper: Scrapper, use_fingerprint: bool = False
+) -> Optional[ScrapResult]:
+    """
+    브라우저 없이 정적 HTML 에서 테마명 목록 추출 (블로킹)
+
+    use_fingerprint 이면 조건부 요청을 보내고, 304 응답이면 이전 지표의 테마명 목록을
+    재사용한다(skipped). 다시 읽은 테마 영역의 해시가 이전과 같으면 unchanged 로 표시한다.
+    """
+    previous = stored_fingerprint(scrapper)
+    headers = conditional_headers(previous) if use_fingerprint else None
+    res = fetch_page(scrapper.url, settings.scrapper_timeout, headers)
+    if res.status_code == 304:
+        names = parse_json_list(scrapper.metric.scrappedThemes)
+        return ScrapResult(
+            names, "STATIC", None, previous, skipped=True, post_processed=True
+        )
+
+    content = response_html(res)
+    if scrapper.groupSelector:
+        names, branches = select_grouped_texts(
+            content,
+            scrapper.groupSelector,
+            scrapper.branchSelector,
+            scrapper.themeSelector,
+        )
+    else:
+        names, branches = select_texts(content, scrapper.themeSelector), None
+    if not names:
+        return None
+
+    fingerprint = make_fingerprint(res.headers, theme_region(names, branches))
+    unchanged = use_fingerprint and fingerprint.contentHash == previous.contentHash
+    return ScrapResult(names, "STATIC", branches, fingerprint, unchanged=unchanged)
+
+
+def theme_region(names: List[str], branches: Optional[List[str]]) -> List[str]:
+    """
+    지문을 만들 테마 영역 (지점별로 스크랩했으면 지점명 포함)
+    """
+    if branches is None:
+        return names
+    return [f"{branch}\t{name}" for branch, name in zip(branches, names)]
+
+
+def head_browser_page(
+    scrapper: Scrapper, use_fingerprint: bool = False
+) -> Tuple[Optional[ScrapResult], Mapping[str, str]]:
+    """
+    브라우저로 열기 전에 HEAD 요청으로 변경 여부 확인 (블로킹)
+
+    use_fingerprint 이면 조건부 요청을 보내고, 304 응답이면 이전 지표의 테마명 목록을
+    재사용하는 결과를 반환한다. 아니면 (None, 지문에 기록할 응답 헤더)를 반환한다.
+    JS 로 그리는 목록은 HTML 이 그대로여도 바뀔 수 있으므로 호출하는 쪽에서 최근에 브라우저로
+    그린 스크래퍼만 use_fingerprint 로 넘긴다 (rendered_recently).
+    """
+    previous = stored_fingerprint(scrapper)
+    headers = conditional_headers(previous) if use_fingerprint else None
+    res = head_page(scrapper.url, settings.scrapper_timeout, headers)
+    if res.status_code == 304:
+        names = parse_json_list(scrapper.metric.scrappedThemes)
+        return (
+            ScrapResult(
+                names, "BROWSER", None, previous, skipped=True, post_processed=True
+            ),
+            res.headers,
+        )
+    return None, res.headers
+
 
-            body = driver.find_element(By.TAG_NAME, "body")
-            body.send_keys(Keys.END)
-            sleep(1)
+def rendered_recently(scrapper: Scrapper) -> bool:
+    """
+    브라우저로 그린 테마 목록이 SCRAPPER_RENDER_MAX_AGE_HOURS 안에 있는지
+    """
+    if not scrapper.renderedAt:
+        return False
+    age = datetime.now(timezone.utc) - scrapper.renderedAt
+    return age < timedelta(hours=settings.scrapper_render_max_age_hours)
+
+
+def use_static_tier(scrapper: Scrapper) -> bool:
+    """
+    JS 전용으로 지정되었거나 이전에 정적 요청이 실패한 스크래퍼는 바로 브라우저 사용
+    """
+    return not scrapper.jsOnly and scrapper.fetchTier != "BROWSER"
+
+
+def use_fingerprint(scrapper: Scrapper) -> bool:
+    """
+    재사용할 이전 지표와 테마 영역 지문이 있을 때만 변경 감지로 건너뛸 수 있다
+    """
+    return bool(scrapper.contentHash) and scrapper.metric is not None
+
+
+async def run_browser_scrap(
+    scrapper: Scrapper,
+    pool: BrowserPool,
+    executor: ThreadPoolExecutor,
+    slots: asyncio.Semaphore,
+) -> Tuple[List[str], Optional[List[str]]]:
+    """
+    브라우저 자리가 날 때까지 기다린 뒤 스크랩
+
+    실행 중인 작업 수를 slots(풀 크기)로 제한하므로 타임아웃은 대기열에서 기다린 시간을 빼고
+    브라우저를 잡은 뒤부터 센다. 자리는 타임아웃이 아니라 스레드가 실제로 끝날 때 돌려준다
+    (멈출 수 없는 스레드가 브라우저를 잡고 있는 동안 다음 작업을 넣지 않는다).
+    """
+    loop = asyncio.get_running_loop()
+
+    def release(_):
+        try:
+            loop.call_soon_threadsafe(slots.release)
+        except RuntimeError:
+            # 이벤트 루프가 이미 닫힘
+            pass
+
+    await slots.acquire()
+    try:
+        future = executor.submit(pool.run, scrap_theme_names, scrapper)
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(release)
+
+    # 페이지 로드와 셀렉터 대기 각각에 타임아웃이 걸리므로 그 이상은 기다리지 않는다
+    return await asyncio.wait_for(
+        asyncio.wrap_future(future), timeout=settings.scrapper_timeout * 3
+    )
+
+
+async def scrap_themes(
+    scrapper: Scrapper,
+    pool: BrowserPool,
+    executor: ThreadPoolExecutor,
+    browser_slots: asyncio.Semaphore,
+    static_executor: Optional[ThreadPoolExecutor] = None,
+    skip_unchanged: bool = False,
+) -> ScrapResult:
+    """
+    이벤트 루프를 막지 않고 스크랩
+
+    정적 HTML 요청(STATIC)을 먼저 시도하고, 결과가 비어 있으면 브라우저 풀(BROWSER)로
+    다시 시도한다. skip_unchanged 이면 브라우저로 열기 전에 조건부 HEAD 요청을 보내서,
+    최근에 브라우저로 그린 적 있고 바뀌지 않은 페이지는 브라우저를 띄우지 않는다. 브라우저
+    단계의 실패는 예외로 전달된다.
+    """
+    loop = asyncio.get_running_loop()
+    fingerprinted = skip_unchanged and use_fingerprint(scrapper)
+
+    if use_static_tier(scrapper):
+        try:
+            result = await loop.run_in_executor(
+                static_executor, fetch_static_theme_names, scrapper, fingerprinted
+            )
+            if result:
+                return result
         except Exception as e:
-            print("[error]", e)
-            continue
-
-        # XPath
-        if scrapper.themeSelector and scrapper.themeSelector[0] == "/":
-            wait.until(presence_of_element_located((By.XPATH, scrapper.themeSelector)))
-            scrapped_theme_els = driver.find_elements(By.XPATH, scrapper.themeSelector)
-        # CSS
-        else:
-            wait.until(
-                presence_of_element_located((By.CSS_SELECTOR, scrapper.themeSelector))
+            print("[error]", scrapper.url, repr(e))
+
+    headers: Mapping[str, str] = dict()
+    if skip_unchanged:
+        try:
+            result, headers = await loop.run_in_executor(
+                static_executor,
+                head_browser_page,
+                scrapper,
+                fingerprinted and rendered_recently(scrapper),
             )
-            scrapped_theme_els = driver.find_elements(
-                By.CSS_SELECTOR, scrapper.themeSelector
+            if result:
+                return result
+        except Exception as e:
+            # HEAD 를 받지 않는 서버도 있으므로 그대로 브라우저로 연다
+            print("[error]", scrapper.url, repr(e))
+
+    names, branches = await run_browser_scrap(scrapper, pool, executor, browser_slots)
+    fingerprint = make_fingerprint(headers, theme_region(names, branches))
+    unchanged = (
+        fingerprinted
+        and fingerprint.contentHash == stored_fingerprint(scrapper).contentHash
+    )
+    return ScrapResult(names, "BROWSER", branches, fingerprint, unchanged=unchanged)
+
+
+async def record_scrap(scrapper: Scrapper, result: ScrapResult):
+    """
+    다음 실행을 위해 성공한 단계와 페이지 지문 기록
+
+    성공한 단계를 기록해 두면 다음 실행부터 실패한 단계를 건너뛴다. 브라우저로 다시 그렸으면
+    그린 시각을 남겨 HEAD 요청으로 건너뛸 수 있는 기간을 정한다.
+    """
+    data = dict()
+    if scrapper.fetchTier != result.tier:
+        data["fetchTier"] = result.tier
+    if result.tier == "BROWSER" and not result.skipped:
+        data["renderedAt"] = datetime.now(timezone.utc)
+    if stored_fingerprint(scrapper) != result.fingerprint:
+        data.update(result.fingerprint._asdict())
+    if data:
+        await prisma.scrapper.update(where={"id": scrapper.id}, data=data)
+
+
+async def iter_scrapped_themes(
+    scrappers: List[Scrapper],
+    pool: BrowserPool,
+) -> AsyncIterator[Tuple[Scrapper, Optional[ScrapResult]]]:
+    """
+    동시에 스크랩하고, 끝나는 순서대로 (스크래퍼, 스크랩 결과) 반환
+
+    이전 지표가 포함된 스크래퍼는 페이지가 바뀌지 않았으면 다시 스크랩하지 않는다.
+    스크랩에 실패한 스크래퍼는 결과 대신 None 을 반환한다. 중간에 그만 읽을 때는 aclose() 를
+    호출해야 남은 스크랩이 취소된다.
+    """
+    static_executor = ThreadPoolExecutor(
+        max_workers=settings.scrapper_static_concurrency
+    )
+    executor = ThreadPoolExecutor(max_workers=pool.size)
+    browser_slots = asyncio.Semaphore(pool.size)
+
+    async def scrap(scrapper: Scrapper):
+        try:
+            result = await scrap_themes(
+                scrapper,
+                pool,
+                executor,
+                browser_slots,
+                static_executor,
+                skip_unchanged=True,
             )
-        scrapped_theme_names = list(
-            map(lambda e: str(e.text).replace("\n", " ").strip(), scrapped_theme_els)
-        )
-        scrapped_theme_names.sort()
-
-        themes = await prisma.theme.find_many(where={"cafeId": scrapper.cafeId})
-        current_theme_names = list(map(lambda x: x.name, themes))
-        current_theme_names.sort()
-
-        different_theme_names = list()
-        for current_theme_name in current_theme_names:
-            if current_theme_name not in scrapped_theme_names:
-                different_theme_names.append(current_theme_name)
-        for scrapped_theme_name in scrapped_theme_names:
-            if scrapped_theme_name not in current_theme_names:
-                different_theme_names.append(scrapped_theme_name)
-        different_theme_names = list(set(different_theme_names))
-        different_theme_names.sort()
-
-        result.append(
-            {
-                "scrapperId": scrapper.id,
-                "currentThemes": json.dumps(current_theme_names),
-                "scrappedThemes": json.dumps(scrapped_theme_names),
-                "differentThemes": json.dumps(different_theme_names),
-                "status": "SOMETHING_WRONG"
-                if different_theme_names
-                else "NOTHING_WRONG",
-            }
+            return scrapper, result
+        except Exception as e:
+            print("[error]", scrapper.url, repr(e))
+            return scrapper, None
+
+    tasks = [asyncio.ensure_future(scrap(x)) for x in scrappers]
+    try:
+        for future in asyncio.as_completed(tasks):
+            yield await future
+    finally:
+        for task in tasks:
+            task.cancel()
+        # 타임아웃된 브라우저 작업의 스레드는 멈출 수 없으므로 기다리지 않는다
+        # (기다리면 이벤트 루프가 막힌다). 시작하지 않은 작업은 취소된다.
+        static_executor.shutdown(wait=False, cancel_futures=True)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+# API 프로세스에서 단일 스크랩 테스트에 공유하는 브라우저 풀
+browser_pool = BrowserPool(
+    settings.scrapper_test_pool_size,
+    partial(create_driver, settings.chromedriver_path),
+)
+browser_executor = ThreadPoolExecutor(max_workers=settings.scrapper_test_pool_size)
+browser_slots: Optional[asyncio.Semaphore] = None
+
+
+async def scrap_single_themes(scrapper: Scrapper) -> ScrapResult:
+    """
+    공유 브라우저 풀로 스크래퍼 하나를 스크랩
+    """
+    global browser_slots
+    # 이벤트 루프 안에서 처음 쓸 때 만든다
+    if browser_slots is None:
+        browser_slots = asyncio.Semaphore(settings.scrapper_test_pool_size)
+    result = await scrap_themes(scrapper, browser_pool, browser_executor, browser_slots)
+    await record_scrap(scrapper, result)
+    return result
+
+
+def close_browser_pool():
+    browser_executor.shutdown(wait=False)
+    browser_pool.close()
+
+
+def normalize_theme_name(name: str) -> str:
+    return diff.normalize_theme_name(
+        name,
+        ignore_spaces=settings.diff_ignore_spaces,
+        ignore_punctuation=settings.diff_ignore_punctuation,
+    )
+
+
+def is_cafe_branch(scrapper: Scrapper, branch: str) -> bool:
+    """
+    지점명이 스크래퍼에 연결된 카페 이름에 포함되는지 (예: '강남 2호점' / '비트포비아 강남2호점')
+    """
+    if not scrapper.cafe:
+        return True
+    branch = normalize_theme_name(branch)
+    cafe_name = normalize_theme_name(scrapper.cafe.name)
+    return branch in cafe_name or cafe_name in branch
+
+
+async def build_metric_data(scrapper: Scrapper, result: ScrapResult) -> dict:
+    """
+    스크랩한 테마명에 후처리를 적용하고 DB 테마명과 비교하여 지표 데이터 생성
+    """
+    scrapped_theme_names = result.names
+    if not result.post_processed:
+        pipelines = get_pipelines(scrapper)
+        scrapped_theme_names = pipelines.process(
+            result.names,
+            result.branches,
+            keep_branch=partial(is_cafe_branch, scrapper),
         )
+    scrapped_theme_names = sorted(scrapped_theme_names)
+
+    themes = await prisma.theme.find_many(where={"cafeId": scrapper.cafeId})
+    current_theme_names = sorted(map(lambda x: x.name, themes))
+
+    result = diff.diff_themes(
+        current_theme_names, scrapped_theme_names, normalize_theme_name
+    )
+    different_theme_names = result.different
+
+    return {
+        "currentThemes": json.dumps(current_theme_names),
+        "scrappedThemes": json.dumps(scrapped_theme_names),
+        "differentThemes": json.dumps(different_theme_names),
+        "addedThemes": json.dumps(result.added),
+        "removedThemes": json.dumps(result.removed),
+        "renamedThemes": json.dumps(result.renamed),
+        "status": "SOMETHING_WRONG" if different_theme_names else "NOTHING_WRONG",
+    }
+
+
+def metric_upsert_args(scrapper_id: str, data: dict) -> dict:
+    """
+    scrapperId 기준 지표 upsert 인자
+    """
+    data = {**data, "stale": False}
+    return {
+        "where": {"scrapperId": scrapper_id},
+        "data": {
+            "create": {**data, "scrapper": {"connect": {"id": scrapper_id}}},
+            "update": data,
+        },
+    }
+
+
+async def save_metrics(metrics: List[Tuple[str, dict]]):
+    """
+    스크래퍼별 지표를 한 트랜잭션에서 upsert 한 뒤 상세 조회 캐시 삭제
+
+    지표 상세에도 스크래퍼 태그가 붙어 있으므로 스크래퍼 태그로 둘 다 지워진다.
+    """
+    if not metrics:
+        return
+
+    async with prisma.batch_() as batcher:
+        for scrapper_id, data in metrics:
+            batcher.metric.upsert(**metric_upsert_args(scrapper_id, data))
+    await invalidate_entities(*(tag("scrapper", x) for x, _ in metrics))
+
+
+async def invalidate_scrap_results():
+    """
+    모든 스크래퍼/지표 상세 조회 캐시 삭제 (전체 스크랩은 모든 지표를 바꾼다)
+    """
+    scrappers = await prisma.query_raw("SELECT id FROM scrappers")
+    metrics = await prisma.query_raw("SELECT id FROM metrics")
+    await invalidate_entities(
+        *(tag("scrapper", x["id"]) for x in scrappers),
+        *(tag("metric", x["id"]) for x in metrics),
+    )
+
+
+async def scrap_all_themes(
+    scrappers: List[Scrapper],
+    on_progress: Optional[Callable[..., Awaitable[None]]] = None,
+) -> dict:
+    """
+    모든 스크래퍼를 스크랩하여 지표 생성
+
+    지표는 스크랩이 끝나는 대로 metric_batch_size 개씩 저장된다. 실행 시작 시 기존 지표는
+    모두 stale 로 표시되고, 이번 실행에서 갱신되지 못한 지표(스크랩 실패 등)는 stale 로 남는다.
+    변경 감지로 건너뛴(skipped, 304 응답) 스크래퍼와 다시 읽었지만 테마 영역이 같은
+    (unchanged) 스크래퍼도 현재 테마 목록과 다시 비교하여 지표를 갱신한다.
+    on_progress 가 주어지면 스크래퍼 하나가 끝날 때마다 처리/건너뜀/변경 없음/실패 개수로
+    호출된다.
+    """
+    pending = list()
+    processed = 0
+    skipped = 0
+    unchanged = 0
+    failed = 0
+
+    await prisma.metric.update_many(where={}, data={"stale": True})
+    await invalidate_scrap_results()
+
+    factory = partial(create_driver, settings.chromedriver_path)
+    try:
+        with BrowserPool(settings.scrapper_pool_size, factory) as pool:
+            scrapped = iter_scrapped_themes(scrappers, pool)
+            try:
+                async for scrapper, result in scrapped:
+                    processed += 1
+                    data = None
+                    if result is not None:
+                        await record_scrap(scrapper, result)
+                        try:
+                            data = await build_metric_data(scrapper, result)
+                        except PostProcessingError as e:
+                            # 검사 전에 저장된 잘못된 후처리 문법은 이 스크래퍼만 실패로 처리
+                            print("[error]", scrapper.url, repr(e))
+
+                    if data is None:
+                        failed += 1
+                        if on_progress:
+                            await on_progress(
+                                processed=processed,
+                                skipped=skipped,
+                                unchanged=unchanged,
+                                failed=failed,
+                            )
+                        continue
+
+                    if result.skipped:
+                        skipped += 1
+                    elif result.unchanged:
+                        unchanged += 1
+                    pending.append((scrapper.id, data))
+                    if len(pending) >= settings.metric_batch_size:
+                        await save_metrics(pending)
+                        pending = list()
+
+                    if on_progress:
+                        await on_progress(
+                            processed=processed,
+                            skipped=skipped,
+                            unchanged=unchanged,
+                            failed=failed,
+                        )
+            finally:
+                # JobCanceled 등으로 중간에 빠져나와도 남은 스크랩을 취소
+                await scrapped.aclose()
+    finally:
+        # 중간에 취소되거나 실패해도 이미 스크랩한 결과는 저장
+        await save_metrics(pending)
 
-    await prisma.metric.delete_many()
-    await prisma.metric.create_many(data=result)
+    return {
+        "processed": processed,
+        "scrapped": processed - skipped - failed,
+        "skipped": skipped,
+        "unchanged": unchanged,
+        "failed": failed,
+    }
@@ -0,0 +1,204 @@
+"""
+카페/테마 이름 검색용 메모리 역색인
+
+이름을 정규화(NFKC, 대소문자, 띄어쓰기/문장부호 무시)한 뒤 글자 2-gram 으로 색인하고,
+한글 초성 문자열도 따로 색인한다. 검색 결과는 다음 순서로 점수를 매긴다.
+
+    완전 일치 > 앞부분 일치 > 부분 일치 > 오타 허용(2-gram 유사도) 일치
+
+검색어가 초성으로만 이루어져 있으면(예: ㅂㅌㅊ) 초성 문자열에서 찾는다.
+"""
+
+import heapq
+import unicodedata
+from collections import Counter, OrderedDict, defaultdict
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.utils.diff import normalize_theme_name
+
+# 한글 음절의 초성 (호환 자모)
+CHOSUNG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+CHOSUNG_SET = frozenset(CHOSUNG)
+HANGUL_START = 0xAC00
+HANGUL_END = 0xD7A3
+# 초성 하나에 해당하는 음절 수 (중성 21 x 종성 28)
+SYLLABLES_PER_CHOSUNG = 588
+
+# NFKC 는 호환 자모(ㄱ)를 첫소리 자모(ᄀ)로 바꾸므로 다시 호환 자모로 되돌린다
+JAMO_TO_CHOSUNG = str.maketrans({unicodedata.normalize("NFKC", c): c for c in CHOSUNG})
+
+# 오타 허용 검색에서 인정하는 최소 2-gram 유사도 (Dice 계수)
+FUZZY_THRESHOLD = 0.5
+
+EMPTY: Set[str] = frozenset()
+# 보관할 최근 검색 결과 수
+RESULTS_CACHE_SIZE = 256
+
+SCORE_EXACT = 4.0
+SCORE_PREFIX = 3.0
+SCORE_CONTAINS = 2.0
+
+
+def normalize(text: str) -> str:
+    return normalize_theme_name(text or "").translate(JAMO_TO_CHOSUNG)
+
+
+def to_chosung(text: str) -> str:
+    """
+    한글 음절은 초성으로, 나머지 글자는 그대로
+    """
+    result = list()
+    for c in text:
+        code = ord(c)
+        if HANGUL_START <= code <= HANGUL_END:
+            result.append(CHOSUNG[(code - HANGUL_START) // SYLLABLES_PER_CHOSUNG])
+        else:
+            result.append(c)
+    return "".join(result)
+
+
+def is_chosung_query(text: str) -> bool:
+    return bool(text) and all(c in CHOSUNG_SET for c in text)
+
+
+def ngrams(text: str) -> Set[str]:
+    """
+    글자 2-gram (한 글자면 그 글자)
+    """
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i : i + 2] for i in range(len(text) - 1)}
+
+
+class SearchIndex:
+    def __init__(self):
+        # id -> 정규화된 이름들
+        self.docs: Dict[str, Tuple[str, ...]] = dict()
+        # id -> 초성 문자열들
+        self.chosung: Dict[str, Tuple[str, ...]] = dict()
+        self.postings: Dict[str, Set[str]] = defaultdict(set)
+        self.chosung_postings: Dict[str, Set[str]] = defaultdict(set)
+        # 최근 검색 결과 (색인이 바뀌면 비움)
+        self.results: "OrderedDict[tuple, List[str]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def add(self, id: str, texts: Iterable[str]):
+        """
+        문서 추가 (이미 있으면 교체)
+        """
+        self.remove(id)
+        self.results.clear()
+        names = tuple(dict.fromkeys(x for x in map(normalize, texts) if x))
+        if not names:
+            return
+        chosung = tuple(dict.fromkeys(to_chosung(x) for x in names))
+
+        self.docs[id] = names
+        self.chosung[id] = chosung
+        for name in names:
+            # 한 글자 검색어도 찾을 수 있도록 글자 단위도 함께 색인
+            for gram in ngrams(name) | set(name):
+                self.postings[gram].add(id)
+        for name in chosung:
+            for gram in ngrams(name) | set(name):
+                self.chosung_postings[gram].add(id)
+
+    def remove(self, id: str):
+        self.results.clear()
+        names = self.docs.pop(id, ())
+        chosung = self.chosung.pop(id, ())
+        for postings, texts in (
+            (self.postings, names),
+            (self.chosung_postings, chosung),
+        ):
+            for text in texts:
+                for gram in ngrams(text) | set(text):
+                    ids = postings.get(gram)
+                    if ids is not None:
+                        ids.discard(id)
+                        if not ids:
+                            del postings[gram]
+
+    def clear(self):
+        self.results.clear()
+        self.docs.clear()
+        self.chosung.clear()
+        self.postings.clear()
+        self.chosung_postings.clear()
+
+    def search(
+        self, query: str, limit: Optional[int] = 100, fuzzy: bool = True
+    ) -> List[str]:
+        """
+        점수가 높은 순서로 문서 id 반환 (limit 이 None 이면 맞는 문서 전부)
+        """
+        key = (query, limit, fuzzy)
+        ids = self.results.get(key)
+        if ids is None:
+            ids = [id for id, _ in self.search_scored(query, limit, fuzzy)]
+            self.results[key] = ids
+            if len(self.results) > RESULTS_CACHE_SIZE:
+                self.results.popitem(last=False)
+        else:
+            self.results.move_to_end(key)
+        return list(ids)
+
+    def search_scored(
+        self, query: str, limit: Optional[int] = 100, fuzzy: bool = True
+    ) -> List[Tuple[str, float]]:
+        query = normalize(query)
+        if not query:
+            return []
+        if limit is None:
+            limit = len(self.docs)
+
+        if is_chosung_query(query):
+            docs, postings = self.chosung, self.chosung_postings
+        else:
+            docs, postings = self.docs, self.postings
+
+        grams = ngrams(query)
+        posting_sets = sorted((postings.get(x, EMPTY) for x in grams), key=len)
+
+        # 검색어의 모든 2-gram 을 가진 문서만 일치 후보
+        candidates = posting_sets[0].intersection(*posting_sets[1:])
+        ranked = list()
+        for id in candidates:
+            best = 0.0
+            for name in docs[id]:
+                if name == query:
+                    best = SCORE_EXACT
+                    break
+                pos = name.find(query)
+                if pos < 0:
+                    continue
+                base = SCORE_PREFIX if pos == 0 else SCORE_CONTAINS
+                best = max(best, base + len(query) / len(name))
+            if best:
+                ranked.append((-best, id))
+
+        if fuzzy and len(query) > 1 and len(ranked) < limit:
+            ranked.extend(self.fuzzy_scores(grams, posting_sets, docs, candidates))
+
+        return [(id, -score) for score, id in heapq.nsmallest(limit, ranked)]
+
+    def fuzzy_scores(self, grams, posting_sets, docs, exclude) -> List[tuple]:
+        """
+        2-gram 이 충분히 겹치는 문서 (Dice 계수). (-유사도, id) 목록
+        """
+        hits = Counter(chain.from_iterable(posting_sets))
+        # 이름 길이와 상관없이 유사도 기준을 넘을 수 없는 문서는 건너뜀
+        min_hits = FUZZY_THRESHOLD * len(grams) / 2
+        scores = list()
+        for id, hit in hits.items():
+            if hit < min_hits or id in exclude:
+                continue
+            similarity = max(
+                2 * hit / (len(grams) + len(ngrams(name))) for name in docs[id]
+            )
+            if similarity >= FUZZY_THRESHOLD:
+                scores.append((-similarity, id))
+        return scores
@@ -0,0 +1,50 @@
+"""
+리스트 응답 직렬화
+
+find_many 결과는 이미 검증된 prisma 모델이므로, response_model 로 다시 검증/복사하지 않고
+orjson 이 바로 인코딩할 수 있는 dict/list 로 바꿔서 응답한다. datetime, enum 은 orjson 이
+처리한다. STRICT_RESPONSES 를 켜면 기존처럼 FastAPI 가 response_model 로 검증한다 (개발용).
+"""
+
+from typing import Any, Iterable
+
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+from app.config import settings
+from app.utils.json_field import load_json
+
+# json.dumps 로 저장되어 문자열로 읽힐 수 있는 Json 컬럼
+JSON_FIELDS = ("images", "openingHours")
+
+
+def to_jsonable(value: Any, json_fields: Iterable[str] = JSON_FIELDS) -> Any:
+    """
+    pydantic 모델을 검증 없이 dict 로 변환 (중첩 포함)
+    """
+    json_fields = frozenset(json_fields)
+
+    def convert(value: Any) -> Any:
+        if isinstance(value, BaseModel):
+            value = value.__dict__
+        if isinstance(value, dict):
+            result = dict()
+            for key, item in value.items():
+                if key in json_fields and isinstance(item, (str, bytes)):
+                    item = load_json(item)
+                result[key] = convert(item)
+            return result
+        if isinstance(value, (list, tuple)):
+            return [convert(x) for x in value]
+        return value
+
+    return convert(value)
+
+
+def fast_response(content: Any) -> Any:
+    """
+    검증 없이 바로 인코딩하는 응답 (STRICT_RESPONSES 이면 content 를 그대로 반환)
+    """
+    if settings.strict_responses:
+        return content
+    return ORJSONResponse(to_jsonable(content))
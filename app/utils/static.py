@@ -0,0 +1,141 @@
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from bs4 import BeautifulSoup, UnicodeDammit
+from lxml import html as lxml_html
+
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/106.0.0.0 Safari/537.36"
+    ),
+    "Accept-Language": "ko-KR,ko;q=0.9",
+}
+
+
+def clean_text(text: str) -> str:
+    """
+    브라우저의 element.text 와 비슷하게 공백/개행을 하나의 공백으로 정리
+    """
+    return " ".join(str(text).split())
+
+
+def decode_html(content: bytes) -> str:
+    """
+    meta 태그 등으로 인코딩을 추정하여 디코딩 (EUC-KR 페이지 대응)
+    """
+    return UnicodeDammit(content, is_html=True).unicode_markup or ""
+
+
+def fetch_page(
+    url: str, timeout: float, headers: Optional[Dict[str, str]] = None
+) -> requests.Response:
+    """
+    브라우저 없이 페이지 요청. 조건부 요청의 304 응답은 그대로 반환한다.
+    """
+    res = requests.get(url, headers={**HEADERS, **(headers or {})}, timeout=timeout)
+    if res.status_code != 304:
+        res.raise_for_status()
+    return res
+
+
+def head_page(
+    url: str, timeout: float, headers: Optional[Dict[str, str]] = None
+) -> requests.Response:
+    """
+    본문 없이 응답 헤더만 요청. 조건부 요청의 304 응답은 그대로 반환한다.
+    """
+    res = requests.head(
+        url,
+        headers={**HEADERS, **(headers or {})},
+        timeout=timeout,
+        allow_redirects=True,
+    )
+    if res.status_code != 304:
+        res.raise_for_status()
+    return res
+
+
+def response_html(res: requests.Response) -> str:
+    if "charset" in res.headers.get("content-type", "").lower():
+        return res.text
+    return decode_html(res.content)
+
+
+def select_texts(content: str, selector: str) -> List[str]:
+    """
+    정적 HTML 에서 셀렉터(XPath 또는 CSS)에 매칭되는 텍스트 목록 추출
+    """
+    if isinstance(content, bytes):
+        content = decode_html(content)
+    if not content.strip() or not selector:
+        return []
+
+    # XPath
+    if is_xpath(selector):
+        return xpath_texts(lxml_html.fromstring(content), selector)
+    # CSS
+    return css_texts(BeautifulSoup(content, "lxml"), selector)
+
+
+def is_xpath(selector: str) -> bool:
+    return bool(selector) and selector[0] == "/"
+
+
+def relative_xpath(selector: str) -> str:
+    """
+    그룹 요소 기준으로 찾도록 / 로 시작하는 XPath 를 상대 경로로 변환
+    """
+    return "." + selector if is_xpath(selector) else selector
+
+
+def xpath_texts(root, selector: str) -> List[str]:
+    matches = root.xpath(selector)
+    if not isinstance(matches, list):
+        matches = [matches]
+    texts = [
+        x.text_content() if hasattr(x, "text_content") else str(x) for x in matches
+    ]
+    return [x for x in map(clean_text, texts) if x]
+
+
+def css_texts(root, selector: str) -> List[str]:
+    texts = [x.get_text() for x in root.select(selector)]
+    return [x for x in map(clean_text, texts) if x]
+
+
+def select_grouped_texts(
+    content: str, group_selector: str, branch_selector: str, theme_selector: str
+) -> Tuple[List[str], List[str]]:
+    """
+    지점(그룹)별로 테마명 추출하여 (테마명 목록, 같은 길이의 지점명 목록) 반환
+
+    그룹 안의 지점/테마 셀렉터는 그룹 요소 기준으로 찾으며, 세 셀렉터는 모두 XPath 이거나
+    모두 CSS 셀렉터여야 한다.
+    """
+    if isinstance(content, bytes):
+        content = decode_html(content)
+    if not content.strip() or not group_selector or not theme_selector:
+        return [], []
+
+    selectors = [x for x in (group_selector, branch_selector, theme_selector) if x]
+    if len({is_xpath(x) for x in selectors}) > 1:
+        raise ValueError(
+            "groupSelector, branchSelector, themeSelector 의 종류가 다릅니다"
+        )
+
+    names, branches = list(), list()
+    if is_xpath(group_selector):
+        groups = lxml_html.fromstring(content).xpath(group_selector)
+        select = lambda group, selector: xpath_texts(group, relative_xpath(selector))
+    else:
+        groups = BeautifulSoup(content, "lxml").select(group_selector)
+        select = css_texts
+
+    for group in groups:
+        branch = select(group, branch_selector) if branch_selector else []
+        branch = branch[0] if branch else ""
+        for name in select(group, theme_selector):
+            names.append(name)
+            branches.append(branch)
+    return names, branches
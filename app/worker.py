@@ -0,0 +1,149 @@
+"""
+작업 큐 워커
+
+API 프로세스와 별도로 실행하여 jobs 테이블에 등록된 작업을 처리한다.
+
+    $ python -m app.worker
+"""
+
+import json
+import asyncio
+import traceback
+from typing import Awaitable, Callable, Dict
+
+from prisma import models
+
+from app.prisma import prisma
+from app.config import settings
+from app.services.jobs import (
+    JOB_DELETE_OBJECTS,
+    JOB_IMAGE_GC,
+    JOB_SCRAP_ALL_THEMES,
+    JobCanceled,
+    claim_next_job,
+    fail_job,
+    finish_job,
+    keep_job_alive,
+    requeue_stale_jobs,
+    update_job_progress,
+)
+from app.services.image_gc import referenced_keys, remove_unreferenced_sources
+from app.services.storage import collect_garbage, delete_keys, get_s3_client
+from app.utils.json_field import parse_json_object
+from app.utils.scrapper import scrap_all_themes
+
+
+async def run_scrap_all_themes(job: models.Job):
+    scrappers = await prisma.scrapper.find_many(
+        where={"status": "PUBLISHED", "cafeId": {"not": None}},
+        include={"cafe": True, "metric": True},
+    )
+    await update_job_progress(job.id, total=len(scrappers))
+
+    async def on_progress(**progress):
+        await update_job_progress(job.id, **progress)
+
+    return await scrap_all_themes(scrappers, on_progress=on_progress)
+
+
+async def run_delete_objects(job: models.Job):
+    """
+    S3 객체 일괄 삭제. 실패한 키만 남겨서 재시도한다.
+    """
+    keys = parse_json_object(job.payload).get("keys", [])
+    await update_job_progress(job.id, total=len(keys))
+
+    loop = asyncio.get_running_loop()
+    deleted, errors = await loop.run_in_executor(
+        None, delete_keys, get_s3_client(), keys
+    )
+    await update_job_progress(job.id, processed=deleted, failed=len(errors))
+    if errors:
+        failed_keys = [x["Key"] for x in errors]
+        await update_job_progress(job.id, payload=json.dumps({"keys": failed_keys}))
+        raise RuntimeError(f"{len(errors)}개 객체 삭제 실패: {errors[:5]}")
+    return {"deleted": deleted}
+
+
+async def run_image_gc(job: models.Job):
+    """
+    참조되지 않는 이미지 정리
+    """
+    payload = parse_json_object(job.payload)
+    dry_run = payload.get("dryRun", True)
+    referenced = await referenced_keys()
+    removed_sources = 0
+    if not dry_run:
+        # 지울 객체를 가리키는 외부 URL 색인을 먼저 지워서 그 사이 가져오기가 지워질 키를
+        # 재사용하지 않게 한다
+        removed_sources = await remove_unreferenced_sources(referenced)
+
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(
+        None,
+        collect_garbage,
+        get_s3_client(),
+        referenced,
+        payload.get("prefixes") or settings.image_gc_prefixes,
+        payload.get("graceHours", settings.image_gc_grace_hours),
+        dry_run,
+    )
+    result["referenced"] = len(referenced)
+    if not dry_run:
+        result["removedSources"] = removed_sources
+    await update_job_progress(
+        job.id,
+        total=result["scanned"],
+        processed=result["deleted"],
+        failed=len(result["errors"]),
+    )
+    return result
+
+
+HANDLERS: Dict[str, Callable[[models.Job], Awaitable]] = {
+    JOB_SCRAP_ALL_THEMES: run_scrap_all_themes,
+    JOB_DELETE_OBJECTS: run_delete_objects,
+    JOB_IMAGE_GC: run_image_gc,
+}
+
+
+async def run_job(job: models.Job):
+    handler = HANDLERS.get(job.type)
+    if not handler:
+        await fail_job(job, f"Unknown job type: {job.type}")
+        return
+
+    print("[job]", job.type, job.id, f"attempt {job.attempts}")
+    heartbeat = asyncio.ensure_future(keep_job_alive(job.id))
+    try:
+        result = await handler(job)
+    except JobCanceled:
+        print("[job] canceled", job.id)
+        return
+    except Exception:
+        error = traceback.format_exc()
+        print("[error]", error)
+        await fail_job(job, error)
+        return
+    finally:
+        heartbeat.cancel()
+    await finish_job(job.id, result)
+    print("[job] done", job.id)
+
+
+async def main():
+    await prisma.connect()
+    try:
+        while True:
+            await requeue_stale_jobs()
+            job = await claim_next_job()
+            if not job:
+                await asyncio.sleep(settings.worker_poll_interval)
+                continue
+            await run_job(job)
+    finally:
+        await prisma.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
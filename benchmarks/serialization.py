@@ -0,0 +1,180 @@
+"""
+리스트 응답 직렬화 벤치마크
+
+100건짜리 테마 리스트 한 페이지를 응답 바이트로 만드는 데 드는 CPU 시간을 비교한다.
+
+    before  response_model(ThemeListRes 와 같은 구조)로 다시 검증한 뒤 jsonable_encoder
+            + orjson (FastAPI 0.70 의 serialize_response 경로)
+    after   to_jsonable + orjson (fast_response 경로)
+
+    $ python -m benchmarks.serialization
+"""
+
+import os
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+os.environ.setdefault("app_env", "benchmark")
+os.environ.setdefault("aws_region", "ap-northeast-2")
+os.environ.setdefault("aws_user_pool_id", "benchmark")
+os.environ.setdefault("aws_app_client_id", "benchmark")
+
+import orjson
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from pydantic import BaseModel
+
+from app.utils.serialization import to_jsonable
+
+ROWS = 100
+ROUNDS = 200
+
+
+class OpeningHours(BaseModel):
+    day: str
+    openTime: str
+    closeTime: str
+
+
+class Cafe(BaseModel):
+    id: str
+    naverMapId: str
+    areaA: str
+    areaB: str
+    name: str
+    intro: Optional[str]
+    addressLine: str
+    lat: float
+    lng: float
+    images: Optional[List[str]]
+    website: str
+    tel: str
+    openingHours: Optional[List[OpeningHours]]
+    reviewsRating: float
+    reviewsCount: int
+    view: int
+    status: str
+    createdAt: datetime
+    updatedAt: datetime
+
+
+class Genre(BaseModel):
+    id: str
+    createdAt: datetime
+    updatedAt: datetime
+
+
+class Theme(BaseModel):
+    id: str
+    cafeId: str
+    name: str
+    displayName: str
+    intro: str
+    thumbnail: str
+    price: int
+    during: int
+    minPerson: int
+    maxPerson: int
+    level: float
+    status: str
+    createdAt: datetime
+    updatedAt: datetime
+    cafe: Optional[Cafe]
+    genre: Optional[List[Genre]]
+
+
+class ThemeListRes(BaseModel):
+    total: Optional[int]
+    items: List[Theme]
+    nextCursor: Optional[str]
+
+
+def make_page() -> dict:
+    now = datetime.now(timezone.utc)
+    cafe = Cafe(
+        id="cafe",
+        naverMapId="1234",
+        areaA="서울",
+        areaB="강남구",
+        name="방탈출 카페",
+        intro="소개 " * 200,
+        addressLine="서울 강남구 테헤란로 1",
+        lat=37.5,
+        lng=127.0,
+        images=[f"/cafes/{i}.webp" for i in range(10)],
+        website="https://example.com",
+        tel="02-000-0000",
+        openingHours=[
+            OpeningHours(day=day, openTime="10:00", closeTime="22:00")
+            for day in "월화수목금토일"
+        ],
+        reviewsRating=4.5,
+        reviewsCount=10,
+        view=100,
+        status="PUBLISHED",
+        createdAt=now,
+        updatedAt=now,
+    )
+    genre = [Genre(id=x, createdAt=now, updatedAt=now) for x in ("공포", "추리")]
+    items = [
+        Theme(
+            id=f"theme-{i}",
+            cafeId="cafe",
+            name=f"테마 {i}",
+            displayName=f"테마 {i}",
+            intro="테마 소개 " * 50,
+            thumbnail=f"/themes/{i}.webp",
+            price=22000,
+            during=60,
+            minPerson=2,
+            maxPerson=4,
+            level=3.5,
+            status="PUBLISHED",
+            createdAt=now,
+            updatedAt=now,
+            cafe=cafe,
+            genre=genre,
+        )
+        for i in range(ROWS)
+    ]
+    return {"total": 1000, "items": items, "nextCursor": None}
+
+
+async def before(field, page) -> bytes:
+    content = await serialize_response(field=field, response_content=page)
+    return orjson.dumps(content)
+
+
+def after(page) -> bytes:
+    return orjson.dumps(to_jsonable(page))
+
+
+def measure(fn) -> float:
+    start = time.process_time()
+    for _ in range(ROUNDS):
+        fn()
+    return (time.process_time() - start) / ROUNDS * 1000
+
+
+def main():
+    import asyncio
+
+    page = make_page()
+    field = create_response_field(name="response", type_=ThemeListRes)
+    loop = asyncio.new_event_loop()
+
+    assert orjson.loads(loop.run_until_complete(before(field, page))) == orjson.loads(
+        after(page)
+    )
+
+    before_ms = measure(lambda: loop.run_until_complete(before(field, page)))
+    after_ms = measure(lambda: after(page))
+    print(f"rows per page : {ROWS}")
+    print(f"before        : {before_ms:.2f} ms CPU / request")
+    print(f"after         : {after_ms:.2f} ms CPU / request")
+    print(f"speedup       : {before_ms / after_ms:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+테마 수정 동시성 벤치마크
+
+관리자 여러 명이 같은 테마의 장르를 동시에 수정할 때 요청 하나의 지연 시간과, 수정 중에
+장르가 비어 보인 횟수를 비교한다. 모든 수정은 장르를 1개 이상 넣으므로 비어 보이면 안 된다.
+
+    before  장르 초기화(set: []) 후 필드 수정 + connect (update 두 번)
+    after   필드 수정 + 바뀐 장르 연결만 DELETE/INSERT IGNORE (batch_ 트랜잭션 한 번)
+
+DATABASE_URL 의 DB 를 사용하며, 끝나면 테마의 장르를 원래대로 되돌린다.
+
+    $ python -m benchmarks.theme_update [테마 id]
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+from typing import List
+
+os.environ.setdefault("app_env", "benchmark")
+os.environ.setdefault("aws_region", "ap-northeast-2")
+os.environ.setdefault("aws_user_pool_id", "benchmark")
+os.environ.setdefault("aws_app_client_id", "benchmark")
+
+from app.prisma import prisma
+from app.services.genres import link_theme_genres
+
+CONCURRENCY = 8
+EDITS = 200
+# 장르 연결을 확인하는 간격 (초)
+WATCH_INTERVAL = 0.002
+
+
+async def before(theme, genre_ids: List[str]):
+    await prisma.theme.update(
+        where={"id": theme.id},
+        data={"genre": {"set": []}},
+    )
+    await prisma.theme.update(
+        where={"id": theme.id},
+        data={
+            "name": theme.name,
+            "genre": {"connect": [{"id": x} for x in genre_ids]},
+        },
+    )
+
+
+async def after(theme, genre_ids: List[str]):
+    async with prisma.batch_() as batcher:
+        batcher.theme.update(where={"id": theme.id}, data={"name": theme.name})
+        link_theme_genres(batcher, theme.id, genre_ids)
+
+
+async def watch(theme_id: str, stop: asyncio.Event) -> int:
+    """
+    장르가 비어 보인 횟수
+    """
+    empty = 0
+    while not stop.is_set():
+        rows = await prisma.query_raw(
+            "SELECT COUNT(*) AS count FROM _GenreToTheme WHERE B = ?", theme_id
+        )
+        if int(rows[0]["count"]) == 0:
+            empty += 1
+        await asyncio.sleep(WATCH_INTERVAL)
+    return empty
+
+
+async def run(name: str, edit, theme, genres: List[str]):
+    random.seed(0)
+    edits = [
+        random.sample(genres, random.randint(1, len(genres))) for _ in range(EDITS)
+    ]
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies = list()
+
+    async def one(genre_ids):
+        async with semaphore:
+            start = time.perf_counter()
+            await edit(theme, genre_ids)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    stop = asyncio.Event()
+    watcher = asyncio.create_task(watch(theme.id, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(one(x) for x in edits))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    empty = await watcher
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[int(len(latencies) * 0.95)]
+    print(
+        f"{name:7} p50 {p50:7.2f} ms  p95 {p95:7.2f} ms  max {latencies[-1]:7.2f} ms"
+        f"  {EDITS / elapsed:7.1f} edits/s  empty genre seen {empty}"
+    )
+
+
+async def main():
+    await prisma.connect()
+    try:
+        if len(sys.argv) > 1:
+            theme = await prisma.theme.find_unique(
+                where={"id": sys.argv[1]}, include={"genre": True}
+            )
+        else:
+            theme = await prisma.theme.find_first(include={"genre": True})
+        genres = [x.id for x in await prisma.genre.find_many(take=4)]
+        if not theme or len(genres) < 2:
+            print("테마 1개와 장르 2개 이상이 필요합니다")
+            return
+
+        original = [x.id for x in theme.genre or []]
+        print(f"theme {theme.id}, {EDITS} edits, concurrency {CONCURRENCY}")
+        try:
+            await run("before", before, theme, genres)
+            await run("after", after, theme, genres)
+        finally:
+            async with prisma.batch_() as batcher:
+                link_theme_genres(batcher, theme.id, original)
+    finally:
+        await prisma.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,7 @@
+import os
+
+# app.config 를 읽는 모듈을 테스트할 때 필요한 설정 (AWS 에는 요청하지 않는다)
+os.environ.setdefault("app_env", "test")
+os.environ.setdefault("aws_region", "ap-northeast-2")
+os.environ.setdefault("aws_user_pool_id", "test")
+os.environ.setdefault("aws_app_client_id", "test")
@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from app.utils.browser import BrowserPool
+
+
+class FakeDriver:
+    def __init__(self):
+        self.closed = False
+
+    def quit(self):
+        self.closed = True
+
+
+def test_reuses_idle_driver():
+    created = list()
+
+    def factory():
+        created.append(FakeDriver())
+        return created[-1]
+
+    with BrowserPool(2, factory) as pool:
+        first = pool.run(lambda driver: driver)
+        second = pool.run(lambda driver: driver)
+
+    assert first is second
+    assert len(created) == 1
+    assert first.closed
+
+
+def test_discards_broken_driver():
+    created = list()
+
+    def factory():
+        created.append(FakeDriver())
+        return created[-1]
+
+    def broken(driver):
+        raise WebDriverException("crashed")
+
+    def timeout(driver):
+        raise TimeoutException("slow")
+
+    pool = BrowserPool(1, factory)
+    with pytest.raises(WebDriverException):
+        pool.run(broken)
+    assert created[0].closed
+
+    with pytest.raises(TimeoutException):
+        pool.run(timeout)
+    assert not created[1].closed
+    assert pool.run(lambda driver: driver) is created[1]
+
+
+def test_bounds_concurrent_drivers():
+    active = list()
+    peak = list()
+    lock = threading.Lock()
+    barrier = threading.Event()
+
+    def work(driver):
+        with lock:
+            active.append(driver)
+            peak.append(len(active))
+        barrier.wait(0.05)
+        with lock:
+            active.remove(driver)
+
+    pool = BrowserPool(2, FakeDriver)
+    threads = [threading.Thread(target=pool.run, args=(work,)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(peak) <= 2
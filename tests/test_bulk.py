@@ -0,0 +1,55 @@
+import asyncio
+
+from app.utils.bulk import BulkFormat, iter_batches, iter_rows
+
+
+async def chunks(data: bytes, size: int = 7):
+    for i in range(0, len(data), size):
+        yield data[i : i + size]
+
+
+def read_rows(data: bytes, format: BulkFormat, **kwargs) -> list:
+    async def collect():
+        return [x async for x in iter_rows(chunks(data), format, **kwargs)]
+
+    return asyncio.run(collect())
+
+
+def test_ndjson_rows_and_errors():
+    data = '{"name": "비밀의 방"}\n\n[1]\n{"name": \n{"name": "인형"}'.encode()
+    rows = read_rows(data, BulkFormat.NDJSON)
+    assert [(x.line, x.data) for x in rows if x.data] == [
+        (1, {"name": "비밀의 방"}),
+        (5, {"name": "인형"}),
+    ]
+    assert [x.line for x in rows if x.error] == [3, 4]
+
+
+def test_csv_rows():
+    data = (
+        "\ufeffname,intro,genre,price\r\n"
+        '비밀의 방,"첫 줄\n둘째 줄",공포|추리,22000\r\n'
+        '인형,,,\r\n'
+        "한 칸\r\n"
+    ).encode()
+    rows = read_rows(data, BulkFormat.CSV, list_fields=("genre",))
+    assert rows[0].line == 2
+    assert rows[0].data == {
+        "name": "비밀의 방",
+        "intro": "첫 줄\n둘째 줄",
+        "genre": ["공포", "추리"],
+        "price": "22000",
+    }
+    assert rows[1].data == {"name": "인형"}
+    assert rows[2].line == 5 and rows[2].error
+
+
+def test_iter_batches():
+    async def numbers():
+        for i in range(5):
+            yield i
+
+    async def collect():
+        return [x async for x in iter_batches(numbers(), 2)]
+
+    assert asyncio.run(collect()) == [[0, 1], [2, 3], [4]]
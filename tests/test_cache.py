@@ -0,0 +1,35 @@
+from app.utils.cache import TaggedCache
+
+
+def test_invalidate_tags():
+    cache = TaggedCache(ttl=60)
+    cache.set("cafe:1", {"id": "1"}, tags=["cafe:1", "theme:a", "theme:b"])
+    cache.set("theme:a", {"id": "a"}, tags=["theme:a", "cafe:1"])
+    cache.set("cafe:2", {"id": "2"}, tags=["cafe:2"])
+
+    assert cache.invalidate_tags("theme:b") == 1
+    assert cache.get("cafe:1") is None
+    assert cache.get("theme:a") == {"id": "a"}
+
+    cache.invalidate_tags("cafe:1")
+    assert cache.get("theme:a") is None
+    assert cache.get("cafe:2") == {"id": "2"}
+    assert "theme:a" not in cache._keys_by_tag
+
+
+def test_stale_generation_is_not_stored():
+    cache = TaggedCache(ttl=60)
+    generation = cache.generation
+    # 조회 중에 쓰기가 끝나서 무효화됨
+    cache.invalidate_tags("cafe:1")
+    assert not cache.set("cafe:1", {"status": "OLD"}, generation=generation)
+    assert cache.get("cafe:1") is None
+
+
+def test_eviction_drops_tags():
+    cache = TaggedCache(ttl=60, maxsize=2)
+    for i in range(3):
+        cache.set(i, i, tags=[f"t:{i}"])
+    assert len(cache) == 2
+    assert "t:0" not in cache._keys_by_tag
+    assert cache.stats()["size"] == 2
@@ -0,0 +1,35 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.prisma import prisma
+from app.routers import cafes
+
+
+client = TestClient(app)
+
+
+class FakeCafes:
+    """
+    find_many 에 넘긴 조건만 기록하는 가짜 prisma.cafe
+    """
+
+    def __init__(self):
+        self.wheres = list()
+
+    async def find_many(self, where, **options):
+        self.wheres.append(where)
+        return []
+
+
+def test_search_with_cafe_id_keeps_selected_cafe(monkeypatch):
+    async def search_cafes(term):
+        return ["c1", "c2"]
+
+    delegate = FakeCafes()
+    monkeypatch.setattr(cafes, "search_cafes", search_cafes)
+    monkeypatch.setattr(prisma, "cafe", delegate)
+
+    response = client.get("/cafes?term=room&cafeId=c9&count=none")
+    assert response.status_code == 200
+    # 검색어와 맞지 않는 cafeId 카페도 OR 로 남아야 한다
+    assert delegate.wheres == [{"OR": [{"id": {"in": ["c1", "c2"]}}, {"id": "c9"}]}]
@@ -0,0 +1,56 @@
+import asyncio
+
+from app.services import cascade
+from app.services.cascade import group_cafe_rows
+
+
+class ForeignKeyError(Exception):
+    pass
+
+
+def test_group_cafe_rows():
+    cafes = [
+        {"id": "a", "images": '["cafes/a.webp"]'},
+        {"id": "b", "images": None},
+    ]
+    themes = [
+        {"id": "t1", "cafeId": "a", "thumbnail": "themes/t1.webp"},
+        {"id": "t2", "cafeId": "b", "thumbnail": None},
+        {"id": "t3", "cafeId": "c", "thumbnail": "themes/t3.webp"},
+    ]
+    found, theme_ids, paths = group_cafe_rows(cafes, themes)
+    assert found == ["a", "b"]
+    assert theme_ids == {"a": ["t1"], "b": ["t2"]}
+    assert paths == {"a": ["cafes/a.webp", "themes/t1.webp"], "b": []}
+
+
+def test_delete_cafes_reports_blocked(monkeypatch):
+    rows = {"a": ["t1"], "b": ["t2"]}
+    blocked = {"b"}
+
+    async def read(ids):
+        found = [x for x in ids if x in rows]
+        return found, {x: list(rows[x]) for x in found}, {x: [] for x in found}
+
+    async def delete(ids, theme_ids):
+        if blocked & set(ids):
+            raise ForeignKeyError()
+
+    async def remove(s3, paths, deferred):
+        return {"deleted": len(paths), "errors": []}
+
+    async def invalidate(*tags):
+        pass
+
+    monkeypatch.setattr(cascade, "ForeignKeyViolationError", ForeignKeyError)
+    monkeypatch.setattr(cascade, "read_cafes_for_delete", read)
+    monkeypatch.setattr(cascade, "delete_cafe_rows", delete)
+    monkeypatch.setattr(cascade, "remove_images", remove)
+    monkeypatch.setattr(cascade, "invalidate_entities", invalidate)
+    monkeypatch.setattr(cascade, "unindex_cafe", lambda *args: None)
+    monkeypatch.setattr(cascade, "mark_theme_counts_stale", lambda: None)
+
+    result = asyncio.run(cascade.delete_cafes(None, ["a", "b", "c"]))
+    assert result["deleted"] == ["a"]
+    assert result["blocked"] == ["b"]
+    assert result["notFound"] == ["c"]
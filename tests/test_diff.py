@@ -0,0 +1,32 @@
+from app.utils.diff import diff_themes, normalize_theme_name
+
+
+def test_normalize_theme_name():
+    assert normalize_theme_name("비밀의  방!") == normalize_theme_name("비밀의방")
+    assert normalize_theme_name("ＡＢＣ 방탈출") == normalize_theme_name("abc방탈출")
+    assert normalize_theme_name("[공포] 인형", ignore_punctuation=False) == "[공포]인형"
+    assert normalize_theme_name("a  b", ignore_spaces=False) == "a b"
+
+
+def test_diff_ignores_spacing_and_width():
+    diff = diff_themes(["비밀의 방", "ＡＢＣ"], ["비밀의방", "abc"])
+    assert diff.added == []
+    assert diff.removed == []
+    assert diff.renamed == []
+    assert diff.different == []
+
+
+def test_diff_buckets():
+    diff = diff_themes(
+        ["저주받은 인형", "사라진 아이", "폐교"],
+        ["저주받은 인형", "사라진 아이들", "우주선"],
+    )
+    assert diff.added == ["우주선"]
+    assert diff.removed == ["폐교"]
+    assert diff.renamed == [("사라진 아이", "사라진 아이들")]
+    assert diff.different == sorted(["우주선", "폐교", "사라진 아이", "사라진 아이들"])
+
+
+def test_diff_keeps_original_names():
+    diff = diff_themes([], ["  Escape Room "])
+    assert diff.added == ["  Escape Room "]
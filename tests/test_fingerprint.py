@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+from app.utils.fingerprint import (
+    Fingerprint,
+    conditional_headers,
+    hash_names,
+    make_fingerprint,
+    stored_fingerprint,
+)
+
+HEADERS = {"ETag": '"abc"', "Last-Modified": "Mon, 01 Aug 2022 00:00:00 GMT"}
+
+
+def test_hash_ignores_order():
+    assert hash_names(["b", "a"]) == hash_names(["a", "b"])
+    assert hash_names(["a"]) != hash_names(["a", "b"])
+    assert hash_names([]) == ""
+
+
+def test_empty_page_has_no_fingerprint():
+    # 셀렉터가 아무것도 못 찾은 페이지는 조건부 요청으로 건너뛰지 않는다
+    fingerprint = make_fingerprint(HEADERS, [])
+    assert fingerprint == Fingerprint()
+    assert conditional_headers(fingerprint) == {}
+
+
+def test_conditional_headers():
+    fingerprint = make_fingerprint(HEADERS, ["비밀의 방"])
+    assert conditional_headers(fingerprint) == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Mon, 01 Aug 2022 00:00:00 GMT",
+    }
+    assert conditional_headers(make_fingerprint({}, ["비밀의 방"])) == {}
+
+
+def test_stored_fingerprint():
+    scrapper = SimpleNamespace(etag='"abc"', lastModified="", contentHash="hash")
+    assert stored_fingerprint(scrapper) == Fingerprint('"abc"', "", "hash")
@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+from app.config import settings
+from app.services import genres
+
+
+def test_reload_is_shared_and_throttled(monkeypatch):
+    loads = list()
+
+    async def load_genres():
+        loads.append(1)
+        await asyncio.sleep(0.01)
+        monkeypatch.setattr(genres, "_loaded_at", time.monotonic())
+
+    monkeypatch.setattr(genres, "load_genres", load_genres)
+    monkeypatch.setattr(genres, "_reload", None)
+    monkeypatch.setattr(genres, "_loaded_at", time.monotonic() - 60)
+    monkeypatch.setattr(settings, "genre_reload_seconds", 5)
+
+    async def reload_many():
+        await asyncio.gather(*(genres.reload_genres() for _ in range(5)))
+
+    # 동시에 들어온 요청은 읽기 하나를 같이 기다린다
+    asyncio.run(reload_many())
+    assert len(loads) == 1
+
+    # 방금 읽었으면 건너뛴다
+    asyncio.run(reload_many())
+    assert len(loads) == 1
+
+
+class FakeBatcher:
+    def __init__(self):
+        self.queries = list()
+
+    def execute_raw(self, query, *args):
+        self.queries.append((query, args))
+
+
+def test_link_theme_genres_replaces_links():
+    batcher = FakeBatcher()
+    genres.link_theme_genres(batcher, "t1", ["g1", "g2", "g1"])
+    assert batcher.queries == [
+        (
+            "DELETE FROM _GenreToTheme WHERE B = ? AND A NOT IN (?, ?)",
+            ("t1", "g1", "g2"),
+        ),
+        (
+            "INSERT IGNORE INTO _GenreToTheme (A, B) VALUES (?, ?), (?, ?)",
+            ("g1", "t1", "g2", "t1"),
+        ),
+    ]
+
+
+def test_link_theme_genres_clears_links():
+    batcher = FakeBatcher()
+    genres.link_theme_genres(batcher, "t1", [])
+    assert batcher.queries == [("DELETE FROM _GenreToTheme WHERE B = ?", ("t1",))]
@@ -0,0 +1,74 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.utils import image
+from app.utils.image import ImageUploadError, IngestedImage, StoredImage
+
+
+class FakeImageSources:
+    """
+    색인 추가/삭제만 기록하는 가짜 prisma.imagesource
+    """
+
+    def __init__(self):
+        self.created = list()
+        self.deleted = list()
+
+    async def delete_many(self, where):
+        self.deleted.extend(where["id"]["in"])
+
+    async def create_many(self, data, skip_duplicates=False):
+        self.created.extend(data)
+
+
+def fake_ingest(monkeypatch, known):
+    sources = FakeImageSources()
+
+    async def find_image_sources(urls):
+        return {x: known[x] for x in urls if x in known}
+
+    def upload_image(url, folder_name):
+        if "bad" in url:
+            raise ImageUploadError("다운로드 실패: 404")
+        return StoredImage(key=f"{folder_name}/{url[-1]}.webp", hash=url[-1])
+
+    monkeypatch.setattr(image, "prisma", SimpleNamespace(imagesource=sources))
+    monkeypatch.setattr(image, "find_image_sources", find_image_sources)
+    monkeypatch.setattr(image, "upload_image", upload_image)
+    return sources
+
+
+def test_ingest_images_keeps_order_and_reports_failures(monkeypatch):
+    sources = fake_ingest(monkeypatch, {})
+    ingested = asyncio.run(
+        image.ingest_images(
+            ["http://a.com/1", "/cafes/old.webp", "http://bad.com/2"], "cafes"
+        )
+    )
+
+    assert ingested == [
+        IngestedImage(
+            source="http://a.com/1",
+            url="/cafes/1.webp",
+            stored=StoredImage(key="cafes/1.webp", hash="1"),
+        ),
+        IngestedImage(source="/cafes/old.webp", url="/cafes/old.webp"),
+        IngestedImage(source="http://bad.com/2", error="다운로드 실패: 404"),
+    ]
+    assert [x["url"] for x in sources.created] == ["http://a.com/1"]
+
+
+def test_ingest_reuses_indexed_key_or_uploads_again(monkeypatch):
+    known = {"http://a.com/1": "cafes/kept.webp", "http://a.com/2": "cafes/gone.webp"}
+    sources = fake_ingest(monkeypatch, known)
+    monkeypatch.setattr(image, "touch_known_object", lambda key: "kept" in key)
+
+    ingested = asyncio.run(
+        image.ingest_images(["http://a.com/1", "http://a.com/2"], "cafes")
+    )
+
+    assert [x.url for x in ingested] == ["/cafes/kept.webp", "/cafes/2.webp"]
+    # 객체가 지워진 색인은 새 키로 바꾼다
+    assert sources.deleted == [image.source_id("http://a.com/2")]
+    assert [x["key"] for x in sources.created] == ["cafes/2.webp"]
+
@@ -0,0 +1,55 @@
+import io
+
+import pytest
+from PIL import Image
+
+from app.utils.image_processing import (
+    ImageProcessingError,
+    encode_webp,
+    load_image,
+    variant_key,
+    variant_sizes,
+)
+
+
+def make_image(format: str, size=(1200, 800), mode="RGB") -> io.BytesIO:
+    f = io.BytesIO()
+    Image.new(mode, size, "red").save(f, format)
+    f.seek(0)
+    return f
+
+
+def test_detects_real_format_and_encodes_webp():
+    img = load_image(make_image("PNG", mode="P"), 2048, 10_000_000)
+    assert img.mode == "RGB"
+
+    encoded = encode_webp(img, 600, 80)
+    assert (encoded.width, encoded.height) == (600, 400)
+    assert Image.open(encoded.file).format == "WEBP"
+    assert encoded.size > 0
+
+
+def test_downscales_on_load():
+    img = load_image(make_image("PNG", size=(4000, 1000)), 2048, 10_000_000)
+    assert img.size == (2048, 512)
+
+    encoded = encode_webp(img, 2048, 80)
+    assert (encoded.width, encoded.height) == (2048, 512)
+
+
+def test_keeps_transparency():
+    img = load_image(make_image("PNG", mode="RGBA"), 2048, 10_000_000)
+    assert img.mode == "RGBA"
+
+
+def test_rejects_non_image_and_huge_image():
+    with pytest.raises(ImageProcessingError):
+        load_image(io.BytesIO(b"<html></html>"), 2048, 10_000_000)
+    with pytest.raises(ImageProcessingError):
+        load_image(make_image("JPEG"), 2048, 1000)
+
+
+def test_variants():
+    img = Image.new("RGB", (500, 300))
+    assert variant_sizes(img, [640, 320, 320]) == [320]
+    assert variant_key("themes/abc.webp", 320) == "themes/abc_320.webp"
@@ -0,0 +1,35 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.config import settings
+from app.services import jobs
+
+
+class FakeJobs:
+    """
+    update_many 조건만 기록하는 가짜 prisma.job
+    """
+
+    def __init__(self):
+        self.updates = list()
+
+    async def update_many(self, where, data):
+        self.updates.append((where, sorted(data)))
+        return 1
+
+
+def test_keep_job_alive_touches_running_job(monkeypatch):
+    fake = FakeJobs()
+    monkeypatch.setattr(jobs, "prisma", SimpleNamespace(job=fake))
+    monkeypatch.setattr(settings, "job_heartbeat_seconds", 0.01)
+
+    async def run_long_job():
+        heartbeat = asyncio.ensure_future(jobs.keep_job_alive("j1"))
+        await asyncio.sleep(0.05)
+        heartbeat.cancel()
+
+    asyncio.run(run_long_job())
+    assert len(fake.updates) >= 2
+    for where, fields in fake.updates:
+        assert where == {"id": "j1", "status": "RUNNING"}
+        assert fields == ["updatedAt"]
@@ -0,0 +1,169 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.utils.pagination import (
+    CountMode,
+    InvalidCursorError,
+    count_mode,
+    decode_cursor,
+    encode_cursor,
+    find_page,
+    find_ranked_page,
+    invalidate_counts,
+    keyset_where,
+    order_by,
+    paginate_items,
+)
+
+
+def test_cursor_round_trip():
+    created = datetime(2022, 11, 1, 12, 30, tzinfo=timezone.utc)
+    cursor = encode_cursor("createdAt", created, "abc")
+    assert decode_cursor(cursor, "createdAt") == (created, "abc")
+
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, "name")
+    with pytest.raises(InvalidCursorError):
+        decode_cursor("not-a-cursor", "createdAt")
+
+
+def test_keyset_where():
+    assert order_by("name", "asc") == [{"name": "asc"}, {"id": "asc"}]
+    assert keyset_where("name", "asc", "b", "x") == {
+        "OR": [{"name": {"gt": "b"}}, {"name": "b", "id": {"gt": "x"}}]
+    }
+    assert keyset_where("id", "desc", "x", "x") == {"id": {"lt": "x"}}
+
+
+class FakeDelegate:
+    """
+    name, id 오름차순 정렬과 커서 조건만 흉내내는 가짜 prisma 모델
+    """
+
+    def __init__(self, rows):
+        self.rows = sorted(rows, key=lambda x: (x.name, x.id))
+
+    async def count(self, where):
+        return len(self.rows)
+
+    async def find_many(self, take, order, where, skip=0, include=None):
+        rows = self.rows
+        if where:
+            after = where["OR"]
+            value, id = after[1]["name"], after[1]["id"]["gt"]
+            rows = [x for x in rows if (x.name, x.id) > (value, id)]
+        return rows[skip : skip + take]
+
+
+def test_find_page_walks_all_rows_once():
+    rows = [SimpleNamespace(id=str(i), name="ab"[i % 2]) for i in range(7)]
+    delegate = FakeDelegate(rows)
+
+    seen = list()
+    cursor = ""
+    while cursor is not None:
+        page = asyncio.run(
+            find_page(delegate, {}, "name", "asc", take=3, cursor=cursor)
+        )
+        assert page["total"] == 7
+        seen.extend(x.id for x in page["items"])
+        cursor = page["nextCursor"]
+
+    assert seen == [x.id for x in delegate.rows]
+
+
+def test_find_page_rejects_bad_cursor():
+    with pytest.raises(InvalidCursorError):
+        asyncio.run(find_page(FakeDelegate([]), {}, "name", "asc", cursor="??"))
+
+
+def test_cached_count_until_invalidated():
+    class CountingDelegate(FakeDelegate):
+        calls = 0
+
+        async def count(self, where):
+            self.calls += 1
+            return len(self.rows)
+
+    delegate = CountingDelegate([SimpleNamespace(id="1", name="a")])
+
+    def total():
+        page = asyncio.run(
+            find_page(delegate, {}, "name", "asc", count=CountMode.CACHED, name="t")
+        )
+        return page["total"]
+
+    assert total() == 1
+    delegate.rows.append(SimpleNamespace(id="2", name="b"))
+    assert total() == 1
+    assert delegate.calls == 1
+
+    invalidate_counts("t")
+    assert total() == 2
+
+    page = asyncio.run(find_page(delegate, {}, "name", "asc", count=CountMode.NONE))
+    assert page["total"] is None
+
+
+def test_with_total_is_count_none_alias():
+    assert count_mode(CountMode.CACHED, None) == CountMode.CACHED
+    assert count_mode(CountMode.CACHED, True) == CountMode.CACHED
+    assert count_mode(CountMode.EXACT, False) == CountMode.NONE
+    assert count_mode(None, None) == CountMode.EXACT
+
+
+def test_paginate_items_walks_all_rows_once():
+    rows = [{"id": str(i), "count": i % 3} for i in range(10)]
+    seen = list()
+    cursor = ""
+    while cursor is not None:
+        page = paginate_items(rows, "count", "desc", take=4, cursor=cursor)
+        seen.extend(x["id"] for x in page["items"])
+        cursor = page["nextCursor"]
+    assert page["total"] == 10
+    assert sorted(seen) == sorted(x["id"] for x in rows)
+
+    first = paginate_items(rows, "count", "desc", take=3)["items"]
+    assert [x["id"] for x in first] == ["8", "5", "2"]
+
+    with pytest.raises(InvalidCursorError):
+        paginate_items(rows, "count", "desc", cursor=encode_cursor("count", "a", "1"))
+
+
+def test_find_ranked_page_keeps_rank_across_windows():
+    class RankedDelegate:
+        def __init__(self, rows):
+            self.rows = rows
+
+        async def count(self, where):
+            ids = where["AND"][1]["id"]["in"]
+            return len([x for x in self.rows if x.id in ids and x.name == "a"])
+
+        async def find_many(self, where, include=None):
+            ids = where["AND"][1]["id"]["in"]
+            return [x for x in self.rows if x.id in ids and x.name == "a"]
+
+    rows = [SimpleNamespace(id=str(i), name="ab"[i % 3 == 0]) for i in range(10)]
+    ranked = [str(i) for i in reversed(range(10))]
+    delegate = RankedDelegate(rows)
+
+    seen = list()
+    cursor = ""
+    while cursor is not None:
+        page = asyncio.run(
+            find_ranked_page(
+                delegate, {"name": "a"}, ranked, take=2, cursor=cursor, window=3
+            )
+        )
+        assert page["total"] == 6
+        seen.extend(x.id for x in page["items"])
+        cursor = page["nextCursor"]
+    assert seen == ["8", "7", "5", "4", "2", "1"]
+
+    page = asyncio.run(
+        find_ranked_page(delegate, {"name": "a"}, ranked, skip=4, take=5, window=3)
+    )
+    assert [x.id for x in page["items"]] == ["2", "1"]
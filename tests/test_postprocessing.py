@@ -0,0 +1,50 @@
+import pytest
+
+from app.utils.postprocessing import Pipeline, PostProcessingError, ScrapperPipelines
+
+
+def test_pipeline_ops():
+    pipeline = Pipeline(
+        "\n".join(
+            [
+                r"remove \[[^\]]*\]",
+                r"replace (\d+)인 => \1명",
+                "strip_prefix NEW ",
+                "exclude 준비중",
+            ]
+        )
+    )
+    names = ["[공포] 저주받은 인형", "NEW 사라진 아이 2인", "준비중인 테마"]
+    assert pipeline(names) == ["저주받은 인형", "사라진 아이 2명"]
+
+
+def test_pipeline_split():
+    assert Pipeline("split /")(["A / B", "C"]) == ["A", "B", "C"]
+    assert Pipeline("split | 0")(["테마 | 60분", "기타"]) == ["테마", "기타"]
+    assert Pipeline("split | -1")(["테마 | 60분"]) == ["60분"]
+
+
+def test_bare_regex_line_removes_matches():
+    assert Pipeline(r"\(.*\)")(["테마(신규)"]) == ["테마"]
+
+
+def test_invalid_syntax():
+    with pytest.raises(PostProcessingError):
+        Pipeline("remove [")
+    with pytest.raises(PostProcessingError):
+        Pipeline("replace abc")
+    with pytest.raises(PostProcessingError):
+        Pipeline("match")
+
+
+def test_branch_filter():
+    names = ["A1", "A2", "B1", "C1"]
+    branches = ["강남점", "강남점", "홍대점", ""]
+
+    pipelines = ScrapperPipelines(theme=Pipeline(), branch=Pipeline("match 홍대"))
+    assert pipelines.process(names, branches) == ["B1", "C1"]
+
+    pipelines = ScrapperPipelines(theme=Pipeline(), branch=Pipeline("strip_suffix 점"))
+    assert pipelines.process(
+        names, branches, keep_branch=lambda branch: branch == "강남"
+    ) == ["A1", "A2", "C1"]
@@ -0,0 +1,19 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.utils.projection import InvalidFieldError, parse_names, project
+
+
+def test_parse_names():
+    allowed = ("id", "name", "status")
+    assert parse_names(None, allowed, ("id",)) == ["id"]
+    assert parse_names(" name, status,name ", allowed, ()) == ["name", "status"]
+    with pytest.raises(InvalidFieldError):
+        parse_names("name,intro", allowed, ())
+
+
+def test_project():
+    item = SimpleNamespace(id="1", name="방", intro="긴 소개")
+    assert project(item, ["id", "name"]) == {"id": "1", "name": "방"}
+    assert project({"id": "1"}, ["id", "name"]) == {"id": "1", "name": None}
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from app.config import settings
+from app.utils import scrapper as scrapper_utils
+from app.utils.scrapper import run_browser_scrap
+
+
+class FakePool:
+    """
+    브라우저 대신 스크래퍼 url 을 테마명으로 돌려주는 가짜 BrowserPool
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.threads = list()
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def run(self, fn, scrapper):
+        with self.lock:
+            self.threads.append(threading.current_thread())
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        threading.Event().wait(self.delay)
+        with self.lock:
+            self.running -= 1
+        return [scrapper.url], None
+
+
+def test_browser_scrap_runs_off_event_loop():
+    pool = FakePool()
+    scrapper = SimpleNamespace(url="https://example.com")
+
+    async def scrap():
+        slots = asyncio.Semaphore(1)
+        result = await run_browser_scrap(
+            scrapper, pool, ThreadPoolExecutor(max_workers=1), slots
+        )
+        return result, threading.current_thread()
+
+    (names, branches), loop_thread = asyncio.run(scrap())
+    assert names == ["https://example.com"]
+    assert branches is None
+    assert pool.threads and pool.threads[0] is not loop_thread
+
+
+def test_browser_timeout_excludes_queue_time(monkeypatch):
+    # 하나씩 0.2초 걸리는 스크랩 4개를 브라우저 하나로 처리 (타임아웃 0.3초)
+    monkeypatch.setattr(settings, "scrapper_timeout", 0.1)
+    pool = FakePool(delay=0.2)
+    executor = ThreadPoolExecutor(max_workers=4)
+
+    async def scrap_all():
+        slots = asyncio.Semaphore(1)
+        return await asyncio.gather(
+            *(
+                run_browser_scrap(SimpleNamespace(url=str(i)), pool, executor, slots)
+                for i in range(4)
+            )
+        )
+
+    results = asyncio.run(scrap_all())
+    assert [x[0] for x in results] == [["0"], ["1"], ["2"], ["3"]]
+    assert pool.max_running == 1
+
+
+class FakeBatch:
+    """
+    metric.upsert 인자만 기록하는 가짜 prisma.batch_()
+    """
+
+    def __init__(self):
+        self.upserts = list()
+        self.metric = SimpleNamespace(upsert=lambda **args: self.upserts.append(args))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+def test_save_metrics_upserts_by_scrapper(monkeypatch):
+    batch = FakeBatch()
+    invalidated = list()
+
+    async def invalidate_entities(*tags):
+        invalidated.extend(tags)
+
+    monkeypatch.setattr(scrapper_utils, "prisma", SimpleNamespace(batch_=lambda: batch))
+    monkeypatch.setattr(scrapper_utils, "invalidate_entities", invalidate_entities)
+    asyncio.run(scrapper_utils.save_metrics([("s1", {"status": "NOTHING_WRONG"})]))
+
+    data = {"status": "NOTHING_WRONG", "stale": False}
+    assert batch.upserts == [
+        {
+            "where": {"scrapperId": "s1"},
+            "data": {
+                "create": {**data, "scrapper": {"connect": {"id": "s1"}}},
+                "update": data,
+            },
+        }
+    ]
+    assert invalidated == [scrapper_utils.tag("scrapper", "s1")]
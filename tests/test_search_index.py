@@ -0,0 +1,41 @@
+from app.utils.search_index import SearchIndex, to_chosung
+
+
+def make_index() -> SearchIndex:
+    index = SearchIndex()
+    index.add("1", ["비밀의 방", "비밀의방 (강남점)"])
+    index.add("2", ["저주받은 인형"])
+    index.add("3", ["방탈출 카페"])
+    index.add("4", ["비밀"])
+    return index
+
+
+def test_to_chosung():
+    assert to_chosung("방탈출 cafe") == "ㅂㅌㅊ cafe"
+
+
+def test_ranked_exact_prefix_contains():
+    index = make_index()
+    assert index.search("비밀") == ["4", "1"]
+    assert index.search("방") == ["3", "1"]
+    assert index.search("인형") == ["2"]
+
+
+def test_chosung_and_fuzzy():
+    index = make_index()
+    assert index.search("ㅂㅌㅊ") == ["3"]
+    assert index.search("ㅈㅈㅂㅇ") == ["2"]
+    # 오타 (받은 -> 밭은)
+    assert index.search("저주밭은 인형") == ["2"]
+    assert index.search("저주밭은 인형", fuzzy=False) == []
+
+
+def test_update_and_remove():
+    index = make_index()
+    index.add("2", ["공포의 인형"])
+    assert index.search("저주") == []
+    assert index.search("공포") == ["2"]
+
+    index.remove("2")
+    assert index.search("인형") == []
+    assert "인형" not in index.postings
@@ -0,0 +1,44 @@
+from app.utils.static import select_grouped_texts, select_texts
+
+HTML = """
+<html><body>
+  <ul class="themes">
+    <li><h3>  비밀의
+      방 </h3></li>
+    <li><h3>저주받은 <b>인형</b></h3></li>
+    <li><h3></h3></li>
+  </ul>
+</body></html>
+""".encode("utf-8")
+
+
+def test_css_selector():
+    assert select_texts(HTML, "ul.themes h3") == ["비밀의 방", "저주받은 인형"]
+
+
+def test_xpath_selector():
+    assert select_texts(HTML, "//ul[@class='themes']//h3") == [
+        "비밀의 방",
+        "저주받은 인형",
+    ]
+    assert select_texts(HTML, "//ul/li/h3/b/text()") == ["인형"]
+
+
+def test_empty_input():
+    assert select_texts(b"", "h3") == []
+    assert select_texts(HTML, "") == []
+
+
+GROUPED_HTML = """
+<div class="branch"><h2>강남점</h2><p class="t">A</p><p class="t">B</p></div>
+<div class="branch"><h2>홍대점</h2><p class="t">C</p></div>
+""".encode("utf-8")
+
+
+def test_grouped_selectors():
+    expected = (["A", "B", "C"], ["강남점", "강남점", "홍대점"])
+    assert select_grouped_texts(GROUPED_HTML, "div.branch", "h2", "p.t") == expected
+    assert (
+        select_grouped_texts(GROUPED_HTML, "//div[@class='branch']", "/h2", "/p")
+        == expected
+    )
@@ -0,0 +1,143 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services import storage
+from app.services.storage import collect_garbage, delete_keys
+
+NOW = datetime.now(timezone.utc)
+
+
+class FakeS3:
+    """
+    list_objects_v2 페이지 나누기와 delete_objects 만 흉내내는 가짜 S3 클라이언트
+    """
+
+    def __init__(self, objects, page_size=2):
+        # key -> (LastModified, Size)
+        self.objects = objects
+        self.page_size = page_size
+        self.deleted = list()
+
+    def get_paginator(self, name):
+        assert name == "list_objects_v2"
+        return self
+
+    def paginate(self, Bucket, Prefix):
+        keys = sorted(x for x in self.objects if x.startswith(Prefix))
+        for i in range(0, len(keys), self.page_size):
+            yield {
+                "Contents": [
+                    {
+                        "Key": x,
+                        "LastModified": self.objects[x][0],
+                        "Size": self.objects[x][1],
+                    }
+                    for x in keys[i : i + self.page_size]
+                ]
+            }
+
+    def delete_objects(self, Bucket, Delete):
+        keys = [x["Key"] for x in Delete["Objects"]]
+        self.deleted.extend(keys)
+        for key in keys:
+            self.objects.pop(key)
+        return {}
+
+
+def make_s3():
+    old = NOW - timedelta(hours=48)
+    return FakeS3(
+        {
+            "cafes/used.webp": (old, 10),
+            "cafes/orphan.webp": (old, 20),
+            "cafes/fresh.webp": (NOW, 30),
+            "themes/orphan.png": (old, 40),
+            "other/orphan.png": (old, 50),
+        }
+    )
+
+
+def test_collect_garbage_deletes_old_unreferenced_objects():
+    s3 = make_s3()
+    result = collect_garbage(
+        s3, {"cafes/used.webp"}, ["cafes/", "themes/"], 24, dry_run=False
+    )
+
+    assert sorted(s3.deleted) == ["cafes/orphan.webp", "themes/orphan.png"]
+    assert result["scanned"] == 4
+    assert result["orphaned"] == 2
+    assert result["deleted"] == 2
+    assert result["bytes"] == 60
+    assert "other/orphan.png" in s3.objects
+
+
+def test_collect_garbage_dry_run_keeps_objects():
+    s3 = make_s3()
+    result = collect_garbage(s3, {"cafes/used.webp"}, ["cafes/", "themes/"], 24)
+
+    assert s3.deleted == []
+    assert result["orphaned"] == 2
+    assert result["bytes"] == 60
+    assert sorted(result["samples"]) == ["cafes/orphan.webp", "themes/orphan.png"]
+
+
+def test_collect_garbage_rejects_short_grace_period():
+    with pytest.raises(ValueError):
+        collect_garbage(make_s3(), set(), ["cafes/"], 0)
+
+
+class FailingS3:
+    """
+    요청마다 키 묶음을 기록하고 failing 에 있는 키는 실패로 돌려주는 가짜 S3 클라이언트
+    """
+
+    def __init__(self, failing):
+        self.failing = failing
+        self.batches = list()
+
+    def delete_objects(self, Bucket, Delete):
+        keys = [x["Key"] for x in Delete["Objects"]]
+        self.batches.append(keys)
+        return {
+            "Errors": [
+                {"Key": x, "Code": "AccessDenied", "Message": ""}
+                for x in keys
+                if x in self.failing
+            ]
+        }
+
+
+def test_delete_keys_in_batches():
+    keys = [f"cafes/{i}.webp" for i in range(2500)]
+    s3 = FailingS3({"cafes/7.webp"})
+    deleted, errors = delete_keys(s3, keys + keys[:10] + [""])
+
+    assert [len(x) for x in s3.batches] == [1000, 1000, 500]
+    assert deleted == 2499
+    assert [x["Key"] for x in errors] == ["cafes/7.webp"]
+
+
+def test_s3_client_is_created_once(monkeypatch):
+    created = list()
+
+    class FakeSession:
+        def client(self, name, **kwargs):
+            created.append(name)
+            return object()
+
+    monkeypatch.setattr(storage, "_client", None)
+    monkeypatch.setattr(storage.boto3.session, "Session", FakeSession)
+    clients = list()
+    threads = [
+        threading.Thread(target=lambda: clients.append(storage.get_s3_client()))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert created == ["s3"]
+    assert len(set(map(id, clients))) == 1
@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from app.dependencies import get_storage
+from app.main import app
+from app.prisma import prisma
+from app.routers import themes
+from app.utils.image import image_keys
+
+
+client = TestClient(app)
+
+
+class FakeS3:
+    def __init__(self):
+        self.deleted = list()
+
+    def delete_objects(self, Bucket, Delete):
+        self.deleted.extend(x["Key"] for x in Delete["Objects"])
+        return {}
+
+
+class FakeThemes:
+    """
+    id 로 찾고 지우는 것만 흉내내는 가짜 prisma.theme
+    """
+
+    def __init__(self, *rows):
+        self.rows = {x.id: x for x in rows}
+
+    async def find_unique(self, where, include=None):
+        return self.rows.get(where["id"])
+
+    async def delete(self, where):
+        return self.rows.pop(where["id"])
+
+
+class FakeImageSources:
+    async def find_many(self, where):
+        return []
+
+
+def test_delete_theme_removes_thumbnail(monkeypatch):
+    s3 = FakeS3()
+    theme = SimpleNamespace(id="t1", cafeId="c1", thumbnail="/themes/a.webp")
+    monkeypatch.setattr(prisma, "theme", FakeThemes(theme))
+    monkeypatch.setattr(prisma, "imagesource", FakeImageSources())
+    app.dependency_overrides[get_storage] = lambda: s3
+    try:
+        response = client.delete("/themes/t1")
+        assert response.status_code == 200
+        assert response.json() == {"deleted": len(s3.deleted), "errors": []}
+        assert s3.deleted == image_keys("themes/a.webp")
+
+        assert client.delete("/themes/t1").status_code == 404
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_update_missing_theme_is_not_found(monkeypatch):
+    async def validate_genre_ids(ids):
+        pass
+
+    def batch_():
+        raise AssertionError("없는 테마는 트랜잭션을 열지 않는다")
+
+    monkeypatch.setattr(themes, "validate_genre_ids", validate_genre_ids)
+    monkeypatch.setattr(prisma, "theme", FakeThemes())
+    monkeypatch.setattr(prisma, "batch_", batch_)
+    body = {
+        "cafeId": "c1",
+        "name": "theme",
+        "displayName": "theme",
+        "intro": "",
+        "thumbnail": "",
+        "price": 0,
+        "during": 60,
+        "minPerson": 2,
+        "maxPerson": 4,
+        "level": 3,
+        "status": "PUBLISHED",
+    }
+    assert client.patch("/themes/missing", json=body).status_code == 404